@@ -0,0 +1,140 @@
+#!/usr/bin/python
+#
+#   File: AtomicFile.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Crash-safe file saving.
+
+atomicWrite() writes to a temporary file in the same directory, fsyncs it,
+and renames it over the target, so a crash or a full disk leaves either the
+old file or the new one, never a truncated one.  writeIfChanged() skips the
+write entirely when the file already has the same contents.
+BackgroundSaver does the same from a worker thread, for big files.
+"""
+from __future__ import print_function, division
+
+import os
+import tempfile
+import threading
+from Queue import Queue, Empty
+
+# The permissions a newly created file would get
+_umask = os.umask(0)
+os.umask(_umask)
+NEW_FILE_MODE = 0o666 & ~_umask
+
+
+#----------------------------------------------------------------------------
+def atomicWrite(path, data):
+    """ Replace the contents of path with data (a str) atomically """
+    path = os.path.realpath(path)  # replace a symlink's target, not the link
+    dirName = os.path.dirname(path)
+    fd, tmpPath = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=dirName)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmpPath, os.stat(path).st_mode & 0o7777)
+        else:
+            os.chmod(tmpPath, NEW_FILE_MODE)
+        if os.name == "nt" and os.path.exists(path):
+            os.remove(path)  # rename() can't replace an existing file on Windows
+        os.rename(tmpPath, path)
+    except:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+
+    if os.name == "posix":
+        # Make the rename itself durable
+        dirFd = os.open(dirName, os.O_RDONLY)
+        try:
+            os.fsync(dirFd)
+        finally:
+            os.close(dirFd)
+
+def hasContents(path, data):
+    """ Return True if the file at path contains exactly data """
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except (IOError, OSError):
+        return False
+
+def writeIfChanged(path, data):
+    """ atomicWrite() data to path unless it already has those contents.
+        Return True if the file was written.
+    """
+    if hasContents(path, data):
+        return False
+    atomicWrite(path, data)
+    return True
+
+#----------------------------------------------------------------------------
+class BackgroundSaver(object):
+    """ Saves files from a worker thread, one at a time, in the order requested.
+
+        save() takes a function that produces the file contents, so that
+        serialization happens off the calling thread too.  Completion callbacks
+        are called from poll(), which the GUI calls from its mainloop.
+    """
+    def __init__(self):
+        self.jobs    = Queue()
+        self.results = Queue()
+        self.thread  = None
+
+    def save(self, path, makeData, callback):
+        """ Write makeData() to path in the background, then call callback(path, error),
+            where error is None on success or a message.
+        """
+        self.jobs.put((path, makeData, callback))
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._worker, name="saver")
+            self.thread.daemon = True
+            self.thread.start()
+
+    def _worker(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                return
+            path, makeData, callback = job
+            try:
+                writeIfChanged(path, makeData())
+                error = None
+            except (IOError, OSError, ValueError) as e:
+                error = str(e)
+            self.results.put((callback, path, error))
+            self.jobs.task_done()
+
+    def poll(self):
+        """ Call the callbacks of finished saves.  Call this from the GUI thread. """
+        while True:
+            try:
+                callback, path, error = self.results.get_nowait()
+            except Empty:
+                return
+            callback(path, error)
+
+    def wait(self):
+        """ Block until all requested saves are finished, then call their callbacks """
+        self.jobs.join()
+        self.poll()
+
+    def close(self):
+        """ wait(), then end the worker thread, so it isn't killed while waiting at exit """
+        self.wait()
+        if self.thread is not None:
+            self.jobs.put(None)
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,185 @@
+#!/usr/bin/python
+#
+#   File: BuildCache.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Make-style up-to-date checks for commands.
+
+A command entry may declare the files it reads and writes with "inputs" and
+"outputs" fields, each a glob pattern or a list of them (relative to the
+directory runner was started in).  After the command succeeds, the cache
+records the command text, a content hash of every input, and the mtime and
+size of every output.  The next time, the command is up to date, and need
+not run, if the command text and the set of inputs are the same, no input's
+contents changed, and every output is still there, untouched.
+
+Files are only rehashed when their mtime or size changed since they were
+last hashed, so checking thousands of inputs costs about one stat() each.
+
+The cache is a JSON file in the user's cache directory, one per command file.
+check() may be called on worker threads while record() runs on another:  the
+cache's tables are only touched with its lock held, but files are hashed
+without it.
+"""
+from __future__ import print_function, division
+
+import os
+import glob
+import json
+import hashlib
+import threading
+
+from AtomicFile import writeIfChanged
+
+
+#----------------------------------------------------------------------------
+def cacheDir():
+    """ The directory runner keeps its caches in, e.g. ~/.cache/runner """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "runner")
+
+def expandGlobs(patterns):
+    """ Return the sorted absolute paths of the files matching patterns (a string or a list of strings) """
+    if isinstance(patterns, basestring):
+        patterns = [patterns]
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.expanduser(pattern)):
+            if os.path.isfile(path):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+def fileStamp(path):
+    """ Return [mtime, size] for path, or None if it doesn't exist """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime, st.st_size]
+
+#----------------------------------------------------------------------------
+class Snapshot(object):
+    """ The state of a command's inputs just before it runs (see BuildCache.check()) """
+    def __init__(self, name, cmdText, inputs, outputPatterns):
+        self.name    = name
+        self.cmdText = cmdText
+        self.inputs  = inputs   # {path: content hash}
+        self.outputPatterns = outputPatterns
+        self.upToDate = False
+
+#----------------------------------------------------------------------------
+class BuildCache(object):
+    """ Remembers the inputs and outputs of each command's last successful run """
+    CHUNK_SIZE = 1024 * 1024
+    VERSION    = 1
+
+    def __init__(self, path):
+        self.path  = path
+        self.cmdFile = None  # the command file the cache belongs to, if made by forCmdFile()
+        self.files = {}  # path -> [mtime, size, content hash], the hash cache
+        self.cmds  = {}  # button name -> {"cmd": text, "inputs": {path: hash}, "outputs": {path: [mtime, size]}}
+        self.lock  = threading.Lock()
+        self.load()
+
+    @classmethod
+    def forCmdFile(cls, cmdFilePath):
+        """ Return the cache for the command file at cmdFilePath """
+        key = hashlib.sha1(os.path.abspath(cmdFilePath).encode("utf-8")).hexdigest()[:16]
+        name = "{}-{}.json".format(os.path.splitext(os.path.basename(cmdFilePath))[0], key)
+        cache = cls(os.path.join(cacheDir(), "buildcache", name))
+        cache.cmdFile = cmdFilePath
+        return cache
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            return  # no cache yet, or a damaged one:  start over
+        if data.get("version") == self.VERSION:
+            self.files = data.get("files", {})
+            self.cmds  = data.get("cmds", {})
+
+    def save(self):
+        """ Write the cache, dropping hashes of files no command uses any more """
+        try:
+            writeIfChanged(self.path, self.dump())
+        except (IOError, OSError):
+            pass  # the cache is only an optimization
+
+    def dump(self):
+        """ Return the cache as JSON, dropping hashes of files no command uses any more.
+            Creates the cache's directory if needed, so the result can be written to self.path.
+            Raises OSError if it can't be created.
+        """
+        with self.lock:
+            used = set()
+            for entry in self.cmds.values():
+                used.update(entry["inputs"])
+            self.files = dict((path, value) for path, value in self.files.items() if path in used)
+            data = json.dumps({"version": self.VERSION, "files": self.files, "cmds": self.cmds},
+                              sort_keys=True, separators=(",", ":"))
+        dirName = os.path.dirname(self.path)
+        if not os.path.isdir(dirName):
+            os.makedirs(dirName)
+        return data
+
+    def hashFile(self, path):
+        """ Return the content hash of path, reusing the cached one if its mtime and size are unchanged.
+            Return None if the file can't be read.
+        """
+        stamp = fileStamp(path)
+        if stamp is None:
+            return None
+        with self.lock:
+            cached = self.files.get(path)
+        if cached is not None and cached[:2] == stamp:
+            return cached[2]
+        h = hashlib.sha1()
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    data = f.read(self.CHUNK_SIZE)
+                    if not data:
+                        break
+                    h.update(data)
+        except IOError:
+            return None
+        digest = h.hexdigest()
+        with self.lock:
+            self.files[path] = stamp + [digest]
+        return digest
+
+    def check(self, cmd, cmdText):
+        """ Take a Snapshot of cmd's inputs before running cmdText, and decide whether it's up to date.
+            Return None if cmd doesn't declare any inputs, so it always runs.
+        """
+        if not cmd.get("inputs"):
+            return None
+        inputs = dict((path, self.hashFile(path)) for path in expandGlobs(cmd["inputs"]))
+        snapshot = Snapshot(cmd["button"], cmdText, inputs, cmd.get("outputs", []))
+
+        with self.lock:
+            entry = self.cmds.get(snapshot.name)
+        if entry is not None and entry["cmd"] == cmdText and entry["inputs"] == inputs and \
+           None not in inputs.values():
+            outputs = expandGlobs(snapshot.outputPatterns)
+            snapshot.upToDate = (sorted(entry["outputs"]) == outputs and
+                                 all(fileStamp(path) == entry["outputs"][path] for path in outputs))
+        return snapshot
+
+    def record(self, snapshot, save=True):
+        """ Remember snapshot after its command succeeded, and save the cache unless save is False """
+        outputs = dict((path, fileStamp(path)) for path in expandGlobs(snapshot.outputPatterns))
+        with self.lock:
+            if snapshot.outputPatterns and not outputs:
+                self.cmds.pop(snapshot.name, None)  # it didn't make its outputs:  never up to date
+            else:
+                self.cmds[snapshot.name] = {"cmd": snapshot.cmdText, "inputs": snapshot.inputs, "outputs": outputs}
+        if save:
+            self.save()
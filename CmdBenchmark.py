@@ -0,0 +1,200 @@
+#!/usr/bin/python
+#
+#   File: CmdBenchmark.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Running one command repeatedly to measure how long it takes.
+
+A CmdBenchmark runs a command a fixed number of times, or over and over for
+a fixed number of seconds, keeping up to `concurrency` runs going at once.
+The first `warmup` runs are not measured, and the measured runs only start
+once they have all finished.  For each measured run it keeps the wall time,
+and the user and system CPU time the command and its children used (from
+wait4(), the per-process getrusage()), and it summarizes them as min, mean,
+median, p95, p99 and max.  A measured run that is cancelled, e.g. by
+stopping the benchmark, is only counted:  its truncated time isn't a sample.
+
+The results can be exported as JSON (the summary and every sample) or as
+CSV (one row per sample).
+"""
+from __future__ import print_function, division
+
+import json
+import time
+
+from Executor import CmdRun
+from History import percentile, formatDuration
+from AtomicFile import atomicWrite
+
+
+#----------------------------------------------------------------------------
+def summarize(values):
+    """ min, mean, median, p95, p99 and max of a list of numbers, or None if it's empty """
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "min"   : values[0],
+        "mean"  : sum(values) / len(values),
+        "median": percentile(values, 0.5),
+        "p95"   : percentile(values, 0.95),
+        "p99"   : percentile(values, 0.99),
+        "max"   : values[-1],
+    }
+
+def formatSeconds(seconds):
+    """ Like formatDuration(), but with enough digits for short commands """
+    if seconds < 1:
+        return "{:.2f}ms".format(seconds * 1000)
+    return formatDuration(seconds)
+
+#----------------------------------------------------------------------------
+class CmdBenchmark(object):
+    """ Runs one command count times, or for duration seconds, and collects timings.
+
+        submit(slot) is called to start each run; it should start the command
+        (normally with Executor.submit(), using slot to tell concurrent runs
+        apart) and return the CmdRun, or None if it can't be run.  Pass every
+        executor event to onRunEvent().
+    """
+    STAT_NAMES = ("min", "mean", "median", "p95", "p99", "max")
+
+    def __init__(self, name, cmdText, submit, count=0, duration=0, warmup=0, concurrency=1):
+        """ Either count or duration should be given; with neither, the command runs once """
+        self.name        = name
+        self.cmdText     = cmdText
+        self.submit      = submit
+        self.count       = count if count > 0 or duration > 0 else 1
+        self.duration    = duration
+        self.warmup      = max(warmup, 0)
+        self.concurrency = max(concurrency, 1)
+        self.runs        = {}     # active CmdRun -> (slot, True if it is measured rather than a warm-up)
+        self.idleSlots   = []     # slots waiting for the warm-up runs to finish
+        self.started     = 0      # runs submitted, including warm-up runs
+        self.samples     = []     # (wall, user, sys, returncode) for each measured run
+        self.failures    = 0      # measured runs that didn't succeed
+        self.cancelled   = 0      # measured runs that were cancelled, which aren't samples
+        self.startTime   = None   # when the first measured run was started
+        self.endTime     = None
+        self.stopped     = False
+
+    def start(self):
+        for slot in range(self.concurrency):
+            self._submitNext(slot)
+
+    def stop(self):
+        """ Start no more runs.  The caller cancels the active ones. """
+        self.stopped = True
+
+    @property
+    def isDone(self):
+        return not self.runs and (self.stopped or not self._wantMore())
+
+    def owns(self, run):
+        return run in self.runs
+
+    def onRunEvent(self, event, run, data):
+        if event != "exit" or run not in self.runs:
+            return
+        slot, measured = self.runs.pop(run)
+        if measured and run.state == CmdRun.CANCELLED:
+            self.cancelled += 1
+        elif measured and run.startTime is not None and run.endTime is not None:
+            self.samples.append((run.endTime - run.startTime, run.userTime, run.sysTime, run.returncode))
+            if run.state != CmdRun.SUCCEEDED:
+                self.failures += 1
+            self.endTime = run.endTime
+        if not self.stopped:
+            self._submitNext(slot)
+            if not self._warmingUp():
+                idleSlots, self.idleSlots = self.idleSlots, []
+                for slot in idleSlots:
+                    self._submitNext(slot)
+
+    def _warmingUp(self):
+        """ True while warm-up runs are still running """
+        return any(not measured for slot, measured in self.runs.values())
+
+    def _wantMore(self):
+        if self.duration > 0:
+            return self.startTime is None or time.time() - self.startTime < self.duration
+        return self.started < self.warmup + self.count
+
+    def _submitNext(self, slot):
+        """ Start another run in slot if more are wanted.  Return True if one was started. """
+        if self.stopped or not self._wantMore():
+            return False
+        measured = self.started >= self.warmup
+        if measured and self._warmingUp():
+            self.idleSlots.append(slot)  # measured runs shouldn't overlap the warm-up
+            return False
+        if measured and self.startTime is None:
+            self.startTime = time.time()
+        run = self.submit(slot)
+        if run is None:
+            self.stopped = True
+            return False
+        self.started += 1
+        self.runs[run] = (slot, measured)
+        return True
+
+    def results(self):
+        """ A dict summarizing the measured runs; times are in seconds """
+        walls = [s[0] for s in self.samples]
+        users = [s[1] for s in self.samples if s[1] is not None]
+        syss  = [s[2] for s in self.samples if s[2] is not None]
+        elapsed = (self.endTime - self.startTime) if self.samples and self.endTime > self.startTime else 0
+        return {
+            "name"       : self.name,
+            "cmd"        : self.cmdText,
+            "runs"       : len(self.samples),
+            "failures"   : self.failures,
+            "cancelled"  : self.cancelled,
+            "warmup"     : self.warmup,
+            "concurrency": self.concurrency,
+            "elapsed"    : elapsed,
+            "throughput" : len(self.samples) / elapsed if elapsed > 0 else None,
+            "wall"       : summarize(walls),
+            "user"       : summarize(users),
+            "sys"        : summarize(syss),
+        }
+
+    def describe(self):
+        """ The results as a few lines of (unicode) text """
+        results = self.results()
+        notes = ["{} {}".format(results[key], word) for key, word in (("failures", "failed"),
+                                                                      ("cancelled", "cancelled"))
+                 if results[key]]
+        lines = [u"{}:  {} run{}{}, {} at a time".format(
+                     self.name, results["runs"], "" if results["runs"] == 1 else "s",
+                     " ({})".format(", ".join(notes)) if notes else "", self.concurrency)]
+        if results["throughput"]:
+            lines.append("  {:.1f} runs/s over {}".format(results["throughput"], formatDuration(results["elapsed"])))
+        for key in ("wall", "user", "sys"):
+            stats = results[key]
+            if stats is not None:
+                lines.append("  {:<5}".format(key) + "".join(
+                    "  {} {}".format(stat, formatSeconds(stats[stat])) for stat in self.STAT_NAMES))
+        return u"\n".join(lines)
+
+    def toJSON(self):
+        results = self.results()
+        results["samples"] = [{"wall": wall, "user": user, "sys": sys, "exitCode": returncode}
+                              for wall, user, sys, returncode in self.samples]
+        return json.dumps(results, indent=True, sort_keys=True)
+
+    def toCSV(self):
+        lines = ["wall,user,sys,exitCode"]
+        for sample in self.samples:
+            lines.append(",".join("" if value is None else repr(value) for value in sample))
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """ Write the results to path:  as CSV if it ends with .csv, otherwise as JSON """
+        data = self.toCSV() if path.lower().endswith(".csv") else self.toJSON()
+        atomicWrite(path, data)
@@ -0,0 +1,227 @@
+#!/usr/bin/python
+#
+#   File: CmdFile.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Reading runner command files.
+
+A command file is either an array of command objects, or an object with a
+"cmds" array and optional "title", "width", "maxParallel", "include" and
+"sessions" fields.  "include" names other command files (a path or glob, or
+a list of them, relative to the including file) that the GUI opens alongside
+it as tabs of a workspace.  "sessions" defines the shell sessions commands
+can run in (see ShellSession).
+
+Dependencies between commands ("depends" fields) are checked when the file is
+read:  every name must refer to a button in the file, and there must be no
+cycles.  So are "timeout", "limits", "shell", "session", "inputs" and
+"outputs" fields.
+
+Parsing and checking a file of many thousands of commands takes a noticeable
+fraction of a second, so the checked result is cached as a pickle under the
+user's cache directory (see BuildCache.cacheDir()), keyed by the file's
+path, and reused as long as the file's size, mtime and inode are unchanged.
+"""
+from __future__ import print_function, division
+
+import os.path
+import json
+import glob
+import hashlib
+import tempfile
+import cPickle as pickle
+
+from Pipeline import dependencyGraph, findCycle
+from Executor import parseLimits, commandArgv
+from ShellSession import sessionSpec
+from BuildCache import cacheDir
+from Metrics import timed, counter
+
+PARSE_CACHE_VERSION = 4
+CACHE_HITS   = counter("runner_parse_cache_hits_total", "Command files read from the parsed-file cache")
+CACHE_MISSES = counter("runner_parse_cache_misses_total", "Command files parsed because the cache was missing or stale")
+
+
+#----------------------------------------------------------------------------
+class CmdFileError(ValueError):
+    """ A command file is valid JSON but its contents are inconsistent """
+    pass
+
+#----------------------------------------------------------------------------
+class CmdFile(object):
+    """ The parsed contents of a command file """
+    def __init__(self, path):
+        self.path        = path
+        self.title       = os.path.splitext(os.path.basename(path))[0]
+        self.cmds        = []
+        self.width       = 0  # 0 if not specified
+        self.maxParallel = 0  # 0 if not specified
+        self.include     = []  # "include" paths and globs, as written in the file
+        self.sessions    = {}  # session name -> definition, as written in the file
+
+    def includePaths(self):
+        """ The absolute paths of the files named by "include", in order and without duplicates """
+        baseDir = os.path.dirname(os.path.abspath(self.path))
+        paths = []
+        for pattern in self.include:
+            pattern = os.path.join(baseDir, os.path.expanduser(pattern))
+            matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+            for path in matches:
+                path = os.path.abspath(path)
+                if path not in paths:
+                    paths.append(path)
+        return paths
+
+    def find(self, name):
+        """ Return the cmd whose button is name, or None """
+        for cmd in self.cmds:
+            if cmd["button"] == name:
+                return cmd
+        return None
+
+#----------------------------------------------------------------------------
+def checkDependencies(cmds):
+    """ Raise CmdFileError if a "depends" field names an unknown button, or the dependencies form a cycle """
+    graph = dependencyGraph(cmds)
+    for name, deps in graph.items():
+        for dep in deps:
+            if dep not in graph:
+                raise CmdFileError("\"{}\" depends on \"{}\", which is not a button in the file".format(name, dep))
+    cycle = findCycle(graph)
+    if cycle:
+        raise CmdFileError("Dependency cycle: " + " -> ".join(cycle))
+
+def checkRunOptions(cmds, sessions=None):
+    """ Raise CmdFileError if a "timeout", "limits", "shell", "session", "inputs" or "outputs" field,
+        or a session, is invalid
+    """
+    sessions = sessions or {}
+    for name, definition in sessions.items():
+        try:
+            sessionSpec(name, definition)
+        except ValueError as e:
+            raise CmdFileError(str(e))
+    for cmd in cmds:
+        timeout = cmd.get("timeout", 0)
+        if not isinstance(timeout, (int, long, float)) or isinstance(timeout, bool) or timeout < 0:
+            raise CmdFileError("\"{}\": timeout must be a number of seconds".format(cmd["button"]))
+        try:
+            parseLimits(cmd.get("limits"))
+        except ValueError as e:
+            raise CmdFileError("\"{}\": {}".format(cmd["button"], e))
+        shell = cmd.get("shell")
+        if shell is not None and not isinstance(shell, bool):
+            raise CmdFileError("\"{}\": shell must be true or false".format(cmd["button"]))
+        if shell is False:
+            try:
+                commandArgv(cmd["cmd"], shell)
+            except ValueError as e:
+                raise CmdFileError("\"{}\": {}".format(cmd["button"], e))
+        session = cmd.get("session")
+        if session is not None:
+            if not isinstance(session, basestring) or session not in sessions:
+                raise CmdFileError("\"{}\": session \"{}\" is not defined in \"sessions\"".format(cmd["button"], session))
+            if cmd.get("limits"):
+                raise CmdFileError("\"{}\": limits can't be used with a session".format(cmd["button"]))
+            if shell is False:
+                raise CmdFileError("\"{}\": a command in a session always runs in its shell".format(cmd["button"]))
+        for field in ("inputs", "outputs"):
+            patterns = cmd.get(field, [])
+            if not isinstance(patterns, basestring) and \
+               not (isinstance(patterns, list) and all(isinstance(p, basestring) for p in patterns)):
+                raise CmdFileError("\"{}\": {} must be a path or glob, or a list of them".format(cmd["button"], field))
+
+def parseCachePath(path):
+    """ Where the parsed form of the command file at path is cached """
+    key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    name = "{}-{}.pickle".format(os.path.splitext(os.path.basename(path))[0], key)
+    return os.path.join(cacheDir(), "parsed", name)
+
+def fileKey(path):
+    """ What must be unchanged for a cached parse of path to be reused """
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime, st.st_ino)
+
+def loadParsed(path, key):
+    """ Return the cached CmdFile for path if it was cached under key, otherwise None """
+    try:
+        with open(parseCachePath(path), "rb") as f:
+            data = pickle.loads(f.read())  # much faster than pickle.load(f) for a big file
+    except Exception:
+        return None  # missing, truncated, or from an incompatible version:  just parse the file
+    if not isinstance(data, dict) or data.get("version") != PARSE_CACHE_VERSION or data.get("key") != key:
+        return None
+    cmdFile = CmdFile(path)
+    cmdFile.title, cmdFile.cmds, cmdFile.width, cmdFile.maxParallel, cmdFile.include, cmdFile.sessions = data["fields"]
+    return cmdFile
+
+def saveParsed(cmdFile, key):
+    """ Cache cmdFile, read from a file that had key """
+    cachePath = parseCachePath(cmdFile.path)
+    data = {"version": PARSE_CACHE_VERSION, "key": key,
+            "fields": (cmdFile.title, cmdFile.cmds, cmdFile.width, cmdFile.maxParallel, cmdFile.include,
+                       cmdFile.sessions)}
+    try:
+        dirName = os.path.dirname(cachePath)
+        if not os.path.isdir(dirName):
+            os.makedirs(dirName)
+        # Not AtomicFile.atomicWrite():  a cache doesn't need an fsync, only never to be seen half written
+        fd, tmpPath = tempfile.mkstemp(prefix=".parsed.", suffix=".tmp", dir=dirName)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmpPath, cachePath)
+        except:
+            os.remove(tmpPath)
+            raise
+    except (IOError, OSError, pickle.PicklingError):
+        pass  # the cache is only an optimization
+
+@timed("runner_read_cmd_file_seconds", "Time to read and check a command file")
+def readCmdFile(path, useCache=True):
+    """ Parse the command file at path and return a CmdFile.
+        Raises IOError if the file can't be read, ValueError if it isn't valid
+        JSON, or CmdFileError if its dependencies are inconsistent.
+        If useCache is True, a cached parse is used if the file hasn't changed
+        since it was made.
+    """
+    key = None
+    if useCache:
+        try:
+            key = fileKey(path)
+        except OSError as e:
+            raise IOError(e.errno, e.strerror, path)
+        cmdFile = loadParsed(path, key)
+        if cmdFile is not None:
+            CACHE_HITS.inc()
+            return cmdFile
+        CACHE_MISSES.inc()
+
+    cmdFile = CmdFile(path)
+    with open(path, "r") as f:
+        data = json.load(f)
+    if isinstance(data, (list, tuple)):
+        cmdFile.cmds = data
+    else:
+        cmdFile.title       = data.get("title", cmdFile.title)
+        cmdFile.cmds        = data.get("cmds", [])
+        cmdFile.width       = data.get("width", 0)
+        cmdFile.maxParallel = data.get("maxParallel", 0)
+        cmdFile.include     = data.get("include", [])
+        if isinstance(cmdFile.include, basestring):
+            cmdFile.include = [cmdFile.include]
+        if not isinstance(cmdFile.include, list) or not all(isinstance(p, basestring) for p in cmdFile.include):
+            raise CmdFileError("include must be a file name or a list of file names")
+        cmdFile.sessions    = data.get("sessions", {})
+        if not isinstance(cmdFile.sessions, dict):
+            raise CmdFileError("sessions must be an object mapping names to sessions")
+    checkDependencies(cmdFile.cmds)
+    checkRunOptions(cmdFile.cmds, cmdFile.sessions)
+    if key is not None:
+        saveParsed(cmdFile, key)
+    return cmdFile
@@ -0,0 +1,294 @@
+#!/usr/bin/python
+#
+#   File: CmdStore.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+The command list, independent of any GUI.
+
+A CmdStore holds one CmdRecord per command entry.  A record keeps the cmd
+dict as it was read from (or last saved to) the file, and the current,
+possibly edited, button, command and tooltip values, in __slots__ so that
+a file with many thousands of entries stays small.  The store keeps an
+index from button name to position, and the set of modified records, so
+neither lookups nor "is anything modified?" need a scan.
+
+Listeners registered with subscribe() are called as listener(event, record):
+    MODIFIED  record.dirty changed (the store's isModified may have changed)
+    CHANGED   something displayed for record changed, e.g. after revert()
+    EDITED    record's command text was edited (on every keystroke)
+    ADDED     record was appended by add()
+    LOADED    the records were replaced by load(); record is None
+"""
+from __future__ import print_function, division
+
+from Executor import Executor
+from Metrics import timed
+
+
+#----------------------------------------------------------------------------
+class CmdRecord(object):
+    """ One command entry and its edited (not yet saved) state.
+
+        self.dirty caches isModified(); the store is notified only when it
+        changes, so modified entries can be tracked without rescanning them all.
+    """
+    __slots__ = ("store", "cmd", "buttonValue", "cmdValue", "tooltipValue",
+                 "disabled", "added", "dirty", "conflict", "diskCmd")
+
+    CHANGED_ON_DISK = "changed"
+    REMOVED_ON_DISK = "removed"
+
+    def __init__(self, cmd, added=False):
+        self.store    = None
+        self.cmd      = cmd
+        self.disabled = False
+        self.added    = added  # new entry, not from a file
+        self.dirty    = False  # see updateModified()
+        self.conflict = None   # CHANGED_ON_DISK or REMOVED_ON_DISK while there are unsaved edits
+        self.diskCmd  = None   # the newer version of cmd on disk, if CHANGED_ON_DISK
+
+        # The current (possibly edited) field values
+        self.cmdValue     = cmd["cmd"]
+        self.buttonValue  = cmd["button"]
+        self.tooltipValue = cmd.get("tooltip", "")
+
+    @property
+    def name(self):
+        """ The button name as saved in the file, which is what "depends" fields refer to """
+        return self.cmd["button"]
+
+    @property
+    def policy(self):
+        """ What to do when the command is started while it is still running """
+        return self.cmd.get("policy", Executor.QUEUE)
+
+    def notify(self, event):
+        if self.store is not None:
+            self.store.notify(event, self)
+
+    def setCmd(self, cmd):
+        """ Replace self.cmd, e.g. when the file is reloaded.  Edits are discarded if cmd differs. """
+        changed = cmd != self.cmd or self.dirty
+        self.cmd = cmd
+        if changed:
+            self.added = False
+            self.revert()
+
+    def mergeCmd(self, cmd):
+        """ The file changed on disk while this entry has unsaved edits.
+            The edits are kept, but if the entry changed on disk too it is flagged
+            as a conflict:  Revert loads the disk version, Save keeps the edits.
+        """
+        if cmd is None:
+            self.conflict = self.REMOVED_ON_DISK
+        elif cmd != self.cmd:
+            self.conflict = self.CHANGED_ON_DISK
+            self.diskCmd = cmd
+        else:
+            self.conflict = None
+            self.diskCmd = None
+        self.notify(CmdStore.CHANGED)
+
+    def isModified(self):
+        return self.cmd["cmd"] != self.cmdValue.strip() or \
+               self.cmd["button"] != self.buttonValue.strip() or \
+               self.cmd.get("tooltip", "") != self.tooltipValue.strip() or \
+               self.disabled or \
+               self.added
+
+    def commit(self):
+        """ Copy the current values to self.cmd.
+            This is done right before saving the cmds to a file.
+        """
+        renamed = self.cmd["button"] != self.buttonValue.strip()
+        self.cmd["button"] = self.buttonValue = self.buttonValue.strip()
+        self.cmd["cmd"] = self.cmdValue = self.cmdValue.strip()
+        self.cmd["tooltip"] = self.tooltipValue = self.tooltipValue.strip()
+        self.added = False
+        self.conflict = None
+        self.diskCmd = None
+        if renamed and self.store is not None:
+            self.store.invalidateIndex()
+        self.update()
+
+    def revert(self):
+        if self.diskCmd is not None:
+            self.cmd = self.diskCmd
+        self.conflict = None
+        self.diskCmd = None
+        self.disabled = False
+        self.buttonValue = self.cmd["button"]
+        self.cmdValue = self.cmd["cmd"]
+        self.tooltipValue = self.cmd.get("tooltip", "")
+        self.update()
+
+    def delete(self):
+        """ Mark the entry deleted, or undeleted if it already is """
+        self.disabled = not self.disabled
+        self.update()
+
+    def setButton(self, name):
+        self.buttonValue = name
+        self.update()
+
+    def setTooltip(self, text):
+        self.tooltipValue = text
+        self.update()
+
+    def setCmdValue(self, text):
+        """ Called as the command text is edited.  Only notifies CHANGED if the modified state changes. """
+        self.cmdValue = text
+        self.notify(CmdStore.EDITED)
+        if self.updateModified():
+            self.notify(CmdStore.CHANGED)
+
+    def updateModified(self):
+        """ Recompute self.dirty, and notify MODIFIED if it changed.
+            Return True if it changed.
+        """
+        dirty = self.isModified()
+        if dirty == self.dirty:
+            return False
+        self.dirty = dirty
+        self.notify(CmdStore.MODIFIED)
+        return True
+
+    def update(self):
+        """ Call this after changing the entry, to update its modified state and redisplay it """
+        self.updateModified()
+        self.notify(CmdStore.CHANGED)
+
+#----------------------------------------------------------------------------
+class CmdStore(object):
+    """ An ordered list of CmdRecords, with an index by button name """
+    MODIFIED = "modified"
+    CHANGED  = "changed"
+    EDITED   = "edited"
+    ADDED    = "added"
+    LOADED   = "loaded"
+
+    def __init__(self, recordClass=CmdRecord):
+        self.recordClass = recordClass  # a CmdRecord subclass may add GUI state
+        self.records   = []
+        self.dirty     = set()  # modified records
+        self.listeners = []
+        self._index    = None   # button name -> position of the first record with that name
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, i):
+        return self.records[i]
+
+    @property
+    def isModified(self):
+        return len(self.dirty) > 0
+
+    def subscribe(self, listener):
+        """ Call listener(event, record) on every change (see the module docstring) """
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def notify(self, event, record):
+        if event == self.MODIFIED:
+            if record.dirty:
+                self.dirty.add(record)
+            else:
+                self.dirty.discard(record)
+        for listener in self.listeners:
+            listener(event, record)
+
+    def invalidateIndex(self):
+        self._index = None
+
+    def indexOf(self, name):
+        """ Return the position of the first record whose saved button name is name, or -1 """
+        if self._index is None:
+            self._index = {}
+            for i, record in enumerate(self.records):
+                self._index.setdefault(record.name, i)
+        return self._index.get(name, -1)
+
+    def find(self, name):
+        """ Return the first record whose saved button name is name, or None """
+        i = self.indexOf(name)
+        return self.records[i] if i >= 0 else None
+
+    def cmds(self):
+        """ The cmd dicts of all records, in order """
+        return [record.cmd for record in self.records]
+
+    @timed("runner_add_cmd_seconds", "Time to add one entry to the command list")
+    def add(self, cmd, added=False):
+        """ Append a record for cmd and return it """
+        record = self.recordClass(cmd, added=added)
+        record.store = self
+        self.records.append(record)
+        if self._index is not None:
+            self._index.setdefault(record.name, len(self.records) - 1)
+        self.notify(self.ADDED, record)
+        record.updateModified()
+        return record
+
+    @timed("runner_store_load_seconds", "Time to make the command list match a (re)loaded file")
+    def load(self, cmds, keepEdits=False):
+        """ Make the records match cmds, e.g. when the file is (re)loaded.
+            An existing record is reused for a cmd with the same button name,
+            preferably at the same position, so whatever state a subclass keeps
+            (e.g. the last run) survives; its fields are only reset if the cmd
+            differs.
+            If keepEdits is True, modified records keep their edits (see
+            CmdRecord.mergeCmd()), and modified records that no longer match
+            any cmd are kept at the end of the list.
+        """
+        oldRecords = self.records
+        byName = {}
+        for r in oldRecords:
+            byName.setdefault(r.name, []).append(r)
+
+        used = set()
+        records = []
+        for i, cmd in enumerate(cmds):
+            r = None
+            if i < len(oldRecords) and oldRecords[i].name == cmd["button"]:
+                r = oldRecords[i]
+            else:
+                for candidate in byName.get(cmd["button"], ()):
+                    if candidate not in used:
+                        r = candidate
+                        break
+            if r is None or r in used:
+                r = self.recordClass(cmd)
+                r.store = self
+            elif keepEdits and r.dirty:
+                r.mergeCmd(cmd)
+            else:
+                r.setCmd(cmd)
+            used.add(r)
+            records.append(r)
+
+        if keepEdits:
+            for r in oldRecords:
+                if r not in used and r.dirty:
+                    if not r.added:
+                        r.mergeCmd(None)
+                    records.append(r)
+
+        kept = set(records)
+        for r in oldRecords:
+            if r not in kept:
+                r.store = None
+        self.records = records
+        self.dirty = set(r for r in records if r.dirty)
+        self._index = None
+        self.notify(self.LOADED, None)
@@ -0,0 +1,719 @@
+#!/usr/bin/python
+#
+#   File: Executor.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Runs commands in background threads so the GUI never blocks on a child process.
+
+Each command runs in its own worker thread, and at most maxParallel commands
+run at once; the rest wait in a FIFO queue.  The worker never touches Tk;
+instead it posts (event, run, data) tuples to a thread-safe queue, which the
+GUI drains from its mainloop (see Executor.poll()).
+
+Output is not sent through the queue.  The worker reads it in large chunks
+into the run's OutputBuffer, which keeps only the most recent lines, and posts
+a single "output" event whenever unread output becomes available.  A chatty
+command therefore costs a bounded amount of memory no matter how slowly the
+GUI keeps up.  If the Executor has a RunLogs (see OutputLog), the worker also
+writes all of the output to the run's log file as it reads it.
+
+On POSIX systems each run gets its own process group, so cancelling a run
+signals the shell and everything it started:  SIGTERM first, then SIGKILL if
+anything is still running KILL_GRACE seconds later.  A run may also have a
+timeout, which cancels it the same way, and resource limits, which are set
+with setrlimit() in the child before the command starts.
+
+A command that doesn't need a shell (no pipes, redirections, variables,
+globs, builtins and so on; see commandArgv()) is split into words and run
+directly, which saves starting /bin/sh for every run.  A run with a session
+(see ShellSession) runs in that session's long-lived shell instead.
+"""
+from __future__ import print_function, division
+
+import os
+import time
+import shlex
+import errno
+import signal
+import subprocess
+import threading
+import multiprocessing
+from collections import deque
+from Queue import Queue, Empty
+
+from Metrics import histogram, counter
+from ShellSession import ShellSession, sessionKey
+try:
+    import fcntl
+    import resource
+except ImportError:
+    fcntl = resource = None  # not on Windows:  "limits" are rejected there
+
+
+#----------------------------------------------------------------------------
+class OutputBuffer(object):
+    """ A thread-safe ring buffer holding the tail of a command's output.
+
+        At most maxLines lines and maxBytes bytes are kept; older output is
+        dropped from the front.  Readers keep track of how many bytes they
+        have seen and call since() to get only what is new.
+    """
+    DEFAULT_MAX_LINES = 2000
+    DEFAULT_MAX_BYTES = 256 * 1024
+
+    def __init__(self, maxLines=0, maxBytes=0):
+        self.maxLines = maxLines if maxLines > 0 else self.DEFAULT_MAX_LINES
+        self.maxBytes = maxBytes if maxBytes > 0 else self.DEFAULT_MAX_BYTES
+        self.lines = deque()    # the last line may be incomplete
+        self.nbytes = 0         # bytes in self.lines
+        self.written = 0        # bytes ever written
+        self.dropped = 0        # bytes dropped from the front
+        self.droppedLines = 0   # whole lines dropped from the front
+        self.cut = 0            # incremented when a single line longer than maxBytes is cut
+        self.notified = False   # True if a reader has been told there is unread output
+        self.lock = threading.Lock()
+
+    def write(self, data):
+        """ Append data.  Return True if readers should be notified of new output. """
+        with self.lock:
+            self.written += len(data)
+            if len(data) > self.maxBytes:
+                # Most of this chunk would be dropped right away; don't bother splitting it
+                skipped = len(data) - self.maxBytes
+                data = data[skipped:]
+                self._drop(self.nbytes, len(self.lines))
+                self.lines.clear()
+                self.dropped += skipped
+                self.cut += 1
+            if self.lines and not self.lines[-1].endswith(b"\n"):
+                tail = self.lines.pop()
+                self.nbytes -= len(tail)
+                data = tail + data
+            lines = data.splitlines(True)
+            self.lines.extend(lines)
+            self.nbytes += len(data)
+
+            excess = len(self.lines) - self.maxLines
+            while excess > 0 or (self.nbytes > self.maxBytes and len(self.lines) > 1):
+                line = self.lines.popleft()
+                self._drop(len(line), 1)
+                excess -= 1
+            if self.nbytes > self.maxBytes:
+                # A single line longer than maxBytes:  keep its end
+                skipped = self.nbytes - self.maxBytes
+                self.lines[0] = self.lines[0][skipped:]
+                self.nbytes -= skipped
+                self.dropped += skipped
+                self.cut += 1
+
+            notify = not self.notified
+            self.notified = True
+            return notify
+
+    def _drop(self, nbytes, nlines):
+        """ Account for output removed from the front.  Call with self.lock held. """
+        self.nbytes -= nbytes
+        self.dropped += nbytes
+        self.droppedLines += nlines
+
+    def since(self, offset, cut=0):
+        """ Return (data, offset, droppedLines, cut, reset) for the output written after offset.
+            offset and cut are the values returned by the previous call (initially 0).
+            If output the reader has not seen was dropped, or a line it has seen was cut,
+            reset is True and data is the whole buffer, which replaces everything read so far.
+        """
+        with self.lock:
+            self.notified = False
+            reset = offset < self.dropped or cut != self.cut
+            need = self.nbytes if reset else self.written - offset
+            chunks = []
+            size = 0
+            for line in reversed(self.lines):
+                if size >= need:
+                    break
+                chunks.append(line)
+                size += len(line)
+            chunks.reverse()
+            data = b"".join(chunks)[size-need:]
+            return data, self.written, self.droppedLines, self.cut, reset
+
+    def getvalue(self):
+        with self.lock:
+            return b"".join(self.lines)
+
+QUEUE_WAIT   = histogram("runner_queue_wait_seconds", "Time from submitting a command to starting it")
+SPAWN        = histogram("runner_spawn_seconds", "Time to start a command's process")
+FIRST_OUTPUT = histogram("runner_first_output_seconds", "Time from starting a command to its first output")
+RUNS         = counter("runner_runs_total", "Commands started")
+SHELL_FALLBACKS = counter("runner_shell_fallbacks_total", "Shell-free starts that failed and were retried with the shell")
+
+#----------------------------------------------------------------------------
+# Resource limits a command may set with a "limits" object:  name -> RLIMIT_* name
+LIMITS = {
+    "cpu"   : "RLIMIT_CPU",     # CPU seconds; SIGXCPU at the limit, SIGKILL a few seconds later
+    "memory": "RLIMIT_AS",      # bytes of address space, or a number with a K, M or G suffix
+    "files" : "RLIMIT_NOFILE",  # open file descriptors
+}
+CPU_GRACE = 5  # seconds between SIGXCPU and SIGKILL for the "cpu" limit
+SIZE_SUFFIXES = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+def parseLimits(limits):
+    """ Convert a "limits" object to a list of (RLIMIT_*, soft, hard) for setrlimit().
+        Raises ValueError if a limit is unknown or not a positive number.
+    """
+    result = []
+    for name, value in sorted((limits or {}).items()):
+        if name not in LIMITS:
+            raise ValueError("unknown limit \"{}\"; use {}".format(name, ", ".join(sorted(LIMITS))))
+        if resource is None:
+            raise ValueError("resource limits are not supported on this system")
+        if isinstance(value, basestring) and value[-1:].upper() in SIZE_SUFFIXES:
+            value = float(value[:-1]) * SIZE_SUFFIXES[value[-1].upper()]
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError("limit \"{}\" must be a number, not {!r}".format(name, value))
+        if value <= 0:
+            raise ValueError("limit \"{}\" must be positive".format(name))
+        resourceId = getattr(resource, LIMITS[name])
+        soft = value
+        hard = value + CPU_GRACE if name == "cpu" else value
+        currentHard = resource.getrlimit(resourceId)[1]
+        if currentHard != resource.RLIM_INFINITY:
+            soft, hard = min(soft, currentHard), min(hard, currentHard)
+        result.append((resourceId, soft, hard))
+    return result
+
+# A command mustn't inherit the pipes of runs started alongside it, or their readers don't see
+# EOF until it exits too.  Popen's close_fds would see to that, but in Python 2 it closes every
+# fd number up to the open file limit in the child, which takes milliseconds when the limit is
+# high.  Instead the fds the executor makes (pipes, log files and the daemon's sockets) are
+# marked close-on-exec with setCloseOnExec() as they are made, while holding SPAWN_LOCK.  Every
+# process is started with it held too, so none is started before they are marked.  (Popen marks
+# its pipes itself in recent Pythons, but not atomically:  the lock is what keeps a process
+# started on another thread from inheriting them.)
+SPAWN_LOCK = threading.Lock()
+
+def setCloseOnExec(*fds):
+    """ Mark fds close-on-exec.  Call with SPAWN_LOCK held since before they were made. """
+    if fcntl is None:
+        return  # Windows:  Popen doesn't pass on fds there
+    for fd in fds:
+        fcntl.fcntl(fd, fcntl.F_SETFD, fcntl.fcntl(fd, fcntl.F_GETFD) | fcntl.FD_CLOEXEC)
+
+def childSetup(limits):
+    """ Return a Popen preexec_fn that starts a new process group and applies limits """
+    def setup():
+        os.setsid()
+        for resourceId, soft, hard in limits:
+            resource.setrlimit(resourceId, (soft, hard))
+    return setup
+
+#----------------------------------------------------------------------------
+# Any of these characters means a command needs a shell.  Quotes don't; they're handled by shlex.
+SHELL_CHARS = frozenset("|&;<>()$`\\*?[]{}~#\n")
+
+# Words that are only meaningful to the shell, if they start a command
+SHELL_WORDS = frozenset([
+    "!", ".", ":", "alias", "bg", "break", "case", "cd", "command", "continue", "eval", "exec", "exit",
+    "export", "fg", "for", "function", "getopts", "hash", "if", "jobs", "local", "read", "readonly",
+    "return", "select", "set", "shift", "source", "time", "times", "trap", "type", "ulimit", "umask",
+    "unalias", "unset", "until", "wait", "while",
+])
+
+def commandArgv(cmdText, shell=None):
+    """ Return the argv to run cmdText without a shell, or None if it needs one.
+        shell is a command's "shell" field:  True always uses the shell, False
+        never does (cmdText is just split into words), and None decides from the
+        text.  Raises ValueError if shell is False and cmdText can't be split.
+    """
+    if shell or (shell is None and os.name != "posix"):
+        return None
+    if isinstance(cmdText, unicode):
+        cmdText = cmdText.encode("utf-8")
+    if shell is None and any(c in SHELL_CHARS for c in cmdText):
+        return None
+    try:
+        argv = shlex.split(cmdText)
+    except ValueError:
+        if shell is None:
+            return None  # e.g. an unbalanced quote:  let the shell report it
+        raise
+    if shell is None and (not argv or argv[0] in SHELL_WORDS or "=" in argv[0]):
+        return None
+    if not argv:
+        raise ValueError("empty command")
+    return argv
+
+def runSessionKey(run):
+    """ Runs with equal keys share a session's shell:  the same session, run in the same directory,
+        with the same values of the variables the session lists in "env" (see ShellSession)
+    """
+    env = run.env if run.env is not None else os.environ
+    return (sessionKey(run.session), run.cwd, tuple(env.get(var) for var in run.session.get("env", ())))
+
+def threadName(prefix, name):
+    """ A thread name for a command name, which may be unicode (Thread wants a str) """
+    return "{}:{}".format(prefix, name.encode("utf-8") if isinstance(name, unicode) else name)
+
+#----------------------------------------------------------------------------
+class CmdRun(object):
+    """ The state of a single execution of a command """
+    PENDING   = "pending"
+    RUNNING   = "running"
+    SUCCEEDED = "succeeded"
+    FAILED    = "failed"
+    CANCELLED = "cancelled"
+    SKIPPED   = "skipped"    # never started because a dependency failed (see Pipeline)
+    TIMED_OUT = "timed out"
+
+    def __init__(self, name, cmdText, owner=None, maxLines=0, maxBytes=0, timeout=0, limits=None, shell=None,
+                 group=None, session=None, check=None, onOutput=None, cwd=None, env=None):
+        self.name       = name
+        self.cmdText    = cmdText
+        self.owner      = owner  # whatever submitted the run, e.g. a CmdWidget
+        self.group      = group  # what the run belongs to, e.g. the path of its command file
+        self.key        = owner if owner is not None else name  # runs with the same key never overlap
+        self.state      = self.PENDING
+        self.returncode = None
+        self.error      = None   # exception text if the process could not be started
+        self.process    = None
+        self.cancelled  = False
+        self.upToDate   = False  # succeeded without running (see Executor.submit() and submitUpToDate())
+        self.startTime  = None   # time.time() when the process was started
+        self.endTime    = None   # ... and when it exited
+        self.userTime   = None   # CPU seconds used by the command and its children, where wait4() exists
+        self.sysTime    = None
+        self.timeout    = timeout  # seconds, or 0 for no timeout
+        self.limits     = limits   # a "limits" object (see parseLimits()), or None
+        self.shell      = shell    # the command's "shell" field (see commandArgv())
+        self.session    = session  # the session to run in (see ShellSession.sessionSpec()), or None
+        self.check      = check    # called with the run before it starts; True means it's up to date
+        self.onOutput   = onOutput # called with the run and each chunk of its output, none of it dropped
+        self.cwd        = cwd      # the directory to run in, or None for this process's
+        self.env        = env      # the environment to run with, or None for this process's
+        self.timedOut   = False
+        self.timers     = []       # threading.Timers to cancel when the run exits
+        self.output     = OutputBuffer(maxLines, maxBytes)
+        self.logPath    = None     # the file all of the output is written to, if any
+        self.logError   = None     # why the log file couldn't be written
+        self.submitTime = time.time()
+
+    @property
+    def isDone(self):
+        return self.state in (self.SUCCEEDED, self.FAILED, self.CANCELLED, self.SKIPPED, self.TIMED_OUT)
+
+    def __repr__(self):
+        return "<CmdRun {!r} {}>".format(self.name, self.state)
+
+#----------------------------------------------------------------------------
+class Executor(object):
+    """ Starts commands in worker threads and reports their progress through a queue.
+
+        Events are (event, run, data) tuples, where event is one of:
+            "start"   the process was started; data is None
+            "output"  run.output has unread stdout/stderr output; data is None
+            "exit"    the run finished or was cancelled; data is the return code,
+                      or None if the run was cancelled before it started
+
+        submit() takes a policy that decides what happens when a run with the
+        same key is already pending or running:
+            QUEUE     run again after the current run finishes
+            DROP      ignore the new request
+            RESTART   cancel the current run and start over
+    """
+    QUEUE   = "queue"
+    DROP    = "drop"
+    RESTART = "restart"
+    POLICIES = (QUEUE, DROP, RESTART)
+    CHUNK_SIZE = 64 * 1024
+    KILL_GRACE = 5  # seconds from SIGTERM to SIGKILL when a run is cancelled
+    KEEP_IDLE_SESSIONS = 4  # idle session shells kept, e.g. for a daemon's clients in other directories
+
+    def __init__(self, maxParallel=0, logs=None):
+        self.logs     = logs  # an OutputLog.RunLogs to write every run's output to, or None
+        self.events   = Queue()
+        self.runs     = []  # runs that have not finished yet, pending or running
+        self.pending  = []  # runs waiting for a free slot, in submission order
+        self.running  = []  # runs holding a slot
+        self.sessions = {}  # runSessionKey() -> ShellSession
+        self.lock     = threading.Lock()
+        self._maxParallel = 1
+        self.maxParallel = maxParallel
+
+    @property
+    def maxParallel(self):
+        return self._maxParallel
+
+    @maxParallel.setter
+    def maxParallel(self, value):
+        """ Set the maximum number of concurrent runs.  0 means one per CPU. """
+        if value <= 0:
+            value = multiprocessing.cpu_count()
+        with self.lock:
+            self._maxParallel = value
+            self._dispatch()
+
+    def submit(self, name, cmdText, owner=None, policy=QUEUE, maxLines=0, maxBytes=0, timeout=0, limits=None,
+               shell=None, log=True, group=None, session=None, check=None, onOutput=None, cwd=None, env=None):
+        """ Queue cmdText to run when a slot is free.
+            maxLines and maxBytes cap the output kept for the run (0 for the defaults).
+            If log is True and the executor has logs, all of the output is written to a log file too.
+            group is stored in the run (see CmdRun).
+            If timeout is given, the run is cancelled after that many seconds.
+            limits is a "limits" object (see parseLimits()).
+            shell says whether to run cmdText with the shell (see commandArgv()).
+            session is the ShellSession.sessionSpec() to run cmdText in, or None for a new process.
+            check, if given, is called with the run on its worker thread just before it starts,
+            e.g. to hash its inputs; if it returns True, the run succeeds as up to date without running.
+            onOutput, if given, is called with the run and every chunk of its output, on the thread
+            reading it, before the chunk goes into run.output (which keeps only the last of it).
+            cwd and env are the directory and environment to run in, if not this process's.
+            Return the new CmdRun, or None if the policy dropped the request.
+        """
+        run = CmdRun(name, cmdText, owner, maxLines, maxBytes, timeout, limits, shell, group, session, check,
+                     onOutput, cwd, env)
+        with self.lock:
+            active = [r for r in self.runs if r.key == run.key]
+            if active:
+                if policy == self.DROP:
+                    return None
+                if policy == self.RESTART:
+                    for r in active:
+                        self._cancel(r)
+            if log and self.logs is not None:
+                try:
+                    run.logPath = self.logs.pathFor(name)
+                except OSError as e:
+                    run.logError = str(e)
+            self.runs.append(run)
+            self.pending.append(run)
+            self._dispatch()
+        return run
+
+    def submitUpToDate(self, name, cmdText, owner=None):
+        """ Report a run that succeeded without starting a process, because its
+            outputs are already up to date.  It gets an "exit" event with return
+            code 0 like any other run, so it's seen by whoever polls the events.
+            Return the new CmdRun.
+        """
+        run = CmdRun(name, cmdText, owner)
+        run.upToDate = True
+        with self.lock:
+            self.runs.append(run)
+            self.events.put(("exit", run, 0))
+        return run
+
+    def cancel(self, run):
+        """ Cancel a pending run, or terminate a running one """
+        with self.lock:
+            self._cancel(run)
+
+    def cancelKey(self, key):
+        """ Cancel every pending or running run with this key, e.g. all runs of one button """
+        with self.lock:
+            for run in self.runs:
+                if run.key == key:
+                    self._cancel(run)
+
+    def _cancel(self, run):
+        """ cancel() with self.lock held """
+        run.cancelled = True
+        if run in self.pending:
+            self.pending.remove(run)
+            self.events.put(("exit", run, None))
+        else:
+            self._terminate(run)
+
+    def _terminate(self, run):
+        """ SIGTERM a running run, and SIGKILL it KILL_GRACE seconds later if it's still running.
+            Call with self.lock held.
+        """
+        if run.process is None or run.endTime is not None:
+            return  # not started yet (the worker checks run.cancelled), or already finished
+        if os.name != "posix":
+            try:
+                run.process.terminate()
+            except OSError:
+                pass  # it just exited
+            return
+        self._signal(run, signal.SIGTERM)
+        self._startTimer(run, self.KILL_GRACE, self._kill)
+
+    def _kill(self, run):
+        with self.lock:
+            if run.endTime is None:
+                self._signal(run, signal.SIGKILL)
+
+    def _timeout(self, run):
+        with self.lock:
+            if run.endTime is None and not run.cancelled:
+                run.timedOut = True
+                self._terminate(run)
+
+    def _signal(self, run, sig):
+        """ Send sig to the run's whole process group:  the shell's children would
+            otherwise keep running (and keep the output pipe open)
+        """
+        try:
+            os.killpg(run.process.pid, sig)
+        except OSError:
+            pass  # they all exited already
+
+    def _startTimer(self, run, seconds, fn):
+        timer = threading.Timer(seconds, fn, [run])
+        timer.daemon = True
+        run.timers.append(timer)
+        timer.start()
+
+    def _dispatch(self):
+        """ Start pending runs while there are free slots.  Call with self.lock held. """
+        busyKeys = set(r.key for r in self.running)
+        busySessions = set(runSessionKey(r) for r in self.running if r.session is not None)
+        for run in list(self.pending):
+            if len(self.running) >= self._maxParallel:
+                break
+            if run.key in busyKeys:
+                continue  # wait for the previous run of the same command
+            session = runSessionKey(run) if run.session is not None else None
+            if session is not None and session in busySessions:
+                continue  # a session runs one command at a time
+            t = threading.Thread(target=self._worker, args=(run,), name=threadName("run", run.name))
+            t.daemon = True
+            self.pending.remove(run)
+            self.running.append(run)
+            busyKeys.add(run.key)
+            if session is not None:
+                busySessions.add(session)
+            try:
+                t.start()
+            except Exception as e:  # e.g. thread.error:  can't start new thread
+                self.running.remove(run)
+                run.error = "can't start a thread to run it: {}".format(e)
+                self.events.put(("exit", run, -1))
+
+    def _worker(self, run):
+        """ Thread body:  run the process and post its events, then free the slot """
+        try:
+            self._execute(run)
+        finally:
+            with self.lock:
+                self.running.remove(run)
+                self._dispatch()
+
+    def _execute(self, run):
+        if run.check is not None and not run.cancelled:
+            try:
+                run.upToDate = bool(run.check(run))  # outside the lock:  it may read big files
+            except Exception as e:
+                run.error = "checking whether it's up to date: {}".format(e)
+                self.events.put(("exit", run, -1))
+                return
+            if run.upToDate:
+                self.events.put(("exit", run, 0))
+                return
+        try:
+            with self.lock:
+                if run.cancelled:
+                    self.events.put(("exit", run, None))
+                    return
+                run.startTime = time.time()
+                QUEUE_WAIT.observe(run.startTime - run.submitTime)
+                if run.session is not None:
+                    session = self._session(run)
+                    with SPAWN_LOCK:
+                        run.process = session.ensureStarted()
+                        setCloseOnExec(run.process.stdin.fileno(), run.process.stdout.fileno())
+                else:
+                    session = None
+                    preexec = childSetup(parseLimits(run.limits)) if os.name == "posix" else None
+                    run.process = self._spawn(run, preexec)
+                SPAWN.observe(time.time() - run.startTime)
+                RUNS.inc()
+                if run.timeout > 0:
+                    self._startTimer(run, run.timeout, self._timeout)
+        except (OSError, ValueError) as e:
+            run.error = str(e)
+            self.events.put(("exit", run, -1))
+            return
+
+        self.events.put(("start", run, None))
+        log = self._openLog(run)
+        for data in (session.run(run.cmdText) if session is not None else self._read(run.process)):
+            if run.output.written == 0:
+                FIRST_OUTPUT.observe(time.time() - run.startTime)
+            if log is not None:
+                log = self._writeLog(run, log, data)
+            if run.onOutput is not None:
+                run.onOutput(run, data)
+            if run.output.write(data):
+                self.events.put(("output", run, None))
+        if log is not None:
+            os.close(log)
+        if session is not None:
+            # No resource usage:  the command is the session shell's child, not ours
+            returncode, usage = session.status, None
+            if not (run.cancelled or run.timedOut):
+                run.error = session.error
+            if returncode is None:
+                returncode = run.process.wait()  # the shell exited, e.g. it was cancelled
+        else:
+            run.process.stdout.close()
+            returncode, usage = self._wait(run.process)
+        with self.lock:
+            run.endTime = time.time()
+            if usage is not None:
+                run.userTime, run.sysTime = usage.ru_utime, usage.ru_stime
+            for timer in run.timers:
+                timer.cancel()
+        self.events.put(("exit", run, returncode))
+
+    def _read(self, process):
+        """ Generate process's output until it closes its end of the pipe """
+        fd = process.stdout.fileno()
+        while True:
+            try:
+                data = os.read(fd, self.CHUNK_SIZE)
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            if not data:
+                return
+            yield data
+
+    def _session(self, run):
+        """ Return the ShellSession for run.  A new one replaces idle sessions of the same name,
+            directory and "env" values with an older definition, and the least recently used
+            idle sessions beyond KEEP_IDLE_SESSIONS.  Call with self.lock held.
+        """
+        key = runSessionKey(run)
+        if key not in self.sessions:
+            busy = set(runSessionKey(r) for r in self.running if r.session is not None)
+            idle = []
+            for oldKey, old in self.sessions.items():
+                if oldKey in busy:
+                    continue
+                if oldKey[0][0] == key[0][0] and oldKey[1:] == key[1:]:
+                    old.close()  # superseded
+                    del self.sessions[oldKey]
+                else:
+                    idle.append((old.lastUsed, oldKey))
+            idle.sort()
+            for lastUsed, oldKey in idle[:max(len(idle) - self.KEEP_IDLE_SESSIONS, 0)]:
+                self.sessions.pop(oldKey).close()
+            self.sessions[key] = ShellSession(run.session, run.cwd, run.env)
+        return self.sessions[key]
+
+    def closeSessions(self):
+        """ End every session's shell once its current command, if any, finishes """
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+    @staticmethod
+    def _openLog(run):
+        """ Return a file descriptor for run's log file, or None """
+        if run.logPath is None:
+            return None
+        try:
+            # Only this run's worker thread writes the log; other runs mustn't inherit it
+            with SPAWN_LOCK:
+                fd = os.open(run.logPath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                setCloseOnExec(fd)
+            return fd
+        except OSError as e:
+            run.logError = str(e)
+            return None
+
+    @staticmethod
+    def _writeLog(run, fd, data):
+        """ Write data to run's log file.  Return fd, or None if the log can't be written any more. """
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+            return fd
+        except OSError as e:
+            # e.g. the disk is full:  keep running, with just the in-memory tail
+            run.logError = str(e)
+            os.close(fd)
+            return None
+
+    @staticmethod
+    def _spawn(run, preexec):
+        """ Start run's process, without a shell if it doesn't need one.
+            Its output pipe is marked close-on-exec (see SPAWN_LOCK).
+        """
+        argv = commandArgv(run.cmdText, run.shell)
+        with SPAWN_LOCK:
+            if argv is not None:
+                try:
+                    process = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                               preexec_fn=preexec, cwd=run.cwd, env=run.env)
+                    setCloseOnExec(process.stdout.fileno())
+                    return process
+                except OSError:
+                    if run.shell is False:
+                        raise
+                    # e.g. not found:  let the shell report it, with its usual exit code
+                    SHELL_FALLBACKS.inc()
+            process = subprocess.Popen(run.cmdText, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       preexec_fn=preexec, cwd=run.cwd, env=run.env)
+            setCloseOnExec(process.stdout.fileno())
+            return process
+
+    @staticmethod
+    def _wait(process):
+        """ Wait for process to exit.  Return (returncode, its resource usage or None). """
+        if not hasattr(os, "wait4"):
+            return process.wait(), None
+        while True:
+            try:
+                pid, status, usage = os.wait4(process.pid, 0)
+                break
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                if e.errno == errno.ECHILD:
+                    return process.wait(), None  # reaped already
+                raise
+        process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        return process.returncode, usage
+
+    def poll(self, handler, timeout=None):
+        """ Drain pending events, calling handler(event, run, data) for each.
+            Run state is updated here, so it only changes on the polling thread.
+            Call this from the GUI thread, e.g. with root.after().
+            If timeout is given, wait up to timeout seconds for the first event.
+        """
+        block = timeout is not None
+        while True:
+            try:
+                event, run, data = self.events.get(block, timeout)
+            except Empty:
+                return
+            block = False
+            if event == "start":
+                run.state = CmdRun.RUNNING
+            elif event == "exit":
+                run.returncode = data
+                if run.cancelled:
+                    run.state = CmdRun.CANCELLED
+                elif run.timedOut:
+                    run.state = CmdRun.TIMED_OUT
+                else:
+                    run.state = CmdRun.SUCCEEDED if data == 0 else CmdRun.FAILED
+                with self.lock:
+                    if run in self.runs:
+                        self.runs.remove(run)
+            handler(event, run, data)
+
+    @property
+    def isBusy(self):
+        return len(self.runs) > 0
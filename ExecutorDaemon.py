@@ -0,0 +1,763 @@
+#!/usr/bin/python
+#
+#   File: ExecutorDaemon.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+A background process that runs commands for any number of runner windows
+and headless runs.
+
+The daemon (runner.py --serve) listens on a Unix domain socket, by default
+$XDG_RUNTIME_DIR/runner/executor.sock.  It owns a single Executor, so its
+maxParallel caps the commands running for all of its clients together, and
+the commands belong to it rather than to the window that started them:
+closing the window doesn't stop them, their output still goes to their log
+files, and a window opened later on the same command file finds them with
+status() and attach()es to them.  Shell sessions (see ShellSession) live in
+the daemon too:  clients' commands share a session's shell and setup when
+they run in the same directory and agree on the variables the session lists
+in "env".  The daemon keeps a few idle shells for other directories, and
+closes the least recently used beyond that.
+
+Clients use a RemoteExecutor, which has the same interface as Executor:
+submit() sends the command to the daemon, which streams back the run's
+events and output, and poll() delivers them as the usual (event, run, data)
+tuples.
+
+Messages are JSON objects, one per line.  Requests carry an "id", which the
+reply repeats:
+    {"op": "hello"}                    -> {"maxParallel": n, "pid": pid}
+    {"op": "submit", "name": ..., "cmd": ..., "key": ..., "policy": ..., "cwd": ..., "env": {...}, ...}
+                                       -> {"run": run id, or null if the policy dropped it}
+    {"op": "subscribe", "run": id}     -> {"info": {...}}, then the run's output and events
+    {"op": "status"}                   -> {"runs": [{...}, ...]}
+    {"op": "cancel", "run": id}        (no reply)
+    {"op": "cancelKey", "key": key}    (no reply)
+Events look like {"event": "output", "run": id, "data": ...}.  Output bytes
+are sent as latin-1 text, which JSON carries unchanged, and so are a submit's
+"cwd" and "env":  the client's working directory and whole environment, which
+the command runs with instead of the daemon's.  A client is sent
+what's new in the run's output buffer, so a client that falls behind misses
+some, unless it submitted the run with "stream": true; then it gets every
+chunk, as the run's onOutput would.
+
+Unix only.
+"""
+from __future__ import print_function, division
+
+import os
+import sys
+import json
+import time
+import errno
+import select
+import socket
+import threading
+import subprocess
+from collections import deque
+from Queue import Queue
+
+from Executor import Executor, CmdRun, SPAWN_LOCK, setCloseOnExec, threadName
+from BuildCache import cacheDir
+
+
+#----------------------------------------------------------------------------
+class DaemonError(Exception):
+    """ The executor daemon can't be reached, or stopped answering """
+    pass
+
+def socketPath():
+    """ The default socket path, e.g. /run/user/1000/runner/executor.sock """
+    base = os.environ.get("XDG_RUNTIME_DIR") or cacheDir()
+    return os.path.join(base, "runner", "executor.sock")
+
+def toWire(text):
+    """ A byte string (e.g. a path or an environment variable) as JSON-able text """
+    return text if isinstance(text, unicode) else text.decode("latin-1")
+
+def fromWire(text):
+    """ The byte string toWire() was given """
+    return text.encode("latin-1")
+
+# The fields each request must or may have:  op -> {field: (required, types)}
+TEXT = (basestring,)
+NUMBER = (int, long, float)
+REQUEST_FIELDS = {
+    "hello"    : {},
+    "submit"   : {"name": (True, TEXT), "cmd": (True, TEXT), "key": (False, TEXT), "policy": (False, TEXT),
+                  "maxLines": (False, NUMBER), "maxBytes": (False, NUMBER), "timeout": (False, NUMBER),
+                  "limits": (False, (dict,)), "shell": (False, (bool,)), "log": (False, (bool,)),
+                  "group": (False, TEXT), "session": (False, (dict,)), "stream": (False, (bool,)),
+                  "cwd": (False, TEXT), "env": (False, (dict,))},
+    "subscribe": {"run": (True, (int, long))},
+    "status"   : {},
+    "cancel"   : {"run": (True, (int, long))},
+    "cancelKey": {"key": (True, TEXT)},
+}
+
+def requestError(request):
+    """ Why request isn't one the daemon can carry out, or None if it is """
+    if not isinstance(request, dict):
+        return "a request must be an object"
+    op = request.get("op")
+    if op not in REQUEST_FIELDS:
+        return "unknown request {!r}".format(op)
+    for field, (required, types) in sorted(REQUEST_FIELDS[op].items()):
+        value = request.get(field)
+        if value is None:
+            if required:
+                return "{} needs \"{}\"".format(op, field)
+        elif not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+            return "{}: \"{}\" can't be {!r}".format(op, field, value)
+    if op == "submit":
+        if request.get("policy") not in (None,) + Executor.POLICIES:
+            return "submit: unknown policy {!r}".format(request["policy"])
+        session = request.get("session")
+        if session is not None and not all(isinstance(session.get(field), basestring)
+                                           for field in ("name", "setup", "shell")):
+            return "submit: \"session\" needs a \"name\", \"setup\" and \"shell\""
+        if session is not None and not (isinstance(session.get("env", []), list) and
+                                        all(isinstance(var, basestring) for var in session.get("env", []))):
+            return "submit: a session's \"env\" must be a list of variable names"
+        env = request.get("env") or {}
+        if not all(isinstance(value, basestring) for value in env.values()):
+            return "submit: \"env\" values must be strings"
+    return None
+
+def runInfo(run, runId, clients=0):
+    """ The JSON-able description of a run that status() and attach() return """
+    return {
+        "run"       : runId,
+        "name"      : run.name,
+        "cmd"       : run.cmdText,
+        "cwd"       : toWire(run.cwd) if run.cwd is not None else None,
+        "group"     : run.group,
+        "state"     : run.state,
+        "returncode": run.returncode,
+        "pid"       : run.process.pid if run.process is not None else None,
+        "submitTime": run.submitTime,
+        "startTime" : run.startTime,
+        "endTime"   : run.endTime,
+        "logPath"   : run.logPath,
+        "error"     : run.error,
+        "timedOut"  : run.timedOut,
+        "cancelled" : run.cancelled,
+        "clients"   : clients,
+    }
+
+#----------------------------------------------------------------------------
+class ClientConnection(object):
+    """ The daemon's end of one client's connection.
+        Requests are read on one thread and replies and events are written on
+        another, so a client that reads slowly doesn't hold up the others.
+    """
+    def __init__(self, server, sock):
+        self.server  = server
+        self.sock    = sock
+        self.queue   = Queue()  # messages to send; a CmdRun means "send its new output", and
+                                # (run, message) "send the last of its output, then the exit message"
+        self.offsets = {}       # CmdRun -> (offset, cut) for OutputBuffer.since(); used by the writer
+        self.streamed = set()   # CmdRuns whose every chunk is sent as it's read (see streamOutput())
+
+    def start(self):
+        for target in (self.readLoop, self.writeLoop):
+            t = threading.Thread(target=target, name="client:{}".format(target.__name__))
+            t.daemon = True
+            t.start()
+
+    def send(self, message):
+        self.queue.put(message)
+
+    def sendOutput(self, run):
+        self.queue.put(run)
+
+    def sendExit(self, run, message):
+        self.queue.put((run, message))
+
+    def streamOutput(self, run, data):
+        """ The run's onOutput, for a run submitted with "stream" (called on its worker thread) """
+        with self.server.lock:
+            runId = self.server.runIds.get(run)  # set by now:  the submit holds the lock until it is
+        self.queue.put({"event": "output", "run": runId, "data": data.decode("latin-1")})
+
+    def readLoop(self):
+        try:
+            for line in self.sock.makefile("rb"):
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    continue
+                try:
+                    self.server.handle(self, request)
+                except Exception as e:
+                    # Something requestError() let through:  answer it rather than drop the client
+                    self.send({"id": request.get("id"), "error": "can't carry out the request: {}".format(e)})
+        except socket.error:
+            pass
+        finally:
+            self.server.disconnect(self)
+            self.queue.put(None)
+
+    def writeLoop(self):
+        while True:
+            message = self.queue.get()
+            if message is None:
+                break
+            if isinstance(message, CmdRun):
+                messages = [self.outputMessage(message)]
+            elif isinstance(message, tuple):
+                run, message = message
+                messages = [self.outputMessage(run), message]
+                self.offsets.pop(run, None)  # that was the last of it
+                self.streamed.discard(run)
+            else:
+                messages = [message]
+            try:
+                for message in messages:
+                    if message is not None:
+                        self.sock.sendall(json.dumps(message) + "\n")
+            except socket.error:
+                break
+        try:
+            self.sock.close()
+        except socket.error:
+            pass
+
+    def outputMessage(self, run):
+        """ The output of run this client hasn't been sent yet, as an "output" event, or None """
+        if run in self.streamed:
+            return None  # sent already, chunk by chunk
+        offset, cut = self.offsets.get(run, (0, 0))
+        data, offset, droppedLines, cut, reset = run.output.since(offset, cut)
+        self.offsets[run] = (offset, cut)
+        if not data:
+            return None
+        return {"event": "output", "run": self.server.runIds.get(run), "data": data.decode("latin-1")}
+
+#----------------------------------------------------------------------------
+class ExecutorServer(object):
+    """ Runs commands for the clients connected to a Unix domain socket """
+    KEEP_FINISHED = 100  # finished runs kept for status() and attach()
+    POLL_TIMEOUT = 0.5
+
+    def __init__(self, path=None, maxParallel=0, logs=None, idleExit=0):
+        """ With idleExit, the daemon exits after that many seconds without clients or runs """
+        self.path     = path or socketPath()
+        self.executor = Executor(maxParallel, logs)
+        self.idleExit = idleExit
+        self.lock     = threading.Lock()
+        self.clients  = set()
+        self.runs     = {}    # run id -> CmdRun
+        self.runIds   = {}    # CmdRun -> run id
+        self.subscribers = {} # CmdRun -> set of ClientConnections that get its events
+        self.finished = deque()  # finished CmdRuns, oldest first
+        self.nextId   = 0
+        self.listener = None
+        self.stopped  = False
+
+    def listen(self):
+        """ Bind the socket, replacing a stale one.  Raises DaemonError if a daemon is already
+            listening, or the socket can't be made.
+        """
+        try:
+            directory = os.path.dirname(self.path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory, 0o700)
+            if os.path.exists(self.path):
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    probe.connect(self.path)
+                    raise DaemonError("an executor daemon is already listening on {}".format(self.path))
+                except socket.error:
+                    os.remove(self.path)  # left behind by a daemon that died
+                finally:
+                    probe.close()
+            with SPAWN_LOCK:
+                self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                setCloseOnExec(self.listener.fileno())  # a command mustn't keep the socket listening
+            # Created private:  chmod() after bind() would leave a moment when other users could connect.
+            # The umask is the whole process's, but no other thread has been started yet.
+            umask = os.umask(0o177)
+            try:
+                self.listener.bind(self.path)
+            finally:
+                os.umask(umask)
+            self.listener.listen(16)
+        except (socket.error, OSError) as e:
+            if self.listener is not None:
+                self.listener.close()
+                self.listener = None
+            raise DaemonError("can't listen on {}: {}".format(self.path, e))
+        self.listener.setblocking(False)  # see accept()
+
+    def serve(self):
+        """ Accept clients until stopped (or idle for idleExit seconds, or interrupted) """
+        self.listen()
+        t = threading.Thread(target=self.eventLoop, name="events")
+        t.daemon = True
+        t.start()
+        try:
+            while not self.stopped:
+                sock = self.accept()
+                if sock is None:
+                    continue
+                client = ClientConnection(self, sock)
+                with self.lock:
+                    self.clients.add(client)
+                client.start()
+        except KeyboardInterrupt:
+            for run in list(self.executor.runs):
+                self.executor.cancel(run)
+        finally:
+            self.listener.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def accept(self):
+        """ Wait a second (to notice self.stopped) for a client to connect.
+            Return its socket, marked close-on-exec, or None.
+        """
+        if not select.select([self.listener], [], [], 1)[0]:
+            return None
+        with SPAWN_LOCK:
+            try:
+                sock, address = self.listener.accept()
+            except socket.error as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.ECONNABORTED, errno.EINTR):
+                    return None  # it hung up already
+                raise
+            setCloseOnExec(sock.fileno())
+        sock.setblocking(True)
+        return sock
+
+    def eventLoop(self):
+        """ Thread body:  pass the executor's events on to the subscribed clients """
+        idleSince = None
+        while not self.stopped:
+            self.executor.poll(self.onRunEvent, timeout=self.POLL_TIMEOUT)
+            if self.idleExit > 0:
+                with self.lock:
+                    idle = not self.clients and not self.executor.isBusy
+                if not idle:
+                    idleSince = None
+                elif idleSince is None:
+                    idleSince = time.time()
+                elif time.time() - idleSince > self.idleExit:
+                    self.stopped = True
+
+    def onRunEvent(self, event, run, data):
+        with self.lock:
+            runId = self.runIds.get(run)
+            clients = self.subscribers.get(run, ())
+            if event == "start":
+                message = {"event": "start", "run": runId, "startTime": run.startTime, "logPath": run.logPath}
+                for client in clients:
+                    client.send(message)
+            elif event == "output":
+                for client in clients:
+                    client.sendOutput(run)
+            elif event == "exit":
+                message = self.exitMessage(run, runId)
+                for client in clients:
+                    client.sendExit(run, message)
+                self.finish(run)
+
+    @staticmethod
+    def exitMessage(run, runId):
+        return {"event": "exit", "run": runId, "returncode": run.returncode, "endTime": run.endTime,
+                "userTime": run.userTime, "sysTime": run.sysTime, "error": run.error,
+                "timedOut": run.timedOut, "cancelled": run.cancelled}
+
+    def finish(self, run):
+        """ Keep the finished run for a while, forgetting the oldest.  Call with self.lock held. """
+        self.subscribers.pop(run, None)
+        self.finished.append(run)
+        while len(self.finished) > self.KEEP_FINISHED:
+            old = self.finished.popleft()
+            self.runs.pop(self.runIds.pop(old, None), None)
+
+    def disconnect(self, client):
+        with self.lock:
+            self.clients.discard(client)
+            for clients in self.subscribers.values():
+                clients.discard(client)
+
+    def handle(self, client, request):
+        """ Carry out one request from client (on its reader thread) """
+        error = requestError(request)
+        if error is not None:
+            client.send({"id": request.get("id") if isinstance(request, dict) else None, "error": error})
+            return
+        op = request["op"]
+        reply = {"id": request.get("id")}
+        with self.lock:
+            if op == "hello":
+                reply.update(maxParallel=self.executor.maxParallel, pid=os.getpid())
+            elif op == "submit":
+                cwd, env = request.get("cwd"), request.get("env")
+                # Under self.lock, so the run's events can't be sent before the reply
+                run = self.executor.submit(request["name"], request["cmd"], owner=request.get("key"),
+                                           policy=request.get("policy", Executor.QUEUE),
+                                           maxLines=request.get("maxLines", 0),
+                                           maxBytes=request.get("maxBytes", 0),
+                                           timeout=request.get("timeout", 0),
+                                           limits=request.get("limits"),
+                                           shell=request.get("shell"),
+                                           log=request.get("log", True),
+                                           group=request.get("group"),
+                                           session=request.get("session"),
+                                           onOutput=client.streamOutput if request.get("stream") else None,
+                                           cwd=fromWire(cwd) if cwd is not None else None,
+                                           env=dict((fromWire(k), fromWire(v)) for k, v in env.items())
+                                               if env is not None else None)
+                if run is None:
+                    reply["run"] = None
+                else:
+                    self.nextId += 1
+                    self.runs[self.nextId] = run
+                    self.runIds[run] = self.nextId
+                    self.subscribers[run] = set([client])
+                    if run.onOutput is not None:
+                        client.streamed.add(run)
+                    reply.update(run=self.nextId, logPath=run.logPath)
+            elif op == "subscribe":
+                run = self.runs.get(request.get("run"))
+                if run is None:
+                    reply["error"] = "no run {}".format(request.get("run"))
+                else:
+                    reply.update(run=request["run"], info=runInfo(run, request["run"]))
+                    client.send(reply)
+                    if run.isDone:
+                        client.sendExit(run, self.exitMessage(run, request["run"]))
+                    else:
+                        client.sendOutput(run)
+                        self.subscribers.setdefault(run, set()).add(client)
+                    return
+            elif op == "status":
+                reply["runs"] = [runInfo(run, runId, len(self.subscribers.get(run, ())))
+                                 for runId, run in sorted(self.runs.items())]
+            elif op == "cancel":
+                run = self.runs.get(request.get("run"))
+                if run is not None:
+                    self.executor.cancel(run)
+                return
+            elif op == "cancelKey":
+                self.executor.cancelKey(request["key"])
+                return
+            client.send(reply)
+
+#----------------------------------------------------------------------------
+class RemoteExecutor(Executor):
+    """ An Executor whose commands are run by the executor daemon.
+        Its maxParallel is the daemon's, which applies to all of its clients.
+    """
+    REPLY_TIMEOUT = 10
+
+    def __init__(self, path=None):
+        """ Connect to the daemon at path.  Raises DaemonError if there isn't one. """
+        self.path = path or socketPath()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(self.path)
+        except socket.error as e:
+            self.sock.close()
+            raise DaemonError("can't connect to the executor daemon at {}: {}".format(self.path, e))
+        self.remoteMaxParallel = 1
+        Executor.__init__(self)
+        self.clientId  = "{}.{}".format(os.getpid(), id(self))
+        self.sendLock  = threading.Lock()
+        self.nextId    = 0
+        self.waiting   = {}    # request id -> [threading.Event, reply, CmdRun or None]
+        self.remote    = {}    # run id -> CmdRun, for runs that haven't exited
+        self.connected = True
+        self.closing   = False
+        self.reader    = threading.Thread(target=self._readLoop, name="daemon")
+        self.reader.daemon = True
+        self.reader.start()
+        self.remoteMaxParallel = self._request({"op": "hello"})["maxParallel"]
+
+    @property
+    def maxParallel(self):
+        return self.remoteMaxParallel
+
+    @maxParallel.setter
+    def maxParallel(self, value):
+        pass  # the daemon's limit applies to every client
+
+    def close(self):
+        """ Disconnect, and wait for the reader thread to finish, so it isn't killed at exit """
+        self.closing = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self.sock.close()
+        if self.reader is not threading.current_thread():
+            self.reader.join(self.REPLY_TIMEOUT)
+
+    def _keyOf(self, run):
+        """ The daemon's key for run; runs with the same key never overlap.  A command
+            file's button has the same key in every client, so a window that attaches to
+            its run can stop it, and the policies apply to it.  Other keys, e.g. those of
+            benchmark runs, only compare equal within this client.
+        """
+        if run.group is not None:
+            return json.dumps([run.group, run.name])
+        return "{}:{}".format(self.clientId, hash(run.key))
+
+    def _send(self, message):
+        with self.sendLock:
+            self.sock.sendall(json.dumps(message) + "\n")
+
+    def _request(self, message, run=None):
+        """ Send message and wait for the reply.  run is the CmdRun the reply is about, if any. """
+        waiter = [threading.Event(), None, run]
+        with self.sendLock:
+            if not self.connected:
+                raise DaemonError("lost the connection to the executor daemon")
+            self.nextId += 1
+            message["id"] = self.nextId
+            self.waiting[self.nextId] = waiter
+            try:
+                self.sock.sendall(json.dumps(message) + "\n")
+            except socket.error as e:
+                raise DaemonError("can't talk to the executor daemon: {}".format(e))
+        if not waiter[0].wait(self.REPLY_TIMEOUT):
+            raise DaemonError("the executor daemon didn't answer")
+        if waiter[1] is None:
+            raise DaemonError("lost the connection to the executor daemon")
+        if waiter[1].get("error"):
+            raise DaemonError(waiter[1]["error"])
+        return waiter[1]
+
+    def _readLoop(self):
+        """ Thread body:  turn the daemon's replies and events into local ones """
+        try:
+            for line in self.sock.makefile("rb"):
+                message = json.loads(line)
+                if "event" in message:
+                    self._onEvent(message)
+                else:
+                    self._onReply(message)
+        except (socket.error, ValueError):
+            pass
+        except Exception:
+            if not self.closing:
+                raise
+        finally:
+            self._onDisconnect()
+
+    def _onReply(self, message):
+        with self.sendLock:
+            waiter = self.waiting.pop(message.get("id"), None)
+        if waiter is None:
+            return
+        run = waiter[2]
+        if run is not None and message.get("run") is not None:
+            # Registered here, before the run's events are read
+            run.remoteId = message["run"]
+            run.logPath = message.get("logPath")
+            self.remote[run.remoteId] = run
+            info = message.get("info")
+            if info is not None:
+                self._applyInfo(run, info)
+        waiter[1] = message
+        waiter[0].set()
+
+    def _applyInfo(self, run, info):
+        """ Fill in a run we attached to.  It gets a "start" event, like any other. """
+        run.name       = info["name"]
+        run.cmdText    = info["cmd"]
+        run.cwd        = fromWire(info["cwd"]) if info.get("cwd") is not None else None
+        run.group      = info["group"]
+        run.submitTime = info["submitTime"]
+        run.startTime  = info["startTime"]
+        run.logPath    = info["logPath"]
+        run.remoteKey  = self._keyOf(run)
+        if info["state"] != CmdRun.PENDING:
+            self.events.put(("start", run, None))
+
+    def _onEvent(self, message):
+        run = self.remote.get(message["run"])
+        if run is None:
+            return
+        event = message["event"]
+        if event == "start":
+            run.startTime = message["startTime"]
+            run.logPath = message["logPath"]
+            self.events.put(("start", run, None))
+        elif event == "output":
+            data = message["data"].encode("latin-1")
+            if run.onOutput is not None:
+                run.onOutput(run, data)
+            if run.output.write(data):
+                self.events.put(("output", run, None))
+        elif event == "exit":
+            del self.remote[run.remoteId]
+            with self.lock:
+                run.endTime   = message["endTime"]
+                run.userTime  = message["userTime"]
+                run.sysTime   = message["sysTime"]
+                run.error     = message["error"]
+                run.timedOut  = message["timedOut"]
+                run.cancelled = run.cancelled or message["cancelled"]
+            self.events.put(("exit", run, message["returncode"]))
+
+    def _onDisconnect(self):
+        """ Fail whatever was waiting on the daemon.  Its runs carry on without us. """
+        with self.sendLock:
+            self.connected = False
+            waiting, self.waiting = self.waiting, {}
+        for waiter in waiting.values():
+            waiter[0].set()
+        remote, self.remote = self.remote, {}
+        for run in remote.values():
+            run.error = "lost the connection to the executor daemon"
+            self.events.put(("exit", run, -1))
+
+    def _failed(self, run, error):
+        """ Report run as not started, as Executor does when a command can't be run """
+        run.error = str(error)
+        with self.lock:
+            self.events.put(("exit", run, -1))
+        return run
+
+    def submit(self, name, cmdText, owner=None, policy=Executor.QUEUE, maxLines=0, maxBytes=0, timeout=0,
+               limits=None, shell=None, log=True, group=None, session=None, check=None, onOutput=None,
+               cwd=None, env=None):
+        """ Like Executor.submit(), but the daemon runs the command (in the daemon's shell session, if any).
+            It runs in this process's directory and environment unless cwd and env say otherwise.
+            The command is sent, after the check if there is one, on a thread of its own, so a busy
+            daemon doesn't hold up the caller; if the daemon can't run it, that's reported by its
+            "exit" event.  onOutput is called on the thread that reads from the daemon.
+        """
+        cwd = os.getcwd() if cwd is None else cwd
+        env = dict(os.environ) if env is None else env
+        run = CmdRun(name, cmdText, owner, maxLines, maxBytes, timeout, limits, shell, group, session, check,
+                     onOutput, cwd, env)
+        with self.lock:
+            if policy == self.DROP and any(r.key == run.key for r in self.runs):
+                return None  # the caller needs to know now, not after the daemon answers
+            self.runs.append(run)
+        run.remoteKey = self._keyOf(run)
+        message = {"op": "submit", "name": name, "cmd": cmdText, "key": run.remoteKey,
+                   "policy": policy, "maxLines": maxLines, "maxBytes": maxBytes, "timeout": timeout,
+                   "limits": limits, "shell": shell, "log": log, "group": group, "session": session,
+                   "stream": onOutput is not None, "cwd": toWire(cwd),
+                   "env": dict((toWire(k), toWire(v)) for k, v in env.items())}
+        t = threading.Thread(target=self._checkAndSubmit, args=(run, message), name=threadName("submit", name))
+        t.daemon = True
+        t.start()
+        return run
+
+    def _checkAndSubmit(self, run, message):
+        """ Thread body:  send run to the daemon unless its check says it's up to date """
+        if run.check is not None:
+            try:
+                run.upToDate = bool(run.check(run))
+            except Exception as e:
+                self._failed(run, "checking whether it's up to date: {}".format(e))
+                return
+        if run.upToDate:
+            self.events.put(("exit", run, 0))
+        elif run.cancelled or self._submit(run, message) is None:
+            run.cancelled = True  # stopped before it was sent, or dropped by another client's run
+            self.events.put(("exit", run, None))
+
+    def _submit(self, run, message):
+        """ Send run to the daemon.  Return run, or None if the policy dropped it. """
+        try:
+            reply = self._request(message, run)
+        except DaemonError as e:
+            return self._failed(run, e)
+        if reply.get("run") is None:
+            with self.lock:
+                self.runs.remove(run)
+            return None  # dropped by the policy
+        if run.cancelled:
+            self.cancel(run)  # stopped while the daemon was answering
+        return run
+
+    def attach(self, runId, owner=None):
+        """ Follow a run someone else submitted, e.g. before this window was opened.
+            Return its CmdRun, which gets the run's events from now on, or None if it's gone.
+        """
+        run = CmdRun("", "", owner)
+        with self.lock:
+            self.runs.append(run)
+        try:
+            self._request({"op": "subscribe", "run": runId}, run)
+        except DaemonError:
+            with self.lock:
+                self.runs.remove(run)
+            return None
+        return run
+
+    def status(self):
+        """ Return a runInfo() dict for each of the daemon's recent runs """
+        return self._request({"op": "status"})["runs"]
+
+    def cancel(self, run):
+        if getattr(run, "remoteId", None) is None:
+            run.cancelled = True  # not sent yet (see _checkAndSubmit()), or not answered yet
+            return
+        try:
+            self._send({"op": "cancel", "run": run.remoteId})
+        except socket.error:
+            pass
+
+    def cancelKey(self, key):
+        with self.lock:
+            remoteKeys = set(r.remoteKey for r in self.runs if r.key == key and hasattr(r, "remoteKey"))
+            for r in self.runs:
+                if r.key == key and getattr(r, "remoteId", None) is None:
+                    r.cancelled = True  # not sent yet
+        try:
+            for remoteKey in remoteKeys:
+                self._send({"op": "cancelKey", "key": remoteKey})
+        except socket.error:
+            pass
+
+#----------------------------------------------------------------------------
+def startDaemon(path, maxParallel=0, idleExit=0):
+    """ Start runner.py --serve in the background, detached from this process """
+    cmd = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "runner.py"),
+           "--serve", "--socket", path, "--jobs", str(maxParallel), "--idleExit", str(idleExit)]
+    logPath = os.path.join(cacheDir(), "executor.log")
+    if not os.path.isdir(os.path.dirname(logPath)):
+        os.makedirs(os.path.dirname(logPath))
+    with open(os.devnull, "rb") as devnull, open(logPath, "ab") as log:
+        subprocess.Popen(cmd, stdin=devnull, stdout=log, stderr=log, close_fds=True, preexec_fn=os.setsid)
+
+def jobsWarning(executor, maxParallel):
+    """ A warning if --jobs maxParallel doesn't apply to the daemon executor is connected to, or None """
+    if maxParallel <= 0 or executor.maxParallel == maxParallel:
+        return None
+    return ("--jobs {} is ignored:  the executor daemon was already running, with its own limit of {} "
+            "(see runner.py --serve --jobs)".format(maxParallel, executor.maxParallel))
+
+def connect(path=None, start=False, maxParallel=0, idleExit=600, timeout=5):
+    """ Return a RemoteExecutor connected to the daemon at path.
+        If start is True and no daemon is running, one is started; it exits
+        after idleExit seconds with no clients and nothing to run.
+        Raises DaemonError if it can't connect.
+    """
+    path = path or socketPath()
+    try:
+        return RemoteExecutor(path)
+    except DaemonError:
+        if not start:
+            raise
+    startDaemon(path, maxParallel, idleExit)
+    deadline = time.time() + timeout
+    while True:
+        time.sleep(0.05)
+        try:
+            return RemoteExecutor(path)
+        except DaemonError:
+            if time.time() > deadline:
+                raise
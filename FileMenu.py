@@ -17,6 +17,8 @@ import os.path
 #----------------------------------------------------------------------------
 class FileMenu(Menu):
     """ Base class for a file menu that has the common entries New, Open, Save, Save As, Export, and Exit """
+    SAVE_PENDING = "pending"  # saveToFile() return value for a save that finishes later
+    
     def __init__(self, menubar, **kwargs):
         """ Constructor """
         Menu.__init__(self, menubar, **kwargs)
@@ -108,8 +110,11 @@ class FileMenu(Menu):
                 if not self.onFileSaveAs():
                     return False
             else:
-                if not self.saveToFile(self.currFile):
+                result = self.saveToFile(self.currFile)
+                if not result:
                     return False
+                if result == self.SAVE_PENDING:
+                    return True  # the subclass calls onSaveComplete() when it's done
             self.setModified(False)
         return True
     
@@ -121,9 +126,11 @@ class FileMenu(Menu):
         saveDir = os.path.dirname(self.currFile) if self.currFile else None
         path = tkFileDialog.asksaveasfilename(filetypes=self.fileTypes, initialdir=saveDir)
         if path:
-            if self.saveToFile(path):
+            result = self.saveToFile(path)
+            if result:
                 self.currFile = path
-                self.setModified(False)
+                if result != self.SAVE_PENDING:
+                    self.setModified(False)
                 return True
         return False
     
@@ -131,9 +138,18 @@ class FileMenu(Menu):
         """ Save <something> to the specified file path.
             Subclass should override the default behavior.
             Return True on success.
+            A subclass that saves in the background returns SAVE_PENDING instead,
+            and calls onSaveComplete() when the save finishes.  The subclass is
+            then responsible for clearing the modified flag when it starts saving.
         """
         return False
     
+    def onSaveComplete(self, path, error=None):
+        """ Report the result of a save.  error is None on success, or a message. """
+        if error:
+            self.setModified(True)  # the data is not on disk
+            tkMessageBox.showerror(title="Save Failed", message="Could not save {}:\n\n{}".format(path, error))
+    
     def onFileExport(self):
         """ Request a filename from the user and export data to that name.
             Note:  does not force an extension like the standard Windows save dialog
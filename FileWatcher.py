@@ -0,0 +1,176 @@
+#!/usr/bin/python
+#
+#   File: FileWatcher.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Watch a file for changes from the Tk mainloop.
+
+On Linux the file's directory is watched with inotify, and the inotify file
+descriptor is handed to Tk with createfilehandler(), so nothing runs at all
+while the file is idle.  The directory is watched rather than the file so
+that files replaced by a rename are noticed too.  Elsewhere the file's
+mtime and size are polled with os.stat().
+
+Notifications are debounced:  the callback runs once, DEBOUNCE_MS after the
+last change in a burst, and only if the file's (mtime, size, inode) stamp
+differs from the last one seen.
+"""
+from __future__ import print_function, division
+
+import os
+import sys
+import struct
+import ctypes
+import ctypes.util
+from Tkinter import READABLE
+
+
+#----------------------------------------------------------------------------
+class Inotify(object):
+    """ A minimal ctypes wrapper around the Linux inotify API """
+    IN_MODIFY      = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM  = 0x00000040
+    IN_MOVED_TO    = 0x00000080
+    IN_CREATE      = 0x00000100
+    IN_DELETE      = 0x00000200
+    IN_NONBLOCK    = 0o4000
+    IN_CLOEXEC     = 0o2000000
+    EVENT_HEADER   = struct.Struct("iIII")  # wd, mask, cookie, len
+
+    def __init__(self):
+        """ Raise OSError if inotify is not available """
+        libcName = ctypes.util.find_library("c")
+        if libcName is None:
+            raise OSError("no C library")
+        libc = ctypes.CDLL(libcName, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.libc = libc
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def addWatch(self, path, mask):
+        if not isinstance(path, bytes):
+            path = path.encode(sys.getfilesystemencoding())
+        wd = self.libc.inotify_add_watch(self.fd, path, mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed", path)
+        return wd
+
+    def read(self):
+        """ Return a list of (mask, name) for the pending events """
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except OSError:
+                break  # EAGAIN:  nothing more to read
+            if not data:
+                break
+            pos = 0
+            while pos + self.EVENT_HEADER.size <= len(data):
+                wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(data, pos)
+                pos += self.EVENT_HEADER.size
+                name = data[pos:pos+length].rstrip(b"\0")
+                pos += length
+                events.append((mask, name))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+#----------------------------------------------------------------------------
+class FileWatcher(object):
+    """ Calls onChange() from the Tk mainloop when the watched file changes """
+    DEBOUNCE_MS = 300
+    POLL_MS     = 1000
+
+    def __init__(self, widget, onChange):
+        self.widget   = widget   # any Tk widget, used to schedule callbacks
+        self.onChange = onChange
+        self.path     = None
+        self.stamp    = None     # (mtime, size, inode) when last seen
+        self.pendingStamp = None # polling:  the changed stamp waiting to settle
+        self.inotify  = None
+        self.afterId  = None
+        self.polling  = False
+
+    @staticmethod
+    def getStamp(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime, st.st_size, st.st_ino)
+
+    def watch(self, path):
+        """ Start watching path, replacing any previous path """
+        self.stop()
+        self.path = os.path.abspath(path)
+        self.sync()
+        try:
+            self.inotify = Inotify()
+            self.inotify.addWatch(os.path.dirname(self.path),
+                                  Inotify.IN_CLOSE_WRITE | Inotify.IN_MODIFY | Inotify.IN_MOVED_TO |
+                                  Inotify.IN_MOVED_FROM | Inotify.IN_CREATE | Inotify.IN_DELETE)
+            self.widget.tk.createfilehandler(self.inotify.fd, READABLE, self.onReadable)
+        except (OSError, AttributeError, RuntimeError):
+            if self.inotify is not None:
+                self.inotify.close()
+                self.inotify = None
+            self.polling = True
+            self.schedule(self.POLL_MS)
+
+    def stop(self):
+        self.cancel()
+        self.polling = False
+        if self.inotify is not None:
+            self.widget.tk.deletefilehandler(self.inotify.fd)
+            self.inotify.close()
+            self.inotify = None
+
+    def sync(self):
+        """ Accept the current contents of the file as seen, e.g. after saving it ourselves """
+        self.stamp = self.getStamp(self.path) if self.path else None
+
+    def cancel(self):
+        if self.afterId is not None:
+            self.widget.after_cancel(self.afterId)
+            self.afterId = None
+
+    def schedule(self, ms):
+        self.cancel()
+        self.afterId = self.widget.after(ms, self.check)
+
+    def onReadable(self, fd, mask):
+        """ Tk file handler for the inotify descriptor """
+        name = os.path.basename(self.path)
+        if not isinstance(name, bytes):
+            name = name.encode(sys.getfilesystemencoding())
+        if any(eventName == name for eventMask, eventName in self.inotify.read()):
+            self.schedule(self.DEBOUNCE_MS)  # restart the debounce timer
+
+    def check(self):
+        """ Call onChange() if the file's stamp changed """
+        self.afterId = None
+        stamp = self.getStamp(self.path)
+        if stamp != self.stamp:
+            if self.polling:
+                # Wait until the file stops changing before reporting it
+                if stamp != self.pendingStamp:
+                    self.pendingStamp = stamp
+                    self.schedule(self.DEBOUNCE_MS)
+                    return
+            self.stamp = stamp
+            self.onChange()
+        if self.polling:
+            self.schedule(self.POLL_MS)
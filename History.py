@@ -0,0 +1,152 @@
+#!/usr/bin/python
+#
+#   File: History.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+A persistent record of every command run.
+
+Runs are stored in an SQLite database next to the command file (cmds.json
+gets cmds.json.history), in WAL mode so that readers never block the writer.
+Each row has the button name, the command text, the start time, the
+duration, the exit code and the number of bytes of output, and is indexed
+by button and start time.
+
+record() only queues a run; the queue is written in a single transaction by
+flush(), which the GUI calls every few seconds, so a burst of runs costs one
+commit.  The durations of the most recent runs of each button are kept in
+memory for timings(), so tooltips don't have to query the database.
+"""
+from __future__ import print_function, division
+
+import math
+import time
+import sqlite3
+from collections import deque
+
+
+#----------------------------------------------------------------------------
+def formatDuration(seconds):
+    """ A short human-readable duration, e.g. "850ms", "12.3s", "4m05s" """
+    if seconds < 1:
+        return "{:.0f}ms".format(seconds * 1000)
+    if seconds < 60:
+        return "{:.1f}s".format(seconds)
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    if minutes < 60:
+        return "{}m{:02d}s".format(minutes, seconds)
+    return "{}h{:02d}m".format(*divmod(minutes, 60))
+
+def percentile(sortedValues, fraction):
+    """ The value below which fraction of sortedValues fall (nearest rank) """
+    index = int(math.ceil(fraction * len(sortedValues))) - 1
+    return sortedValues[min(max(index, 0), len(sortedValues) - 1)]
+
+#----------------------------------------------------------------------------
+class History(object):
+    """ Execution history for one command file """
+    SUFFIX        = ".history"
+    FLUSH_SECONDS = 5     # flushIfDue() writes queued runs at most this often
+    FLUSH_COUNT   = 100   # ... or as soon as this many are queued
+    RECENT_RUNS   = 100   # timings() are computed over this many runs per button
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id        INTEGER PRIMARY KEY,
+            button    TEXT NOT NULL,
+            cmd       TEXT NOT NULL,
+            start     REAL NOT NULL,
+            duration  REAL NOT NULL,
+            exitCode  INTEGER,
+            state     TEXT NOT NULL,
+            outputBytes INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS runsByButton ON runs (button, start);
+        CREATE INDEX IF NOT EXISTS runsByStart ON runs (start);
+    """
+
+    def __init__(self, path):
+        """ Open (or create) the history database at path.  Raises sqlite3.Error if it can't be opened. """
+        self.path      = path
+        self.queue     = []   # rows not yet written
+        self.lastFlush = time.time()
+        self.recent    = {}   # button -> deque of recent durations, oldest first
+        self.db = sqlite3.connect(path)
+        try:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")  # durable enough with WAL, and much faster
+        except sqlite3.DatabaseError:
+            pass  # e.g. a filesystem without shared memory:  keep the default journal
+        self.db.executescript(self.SCHEMA)
+        self.db.commit()
+
+    @classmethod
+    def forCmdFile(cls, cmdFilePath):
+        return cls(cmdFilePath + cls.SUFFIX)
+
+    def record(self, run):
+        """ Queue a finished CmdRun to be written by the next flush() """
+        if run.startTime is None or run.endTime is None:
+            return  # never started, e.g. cancelled while pending, or up to date
+        duration = run.endTime - run.startTime
+        self.queue.append((run.name, run.cmdText, run.startTime, duration,
+                           run.returncode, run.state, run.output.written))
+        recent = self.recentDurations(run.name)
+        recent.append(duration)
+        if len(self.queue) >= self.FLUSH_COUNT:
+            self.flush()
+
+    def flush(self):
+        """ Write all queued runs in one transaction """
+        self.lastFlush = time.time()
+        if not self.queue:
+            return
+        rows, self.queue = self.queue, []
+        try:
+            with self.db:
+                self.db.executemany("INSERT INTO runs (button, cmd, start, duration, exitCode, state, outputBytes) "
+                                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            pass  # e.g. the disk is full; the history is not worth interrupting anyone for
+
+    def flushIfDue(self):
+        """ flush() if the oldest queued run has waited FLUSH_SECONDS """
+        if self.queue and time.time() - self.lastFlush >= self.FLUSH_SECONDS:
+            self.flush()
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def recentDurations(self, button):
+        """ The deque of the durations of button's most recent runs, loading it from the database the first time """
+        recent = self.recent.get(button)
+        if recent is None:
+            rows = self.db.execute("SELECT duration FROM runs WHERE button = ? ORDER BY start DESC LIMIT ?",
+                                   (button, self.RECENT_RUNS)).fetchall()
+            recent = deque((row[0] for row in reversed(rows)), maxlen=self.RECENT_RUNS)
+            self.recent[button] = recent
+        return recent
+
+    def timings(self, button):
+        """ Return (last, median, p95, count) durations in seconds over button's recent runs,
+            or None if it has never run.
+        """
+        recent = self.recentDurations(button)
+        if not recent:
+            return None
+        durations = sorted(recent)
+        return recent[-1], percentile(durations, 0.5), percentile(durations, 0.95), len(durations)
+
+    def describeTimings(self, button):
+        """ timings() as a line of text for a tooltip, or None """
+        timings = self.timings(button)
+        if timings is None:
+            return None
+        last, median, p95, count = timings
+        return "Last {}, median {}, p95 {} ({} run{})".format(formatDuration(last), formatDuration(median),
+                                                              formatDuration(p95), count, "" if count == 1 else "s")
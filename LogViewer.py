@@ -0,0 +1,215 @@
+#!/usr/bin/python
+#
+#   File: LogViewer.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+A window showing a run's complete output from its log file.
+
+The file is read through an OutputLog.LogIndex, and the text widget only
+ever holds the lines that fit in the window, so a log of hundreds of MB
+scrolls as easily as a short one.  While the command is still running the
+window follows the end of the file, unless it has been scrolled up.
+
+The Find box takes a regular expression:  Return or Next finds the next
+match, Shift-Return or Previous the one before, wrapping around the ends.
+Type a line number in the Line box and press Return to jump to it.
+"""
+from __future__ import print_function, division
+
+import os
+import re
+
+from Tkinter import Toplevel, Frame, Label, Entry, Button, Text, Scrollbar, END, DISABLED, NORMAL
+import tkFont
+
+from OutputLog import LogIndex
+
+
+#----------------------------------------------------------------------------
+class LogViewer(Toplevel):
+    """ Displays the visible window of a (possibly growing) log file """
+    REFRESH_MS = 250   # how often to check the file for more output
+    WHEEL_LINES = 3
+
+    def __init__(self, parent, path, title=None, run=None):
+        """ run is the CmdRun writing the file, if it may still be running """
+        Toplevel.__init__(self, parent)
+        self.title(title or os.path.basename(path))
+        self.index = LogIndex(path)
+        self.run = run
+        self.top = 0         # the first line displayed
+        self.follow = True   # keep the end of the file in view as it grows
+        self.match = None    # (start, end) offsets of the last match found
+        self.regex = None
+        self.pattern = None
+
+        bar = Frame(self)
+        bar.grid(row=0, column=0, columnspan=2, sticky="ew")
+        bar.columnconfigure(1, weight=1)
+        Label(bar, text="Find:").grid(row=0, column=0)
+        self.findEntry = Entry(bar)
+        self.findEntry.grid(row=0, column=1, sticky="ew")
+        self.findEntry.bind("<Return>", lambda e: self.find())
+        self.findEntry.bind("<Shift-Return>", lambda e: self.find(backwards=True))
+        Button(bar, text="Next", command=self.find).grid(row=0, column=2)
+        Button(bar, text="Previous", command=lambda: self.find(backwards=True)).grid(row=0, column=3)
+        Label(bar, text="Line:").grid(row=0, column=4, padx=(10, 0))
+        self.lineEntry = Entry(bar, width=10)
+        self.lineEntry.grid(row=0, column=5)
+        self.lineEntry.bind("<Return>", lambda e: self.gotoLine())
+
+        self.text = Text(self, wrap="none", width=100, height=30)
+        self.text.grid(row=1, column=0, sticky="nsew")
+        self.text.tag_config("match", background="yellow")
+        self.scrollbar = Scrollbar(self, command=self.onScroll)
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+        xscroll = Scrollbar(self, orient="horizontal", command=self.text.xview)
+        xscroll.grid(row=2, column=0, sticky="ew")
+        self.text.config(xscrollcommand=xscroll.set, state=DISABLED)
+        self.status = Label(self, anchor="w")
+        self.status.grid(row=3, column=0, columnspan=2, sticky="ew")
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.lineHeight = tkFont.Font(font=self.text["font"]).metrics("linespace")
+
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.text.bind(sequence, self.onWheel)
+        self.text.bind("<Prior>", lambda e: self.scrollBy(-self.rows()))
+        self.text.bind("<Next>", lambda e: self.scrollBy(self.rows()))
+        self.text.bind("<Control-Home>", lambda e: self.scrollTo(0))
+        self.text.bind("<Control-End>", lambda e: self.scrollTo(self.index.lineCount))
+        self.text.bind("<Configure>", lambda e: self.redraw())
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.poll()
+
+    def rows(self):
+        """ The number of lines that fit in the text widget """
+        return max(1, self.text.winfo_height() // self.lineHeight)
+
+    def poll(self):
+        """ Index whatever was written since the last call.  Reschedules itself
+            until the run is done and the whole file is indexed.
+        """
+        if not self.winfo_exists():
+            return  # closed
+        running = self.run is not None and not self.run.isDone  # before update(), so the end isn't missed
+        if self.index.update():
+            self.redraw()
+        if self.index.pending:
+            self.after_idle(self.poll)
+        elif running:
+            self.after(self.REFRESH_MS, self.poll)
+
+    def redraw(self):
+        """ Show the lines from self.top that fit in the window """
+        rows = self.rows()
+        total = self.index.lineCount
+        if self.follow:
+            self.top = max(0, total - rows)
+        lines = self.index.lines(self.top, rows) if total else []
+        self.text.config(state=NORMAL)
+        self.text.delete("1.0", END)
+        self.text.insert("1.0", u"\n".join(lines))
+        if self.match is not None:
+            self.highlight(*self.match)
+        self.text.config(state=DISABLED)
+        if total:
+            self.scrollbar.set(self.top / total, min(self.top + rows, total) / total)
+            self.status.config(text="Lines {}-{} of {}{}".format(
+                self.top + 1, min(self.top + rows, total), total,
+                "" if self.run is None or self.run.isDone else "  (still running)"))
+        else:
+            self.scrollbar.set(0, 1)
+            self.status.config(text="No output yet")
+
+    def highlight(self, start, end):
+        """ Tag the part of the match from start to end that is displayed """
+        first = self.index.lineOf(start)
+        row = first - self.top
+        if not 0 <= row < self.rows():
+            return
+        lineStart = self.index.offsetOf(first)
+        lineEnd = max(self.index.offsetOf(first + 1) - 1, lineStart)
+        column = len(self.index.text(lineStart, start))
+        endColumn = column + len(self.index.text(start, min(end, lineEnd)))
+        self.text.tag_add("match", "{}.{}".format(row + 1, column), "{}.{}".format(row + 1, max(endColumn, column + 1)))
+        self.text.see("{}.{}".format(row + 1, column))
+
+    def scrollTo(self, line):
+        total = self.index.lineCount
+        self.top = max(0, min(line, total - self.rows()))
+        self.follow = self.top + self.rows() >= total
+        self.redraw()
+
+    def scrollBy(self, lines):
+        self.scrollTo(self.top + lines)
+
+    def onScroll(self, *args):
+        """ Scrollbar command """
+        if args[0] == "moveto":
+            self.scrollTo(int(float(args[1]) * self.index.lineCount))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.scrollBy(amount * self.rows() if args[2] == "pages" else amount)
+
+    def onWheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scrollBy(-self.WHEEL_LINES)
+        else:
+            self.scrollBy(self.WHEEL_LINES)
+        return "break"
+
+    def find(self, backwards=False):
+        """ Find the next (or previous) match of the Find box's regular expression """
+        pattern = self.findEntry.get()
+        if not pattern:
+            return
+        if pattern != self.pattern:
+            try:
+                self.regex = re.compile(pattern.encode("utf-8") if isinstance(pattern, unicode) else pattern,
+                                        re.MULTILINE)
+            except re.error as e:
+                self.status.config(text="Bad regular expression: {}".format(e))
+                return
+            self.pattern = pattern
+            self.match = None
+        if self.match is not None:
+            # Continue from the line after (or before) the last match
+            fromLine = self.index.lineOf(self.match[0]) + (0 if backwards else 1)
+        else:
+            fromLine = self.top
+        match = self.index.search(self.regex, fromLine, backwards)
+        wrapped = False
+        if match is None:
+            match = self.index.search(self.regex, self.index.lineCount if backwards else 0, backwards)
+            wrapped = True
+        if match is None:
+            self.match = None
+            self.redraw()
+            self.status.config(text="Not found: {}".format(pattern))
+            return
+        self.match = match
+        line = self.index.lineOf(match[0])
+        if not self.top <= line < self.top + self.rows():
+            self.scrollTo(line - self.rows() // 3)
+        else:
+            self.redraw()
+        if wrapped:
+            self.status.config(text=self.status.cget("text") + "  (wrapped)")
+
+    def gotoLine(self):
+        try:
+            line = int(self.lineEntry.get()) - 1
+        except ValueError:
+            return
+        self.match = None
+        self.scrollTo(line - self.rows() // 3)
+
+    def close(self):
+        self.index.close()
+        self.destroy()
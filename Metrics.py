@@ -0,0 +1,183 @@
+#!/usr/bin/python
+#
+#   File: Metrics.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+In-process counters and histograms for runner's own hot paths.
+
+Metrics live in memory in a single registry, REGISTRY, and cost a couple of
+time.time() calls and a bisect per observation.  They can be written out at
+any time with dump(), in the Prometheus text exposition format or as JSON:
+
+    @timed("runner_load_cmds_seconds", "Time to load the command file into the GUI")
+    def loadCmds(self):
+        ...
+
+    dump("runner-metrics.prom")
+"""
+from __future__ import print_function, division
+
+import json
+import time
+import bisect
+import functools
+import threading
+
+from AtomicFile import atomicWrite
+
+# Upper bounds of the histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.016, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+#----------------------------------------------------------------------------
+class Counter(object):
+    """ A count that only goes up """
+    TYPE = "counter"
+
+    def __init__(self, name, help, lock):
+        self.name  = name
+        self.help  = help
+        self.lock  = lock
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def samples(self):
+        """ Return a list of (name, labels, value) """
+        return [(self.name, "", self.value)]
+
+    def toDict(self):
+        return {"type": self.TYPE, "help": self.help, "value": self.value}
+
+#----------------------------------------------------------------------------
+class Histogram(object):
+    """ Counts observations in cumulative buckets, with their sum, as Prometheus does """
+    TYPE = "histogram"
+
+    def __init__(self, name, help, lock, buckets=DEFAULT_BUCKETS):
+        self.name    = name
+        self.help    = help
+        self.lock    = lock
+        self.buckets = tuple(sorted(buckets))
+        self.counts  = [0] * (len(self.buckets) + 1)  # the last one is +Inf
+        self.sum     = 0.0
+        self.count   = 0
+        self.max     = 0.0
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+            if value > self.max:
+                self.max = value
+
+    def time(self):
+        """ A context manager that observes the time its body takes """
+        return Timer(self)
+
+    def samples(self):
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            result.append((self.name + "_bucket", '{{le="{}"}}'.format(bound), total))
+        result.append((self.name + "_sum", "", self.sum))
+        result.append((self.name + "_count", "", self.count))
+        return result
+
+    def toDict(self):
+        return {"type": self.TYPE, "help": self.help, "count": self.count, "sum": self.sum, "max": self.max,
+                "buckets": [[bound, count] for bound, count in zip(self.buckets + ("+Inf",), self.counts)]}
+
+class Timer(object):
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.time() - self.start)
+        return False
+
+#----------------------------------------------------------------------------
+class Registry(object):
+    """ A set of named metrics """
+    def __init__(self):
+        self.lock    = threading.Lock()
+        self.metrics = {}  # name -> Counter or Histogram
+
+    def _get(self, cls, name, help, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help, self.lock, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError("metric {} is already a {}".format(name, metric.TYPE))
+            return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def toPrometheus(self):
+        """ The metrics in the Prometheus text exposition format """
+        lines = []
+        with self.lock:
+            for name in sorted(self.metrics):
+                metric = self.metrics[name]
+                if metric.help:
+                    lines.append("# HELP {} {}".format(name, metric.help))
+                lines.append("# TYPE {} {}".format(name, metric.TYPE))
+                for sampleName, labels, value in metric.samples():
+                    lines.append("{}{} {}".format(sampleName, labels, repr(value) if isinstance(value, float) else value))
+        return "\n".join(lines) + "\n"
+
+    def toJSON(self):
+        with self.lock:
+            data = dict((name, metric.toDict()) for name, metric in self.metrics.items())
+        return json.dumps({"time": time.time(), "metrics": data}, indent=True, sort_keys=True)
+
+    def dump(self, path):
+        """ Write the metrics to path:  as JSON if it ends with .json, otherwise in the Prometheus format """
+        data = self.toJSON() if path.lower().endswith(".json") else self.toPrometheus()
+        atomicWrite(path, data)
+
+REGISTRY = Registry()
+
+#----------------------------------------------------------------------------
+def counter(name, help=""):
+    return REGISTRY.counter(name, help)
+
+def histogram(name, help="", buckets=DEFAULT_BUCKETS):
+    return REGISTRY.histogram(name, help, buckets)
+
+def timed(name, help=""):
+    """ A decorator that observes each call's duration in the histogram name """
+    metric = histogram(name, help)
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metric.observe(time.time() - start)
+        return wrapper
+    return decorate
+
+def dump(path):
+    REGISTRY.dump(path)
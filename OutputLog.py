@@ -0,0 +1,231 @@
+#!/usr/bin/python
+#
+#   File: OutputLog.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Complete command output, kept on disk.
+
+The OutputBuffer of a run only keeps the tail of its output.  When the
+Executor has a RunLogs, every run's output is also written, as it arrives,
+to a log file in a directory for this runner session, e.g.
+
+    ~/.cache/runner/runs/20261016-142501-12345/0003-Build_Docs.log
+
+Only the most recent KEEP_RUN_DIRS session directories are kept, along with
+any older ones whose runner process (named at the end) is still running.
+
+A LogIndex reads a log file, possibly one that is still being written,
+without loading it:  the file is memory-mapped, and the index only counts
+the newlines in each BLOCK_SIZE block, so indexing a few hundred MB costs a
+few KB and runs at memory speed.  A line's offset is found from the count
+at the start of its block and a short scan within the block.  update()
+extends the index as the file grows; regular expressions are matched
+against the mapped file directly.
+"""
+from __future__ import print_function, division
+
+import os
+import re
+import errno
+import mmap
+import time
+import shutil
+import bisect
+import threading
+from array import array
+
+from BuildCache import cacheDir
+
+
+#----------------------------------------------------------------------------
+def defaultLogRoot():
+    """ Where each session's run directory is made by default, e.g. ~/.cache/runner/runs """
+    return os.path.join(cacheDir(), "runs")
+
+def processAlive(pid):
+    """ True if a process with this pid exists """
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM  # it exists, but belongs to someone else
+    return True
+
+def ownerPid(dirName):
+    """ The pid of the runner process that made the run directory dirName, or None """
+    try:
+        return int(dirName.rsplit("-", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+def safeName(name):
+    """ name, with anything that doesn't belong in a file name replaced by _ """
+    return re.sub(r"[^\w.-]+", "_", name.encode("utf-8") if isinstance(name, unicode) else name)[:64] or "_"
+
+#----------------------------------------------------------------------------
+class RunLogs(object):
+    """ Hands out log file paths in this session's run directory under root.
+        The directory is made, and old ones are removed, when the first path is asked for.
+    """
+    KEEP_RUN_DIRS = 20
+
+    def __init__(self, root=None):
+        self.root  = root or defaultLogRoot()
+        self.dir   = None
+        self.count = 0
+        self.lock  = threading.Lock()
+
+    def pathFor(self, name):
+        """ Return the path of a new log file for a run of the command name """
+        with self.lock:
+            if self.dir is None:
+                self.dir = self.makeRunDir()
+            self.count += 1
+            return os.path.join(self.dir, "{:04d}-{}.log".format(self.count, safeName(name)))
+
+    def makeRunDir(self):
+        self.prune(self.KEEP_RUN_DIRS - 1)
+        path = os.path.join(self.root, "{}-{}".format(time.strftime("%Y%m%d-%H%M%S"), os.getpid()))
+        os.makedirs(path)
+        return path
+
+    def prune(self, keep):
+        """ Remove all but the newest keep run directories.  A directory whose process
+            is still running is never removed:  it may be an open window's, or the daemon's.
+        """
+        try:
+            names = sorted(os.listdir(self.root))
+        except OSError:
+            return  # no runs yet
+        for name in names[:max(len(names) - keep, 0)]:
+            pid = ownerPid(name)
+            if pid is not None and processAlive(pid):
+                continue
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+#----------------------------------------------------------------------------
+class LogIndex(object):
+    """ A memory-mapped log file with a line index that grows with the file """
+    BLOCK_SIZE = 64 * 1024
+    INDEX_STEP = 32 * 1024 * 1024  # bytes update() indexes per call, so a big file doesn't block the GUI
+    SEARCH_WINDOW = 1024 * 1024    # bytes searched at a time by a backwards search
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = None
+        self.mapped = 0      # bytes mapped
+        self.size = 0        # bytes indexed
+        self.blockLines = array("l", [0])  # newlines before the start of each block that's fully indexed
+        self.tailLines = 0   # newlines in the indexed part of the last block
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    @property
+    def pending(self):
+        """ Bytes mapped but not indexed yet """
+        return self.mapped - self.size
+
+    def update(self, maxBytes=INDEX_STEP):
+        """ Map and index output written since the last call, up to maxBytes of it.
+            Return True if more of the file was indexed.
+        """
+        fileSize = os.fstat(self.file.fileno()).st_size
+        if fileSize < self.size:
+            # Truncated:  start over
+            self.size = self.tailLines = 0
+            self.blockLines = array("l", [0])
+        if fileSize != self.mapped:
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+            if fileSize > 0:
+                self.map = mmap.mmap(self.file.fileno(), fileSize, access=mmap.ACCESS_READ)
+            self.mapped = fileSize
+        end = min(self.mapped, self.size + maxBytes) if maxBytes else self.mapped
+        if end <= self.size:
+            return False
+        block = self.BLOCK_SIZE
+        while len(self.blockLines) * block <= end:
+            i = len(self.blockLines) - 1
+            self.blockLines.append(self.blockLines[i] + self.map[i * block:(i + 1) * block].count(b"\n"))
+        start = (len(self.blockLines) - 1) * block
+        self.tailLines = self.map[start:end].count(b"\n")
+        self.size = end
+        return True
+
+    @property
+    def newlines(self):
+        return self.blockLines[-1] + self.tailLines
+
+    @property
+    def lineCount(self):
+        """ The number of lines indexed, counting an unfinished last line """
+        if self.size and self.map[self.size - 1:self.size] != b"\n":
+            return self.newlines + 1
+        return self.newlines
+
+    def offsetOf(self, line):
+        """ The offset of the start of line (counting from 0), or self.size past the last line """
+        if line <= 0:
+            return 0
+        if line > self.newlines:
+            return self.size
+        # The last block starting before the line-th newline
+        b = bisect.bisect_left(self.blockLines, line) - 1
+        pos = b * self.BLOCK_SIZE
+        for i in range(line - self.blockLines[b]):
+            pos = self.map.find(b"\n", pos, self.size) + 1
+        return pos
+
+    def lineOf(self, offset):
+        """ The line containing offset """
+        offset = max(0, min(offset, self.size))
+        b = min(offset // self.BLOCK_SIZE, len(self.blockLines) - 1)
+        return self.blockLines[b] + self.map[b * self.BLOCK_SIZE:offset].count(b"\n") if offset else 0
+
+    def lines(self, first, count):
+        """ Up to count lines starting at line first, decoded, without their line ends """
+        first = max(first, 0)
+        start = self.offsetOf(first)
+        end = self.offsetOf(first + count)
+        if end <= start:
+            return []
+        lines = self.map[start:end].split(b"\n")  # not splitlines(), which also splits at \r, \f, ...
+        if lines[-1] == b"":
+            lines.pop()
+        return [line.decode("utf-8", "replace") for line in lines]
+
+    def text(self, start, end):
+        """ The bytes from start to end, decoded """
+        return self.map[start:end].decode("utf-8", "replace") if end > start else u""
+
+    def search(self, regex, fromLine, backwards=False):
+        """ Find the first match of regex (a compiled pattern) starting at line fromLine,
+            or the last one before it if backwards.  Return (start, end) offsets, or None.
+            Matches are found within lines; use re.MULTILINE for ^ and $ to match at line ends.
+        """
+        if not self.size:
+            return None
+        if not backwards:
+            match = regex.search(self.map, self.offsetOf(fromLine), self.size)
+            return match.span() if match else None
+        # Search backwards a window at a time, starting each window at a line start
+        end = self.offsetOf(fromLine)
+        while end > 0:
+            start = self.offsetOf(self.lineOf(max(end - self.SEARCH_WINDOW, 0)))
+            last = None
+            for match in regex.finditer(self.map, start, end):
+                last = match
+            if last is not None:
+                return last.span()
+            end = start
+        return None
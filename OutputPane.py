@@ -0,0 +1,161 @@
+#!/usr/bin/python
+#
+#   File: OutputPane.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Notebook of per-command output panes.
+
+Each pane displays the OutputBuffer of the most recent run of one command.
+Panes are only redrawn when flush() is called, so the text widget is updated
+in batches no matter how fast the command writes.  A pane only holds the tail
+of the output; if the run has a log file, Open Log shows all of it in a
+LogViewer.
+"""
+from __future__ import print_function, division
+
+import os
+import codecs
+
+from Tkinter import Frame, Label, Text, Scrollbar, Menu, END, DISABLED, NORMAL
+import ttk
+
+from LogViewer import LogViewer
+
+
+#----------------------------------------------------------------------------
+class OutputPane(Frame):
+    """ A read-only, auto-scrolling view of one command's output """
+    def __init__(self, parent, title, **kwargs):
+        Frame.__init__(self, parent, **kwargs)
+        self.title = title
+        self.run = None
+        self.offset = 0        # OutputBuffer.since() state
+        self.cut = 0
+        self.firstLine = 0     # OutputBuffer.droppedLines when text line 1 was written
+        self.decoder = None    # decodes the output, keeping a character split between chunks for the next one
+
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.status = Label(self, anchor="w")
+        self.status.grid(row=0, column=0, columnspan=2, sticky="ew")
+
+        self.text = Text(self, wrap="none", height=10, state=DISABLED)
+        self.text.grid(row=1, column=0, sticky="nsew")
+        yscroll = Scrollbar(self, command=self.text.yview)
+        yscroll.grid(row=1, column=1, sticky="ns")
+        xscroll = Scrollbar(self, orient="horizontal", command=self.text.xview)
+        xscroll.grid(row=2, column=0, sticky="ew")
+        self.text.config(yscrollcommand=yscroll.set, xscrollcommand=xscroll.set)
+
+        self.menu = Menu(self.text, tearoff=False, postcommand=self.onPopup)
+        self.menu.add_command(label="Open Log", command=self.openLog)
+        self.menu.add_command(label="Clear", command=self.clear)
+        self.menu.add_command(label="Close", command=self.close)
+        self.text.bind("<Button-3>", func=lambda e: self.menu.post(e.x_root, e.y_root))
+
+    def attach(self, run):
+        """ Start displaying the output of run """
+        self.run = run
+        self.offset = 0
+        self.cut = 0
+        self.firstLine = 0
+        self.decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.clear()
+        self.setStatus("$ " + run.cmdText)
+
+    def onPopup(self):
+        hasLog = self.run is not None and self.run.logPath is not None and os.path.exists(self.run.logPath)
+        self.menu.entryconfig(0, state=NORMAL if hasLog else DISABLED)
+
+    def openLog(self):
+        """ Show all of the run's output, from its log file """
+        if self.run is not None and self.run.logPath is not None:
+            LogViewer(self, self.run.logPath, title="{} - {}".format(self.title, self.run.logPath), run=self.run)
+
+    def setStatus(self, text):
+        self.status.config(text=text)
+
+    def clear(self):
+        self.text.config(state=NORMAL)
+        self.text.delete("1.0", END)
+        self.text.config(state=DISABLED)
+
+    def close(self):
+        self.master.forget(self)
+        self.master.panes.pop(self.master.keyOf(self), None)
+        self.destroy()
+
+    def refresh(self):
+        """ Copy new output from the run's buffer into the text widget """
+        if self.run is None:
+            return
+        data, self.offset, droppedLines, self.cut, reset = self.run.output.since(self.offset, self.cut)
+        if not data and not reset:
+            return
+
+        atBottom = self.text.yview()[1] >= 1.0
+        self.text.config(state=NORMAL)
+        if reset:
+            self.text.delete("1.0", END)
+            self.firstLine = droppedLines
+            self.decoder.reset()  # data doesn't follow what was decoded before
+        self.text.insert(END, self.decoder.decode(data, final=self.run.isDone))
+        excess = droppedLines - self.firstLine
+        if excess > 0:
+            # Keep the widget in step with the buffer, which dropped its oldest lines
+            self.text.delete("1.0", "{}.0".format(excess + 1))
+            self.firstLine = droppedLines
+        self.text.config(state=DISABLED)
+        if atBottom:
+            self.text.see(END)
+
+#----------------------------------------------------------------------------
+class OutputNotebook(ttk.Notebook):
+    """ One OutputPane tab per command, created on demand """
+    def __init__(self, parent, **kwargs):
+        ttk.Notebook.__init__(self, parent, **kwargs)
+        self.panes = {}     # key -> OutputPane
+        self.dirty = set()  # panes with unread output
+
+    def keyOf(self, pane):
+        for key, p in self.panes.items():
+            if p is pane:
+                return key
+        return None
+
+    def paneFor(self, key, title):
+        """ Return the pane for key, creating a tab for it if needed """
+        pane = self.panes.get(key)
+        if pane is None:
+            pane = OutputPane(self, title)
+            self.panes[key] = pane
+            self.add(pane, text=title)
+        elif pane.title != title:
+            pane.title = title
+            self.tab(pane, text=title)
+        return pane
+
+    def show(self, key):
+        """ Bring the pane for key to the front, if there is one """
+        pane = self.panes.get(key)
+        if pane is not None:
+            self.select(pane)
+        return pane is not None
+
+    def markDirty(self, key):
+        pane = self.panes.get(key)
+        if pane is not None:
+            self.dirty.add(pane)
+
+    def flush(self):
+        """ Redraw the panes that have new output """
+        dirty, self.dirty = self.dirty, set()
+        for pane in dirty:
+            if pane.winfo_exists():
+                pane.refresh()
@@ -0,0 +1,152 @@
+#!/usr/bin/python
+#
+#   File: Pipeline.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Dependency-aware execution of commands.
+
+A command entry may list the buttons it depends on in a "depends" field.
+A Pipeline runs a set of target commands together with everything they
+depend on:  each command is submitted to the Executor as soon as all of its
+dependencies have succeeded, so independent branches run in parallel, and
+when a command fails, everything downstream of it is skipped.
+"""
+from __future__ import print_function, division
+
+from Executor import CmdRun
+
+
+#----------------------------------------------------------------------------
+def dependencyGraph(cmds):
+    """ Return {button name: [names of the buttons it depends on]} for a list of cmds.
+        If several cmds have the same button name, the first one is used.
+    """
+    graph = {}
+    for cmd in cmds:
+        if cmd["button"] not in graph:
+            graph[cmd["button"]] = list(cmd.get("depends", []))
+    return graph
+
+def findCycle(graph):
+    """ Return a list of names forming a dependency cycle (first name repeated at the end),
+        or None if the graph is acyclic.
+    """
+    VISITING, DONE = 1, 2
+    marks = {}
+    for start in graph:
+        if start in marks:
+            continue
+        path = [start]
+        stack = [iter(graph[start])]
+        marks[start] = VISITING
+        while stack:
+            for dep in stack[-1]:
+                if dep not in graph:
+                    continue
+                mark = marks.get(dep)
+                if mark == VISITING:
+                    return path[path.index(dep):] + [dep]
+                if mark is None:
+                    marks[dep] = VISITING
+                    path.append(dep)
+                    stack.append(iter(graph[dep]))
+                    break
+            else:
+                marks[path.pop()] = DONE
+                stack.pop()
+    return None
+
+def dependencyClosure(graph, targets):
+    """ Return targets and everything they depend on, ordered so that every name comes after its dependencies """
+    order = []
+    seen = set()
+    for target in targets:
+        if target in seen:
+            continue
+        seen.add(target)
+        stack = [(target, iter(graph.get(target, ())))]
+        while stack:
+            name, deps = stack[-1]
+            for dep in deps:
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append((dep, iter(graph.get(dep, ()))))
+                    break
+            else:
+                order.append(name)
+                stack.pop()
+    return order
+
+#----------------------------------------------------------------------------
+class Pipeline(object):
+    """ Runs targets and their dependencies.
+
+        submit(name) is called when a command is ready to run; it should start
+        it (normally with Executor.submit()) and return the CmdRun, or None if
+        the command can't be run.  onSkip(name) is called for each command that
+        is skipped because a dependency failed.  Pass every executor event to
+        onRunEvent().
+    """
+    WAITING = "waiting"  # for its dependencies
+    SKIPPED = CmdRun.SKIPPED
+
+    def __init__(self, graph, targets, submit, onSkip=None):
+        self.graph  = graph
+        self.nodes  = dependencyClosure(graph, targets)
+        self.state  = dict((name, self.WAITING) for name in self.nodes)
+        self.runs   = {}  # CmdRun -> name
+        self.submit = submit
+        self.onSkip = onSkip
+
+    def start(self):
+        self._submitReady()
+
+    @property
+    def isDone(self):
+        return all(state not in (self.WAITING, CmdRun.PENDING, CmdRun.RUNNING) for state in self.state.values())
+
+    @property
+    def succeeded(self):
+        return all(state == CmdRun.SUCCEEDED for state in self.state.values())
+
+    def onRunEvent(self, event, run, data):
+        name = self.runs.get(run)
+        if name is None:
+            return
+        if event == "start":
+            self.state[name] = CmdRun.RUNNING
+        elif event == "exit":
+            self.state[name] = run.state
+            del self.runs[run]
+            if run.state == CmdRun.SUCCEEDED:
+                self._submitReady()
+            else:
+                self._skipDependents()
+
+    def _submitReady(self):
+        """ Submit every waiting command whose dependencies have all succeeded """
+        for name in self.nodes:
+            if self.state[name] == self.WAITING and \
+               all(self.state.get(dep) == CmdRun.SUCCEEDED for dep in self.graph.get(name, ())):
+                run = self.submit(name)
+                if run is None:
+                    self.state[name] = CmdRun.FAILED
+                    self._skipDependents()
+                else:
+                    self.state[name] = CmdRun.PENDING
+                    self.runs[run] = name
+
+    def _skipDependents(self):
+        """ Skip every waiting command that depends on one that did not succeed """
+        failed = (CmdRun.FAILED, CmdRun.CANCELLED, CmdRun.TIMED_OUT, self.SKIPPED)
+        for name in self.nodes:  # dependencies come first, so one pass propagates all the way down
+            if self.state[name] == self.WAITING and \
+               any(self.state.get(dep) in failed for dep in self.graph.get(name, ())):
+                self.state[name] = self.SKIPPED
+                if self.onSkip:
+                    self.onSkip(name)
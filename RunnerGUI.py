@@ -0,0 +1,1461 @@
+#!/usr/bin/python
+#
+#   File: RunnerGUI.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Sep 20, 2015
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+The Tk GUI for runner.  See runner.py for usage.
+
+The GUI modules are only imported when the GUI is started, so running
+commands headless (runner.py --run) never loads Tk.
+"""
+#----------------------------------------------------------------------------
+from __future__ import print_function, division
+
+import sys
+import time
+import os.path
+import json
+import sqlite3
+import functools
+import tkMessageBox
+import tkFileDialog
+import ttk
+from Tkinter import Tk, Frame, Button, Entry, Label, Menu, Toplevel, PanedWindow, StringVar, END, DISABLED, NORMAL, VERTICAL
+
+from FileMenu import FileMenu
+from CmdFile import readCmdFile, CmdFileError
+from CmdStore import CmdStore, CmdRecord
+from SearchIndex import SearchIndex
+from Executor import Executor, CmdRun
+from Pipeline import Pipeline, dependencyGraph
+from BuildCache import BuildCache
+from History import History
+from CmdBenchmark import CmdBenchmark
+from OutputLog import RunLogs
+from ShellSession import sessionFor
+from ExecutorDaemon import RemoteExecutor, DaemonError
+import ExecutorDaemon
+from Metrics import timed
+import Metrics
+from OutputPane import OutputNotebook
+from VirtualList import VirtualList
+from ToolTipManager import ToolTipManager
+from FileWatcher import FileWatcher
+from AtomicFile import writeIfChanged, BackgroundSaver
+
+
+#----------------------------------------------------------------------------
+class RunnerPopup(Toplevel):
+    def __init__(self, parent, label="Text:", title="Enter Text", initialText=None, width=20, allowCancel=False):
+        """ Create and display the popup """
+        Toplevel.__init__(self, parent)
+        self.transient(parent)
+
+        
+        self.parent = parent
+        self.name = None
+        self.columnconfigure(1, weight=1)
+        
+        self.title(title)
+        Label(self, text=label).grid(row=0, column=0, sticky="e")
+
+        self.entry = Entry(self, width=width)
+        self.entry.grid(row=0, column=1, sticky="we", padx=5)
+        
+        if initialText:
+            self.entry.delete(0, END)
+            self.entry.insert(0, initialText)
+
+        if allowCancel:
+            frame = Frame(self)
+            frame.grid(row=1, column=0, columnspan=2, sticky="we")
+            frame.columnconfigure(0, weight=1)
+            frame.columnconfigure(1, weight=1)
+            button = Button(frame, text=" OK ", command=self.ok)
+            button.grid(row=0, column=0, pady=5, sticky="ew")
+            button = Button(frame, text="Cancel", command=self.cancel)
+            button.grid(row=0, column=1, pady=5, sticky="we")
+        else:
+            button = Button(self, text="OK", command=self.ok)
+            button.grid(row=1, column=0, columnspan=2, pady=5)
+
+        self.entry.bind("<Return>", func=self.ok)
+        self.entry.bind("<Escape>", func=self.cancel)
+
+        px = parent.winfo_rootx()
+        py = parent.winfo_rooty()
+        pw = parent.winfo_width()
+        ph = parent.winfo_height()
+        self.update()
+        ww = self.winfo_width()
+        wh = self.winfo_height()
+        geom = "+%d+%d" % (px+pw//2-ww//2,py+ph//2-wh//2)
+        self.geometry(geom)
+        
+    def ok(self, event=None):
+        """ Retrieve the text input and destroy the window """
+        self.name = self.entry.get()
+        self.destroy()
+    
+    def cancel(self, event=None):
+        """ Destroy the window and set self.name to None """
+        self.name = None
+        self.destroy()
+        
+    def show(self):
+        """ Display the window and get user input.
+            Return the input value, or None if the window is cancelled.
+        """
+        self.entry.focus_set()  # set focus to text area so user can type immediately
+        self.parent.wait_window(self)
+        return self.name
+
+#----------------------------------------------------------------------------
+class RunnerNamePopup(RunnerPopup):
+    def __init__(self, parent, allowCancel=False):
+        RunnerPopup.__init__(self, parent, label="Name:", title="Button Name", allowCancel=allowCancel)
+        
+#----------------------------------------------------------------------------
+class RunnerToolTipPopup(RunnerPopup):
+    def __init__(self, parent, initialText=None):
+        RunnerPopup.__init__(self, parent, label="ToolTip Text:", title="Enter ToolTip", initialText=initialText, width=len(initialText))
+        
+#----------------------------------------------------------------------------
+class RunnerBenchmarkPopup(Toplevel):
+    """ Asks how to benchmark a command:  how many runs or for how long, with how many warm-up
+        runs and how many at a time
+    """
+    FIELDS = [
+        ("count",       "Runs:",                 "10", int),
+        ("duration",    "Or for seconds:",       "",   float),
+        ("warmup",      "Warm-up runs:",         "1",  int),
+        ("concurrency", "Concurrent runs:",      "1",  int),
+    ]
+    
+    def __init__(self, parent, name):
+        Toplevel.__init__(self, parent)
+        self.transient(parent)
+        self.title("Benchmark " + name)
+        self.parent = parent
+        self.options = None
+        self.entries = {}
+        for row, (key, label, default, convert) in enumerate(self.FIELDS):
+            Label(self, text=label).grid(row=row, column=0, sticky="e")
+            entry = Entry(self, width=8)
+            entry.insert(0, default)
+            entry.grid(row=row, column=1, sticky="we", padx=5)
+            entry.bind("<Return>", func=self.ok)
+            entry.bind("<Escape>", func=self.cancel)
+            self.entries[key] = entry
+        
+        frame = Frame(self)
+        frame.grid(row=len(self.FIELDS), column=0, columnspan=2, sticky="we")
+        frame.columnconfigure(0, weight=1)
+        frame.columnconfigure(1, weight=1)
+        Button(frame, text="Run", command=self.ok).grid(row=0, column=0, pady=5, sticky="ew")
+        Button(frame, text="Cancel", command=self.cancel).grid(row=0, column=1, pady=5, sticky="we")
+        
+    def ok(self, event=None):
+        options = {}
+        for key, label, default, convert in self.FIELDS:
+            text = self.entries[key].get().strip()
+            try:
+                options[key] = convert(text) if text else 0
+            except ValueError:
+                options[key] = -1
+            if options[key] < 0:
+                tkMessageBox.showerror("Benchmark", "{} must be a number, 0 or more".format(label.rstrip(":")), parent=self)
+                return
+        if options["duration"] > 0:
+            options["count"] = 0
+        self.options = options
+        self.destroy()
+    
+    def cancel(self, event=None):
+        self.options = None
+        self.destroy()
+        
+    def show(self):
+        """ Return a dict of CmdBenchmark arguments, or None if the window is cancelled """
+        self.entries["count"].focus_set()
+        self.parent.wait_window(self)
+        return self.options
+
+#----------------------------------------------------------------------------
+class BenchmarkWindow(Toplevel):
+    """ Shows the progress and results of a CmdBenchmark """
+    REFRESH_MS = 250
+    
+    def __init__(self, parent, benchmark):
+        Toplevel.__init__(self, parent)
+        self.title("Benchmark " + benchmark.name)
+        self.benchmark = benchmark
+        self.stopCB = None  # stopCB(window) stops the benchmark's runs
+        self.text = Label(self, font="TkFixedFont", justify="left", anchor="nw")
+        self.text.grid(row=0, column=0, columnspan=3, sticky="nsew", padx=5, pady=5)
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self.stopButton = Button(self, text="Stop", command=self.stop)
+        self.stopButton.grid(row=1, column=0, pady=5, sticky="ew")
+        Button(self, text="Export...", command=self.export).grid(row=1, column=1, pady=5, sticky="ew")
+        Button(self, text="Close", command=self.close).grid(row=1, column=2, pady=5, sticky="ew")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+    
+    def refresh(self):
+        """ Redraw the results; reschedules itself until the benchmark is done """
+        if not self.winfo_exists():
+            return  # closed
+        done = self.benchmark.isDone
+        status = "done" if done else "running... ({} started)".format(self.benchmark.started)
+        self.text.config(text="$ {}\n{}\n\n{}".format(self.benchmark.cmdText, status, self.benchmark.describe()))
+        if done:
+            self.stopButton.config(state=DISABLED)
+        else:
+            self.after(self.REFRESH_MS, self.refresh)
+    
+    def stop(self):
+        if self.stopCB:
+            self.stopCB(self)
+    
+    def export(self):
+        path = tkFileDialog.asksaveasfilename(parent=self, title="Export Benchmark", defaultextension=".json",
+                                              filetypes=[("JSON", "*.json"), ("CSV", "*.csv")])
+        if not path:
+            return
+        try:
+            self.benchmark.export(path)
+        except (IOError, OSError) as e:
+            tkMessageBox.showerror("Export Benchmark", "Can't write {}:\n\n{}".format(path, e), parent=self)
+    
+    def close(self):
+        self.stop()
+        self.destroy()
+
+#----------------------------------------------------------------------------
+class RunnerFileMenu(FileMenu):
+    def __init__(self, menubar, **kwargs):
+        FileMenu.__init__(self, menubar, **kwargs)
+        self.insert_command(2, label="Open in New Tab...", command=self.onOpenTab)
+        self.insert_command(3, label="Close Tab", command=self.onCloseTab)
+        self.onModifiedCB = None
+        self.onFileOpenCB = None
+        self.onRevertCB   = None
+        self.saveToFileCB = None
+        self.onExitCB     = None
+        self.onOpenTabCB  = None  # onOpenTabCB(path) opens path in a new tab
+        self.onCloseTabCB = None
+        
+    def onOpenTab(self):
+        path = tkFileDialog.askopenfilename(filetypes=self.fileTypes, defaultextension=self.defaultExt)
+        if path and self.onOpenTabCB:
+            self.onOpenTabCB(path)
+    
+    def onCloseTab(self):
+        if self.onCloseTabCB:
+            self.onCloseTabCB()
+        
+    def onFileOpen(self, path=None):
+        """ Calls FileMenu.onFileOpen() to:
+                Save a modified file if needed.
+                Get a pathname if None was specified.
+                Return True if successful or False if the operation was cancelled.
+            Then, if FileMenu.onFileOpen() was not cancelled, self.onFileOpenCB()
+            is called with the new path and the return value of self.onFileOpenCB()
+            is returned.  Otherwise, True is returned.
+            If FileMenu.onFileOpen() was cancelled, False is returned.
+        """
+        if FileMenu.onFileOpen(self, path):
+            if self.onFileOpenCB:
+                return self.onFileOpenCB(path)
+            else:
+                return True
+        return False
+    
+    def onRevert(self):
+        if self.onRevertCB:
+            return self.onRevertCB()
+        else:
+            return False
+    
+    def saveToFile(self, path):
+        if self.saveToFileCB:
+            return self.saveToFileCB(path)
+        else:
+            return False
+    
+    def onModifiedChange(self):
+        if self.onModifiedCB:
+            self.onModifiedCB(self.isModified)
+    
+    def onExit(self):
+        if FileMenu.onExit(self):
+            if self.onExitCB:
+                self.onExitCB()
+
+#----------------------------------------------------------------------------
+class CmdWidget(CmdRecord):
+    """ A CmdRecord with the state the GUI needs to display and run it.
+    
+        The Tk widgets that display a CmdWidget belong to a CmdRow, and only
+        exist while the entry is scrolled into view.  self.row is that CmdRow,
+        or None if the entry is not visible.
+    """
+    __slots__ = ("row", "run", "selected")
+    
+    executeCB     = None  # executeCB(widget, cmdText, force) starts a run; always set by RunnerApp
+    executeDepsCB = None
+    showOutputCB  = None
+    stopCB        = None
+    benchmarkCB   = None  # benchmarkCB(widget, options) runs the command repeatedly (see CmdBenchmark)
+    timingsCB     = None  # timingsCB(widget) returns a description of recent run times, or None
+    
+    def __init__(self, cmd, added=False):
+        CmdRecord.__init__(self, cmd, added)
+        self.row = None
+        self.run = None     # the most recent CmdRun
+        self.selected = False
+    
+    def redraw(self):
+        """ Update the row displaying this entry, if it is visible """
+        if self.row is not None:
+            self.row.show(self)
+    
+    def toggleSelected(self):
+        """ Add or remove this widget from the "Run Selected" set """
+        self.setSelected(not self.selected)
+    
+    def setSelected(self, selected):
+        self.selected = selected
+        self.redraw()
+        
+    def rename(self, parent):
+        """ Change the button text """
+        name = RunnerNamePopup(parent.winfo_toplevel(), allowCancel=True).show()
+        if name:
+            self.setButton(name)
+        
+    def editToolTip(self, parent):
+        tooltip = RunnerToolTipPopup(parent.winfo_toplevel(), initialText=self.tooltipValue).show()
+        if tooltip is not None:
+            self.setTooltip(tooltip)
+        
+    def updateButton(self):
+        """ Call this to update the modified state of the button and the app """
+        self.update()
+        
+    @property
+    def label(self):
+        """ The button text, with a "*" if the entry is modified """
+        return self.buttonValue + ("*" if self.dirty else "")
+        
+    def execute(self, force=False):
+        """ Start the command without blocking the GUI.  Progress is reported through showState().
+            If force is True, run it even if its outputs are up to date (see BuildCache).
+        """
+        if self.disabled:
+            return
+        run = self.executeCB(self, self.cmdValue, force)
+        if run is not None:  # None if the click was dropped
+            self.run = run
+            self.showState()
+    
+    def executeWithDeps(self):
+        """ Start the command after the commands it depends on (see Pipeline) """
+        if self.disabled:
+            return
+        if self.executeDepsCB:
+            self.executeDepsCB(self)
+        else:
+            self.execute()
+    
+    def stop(self):
+        """ Cancel the command if it is queued or running """
+        if self.stopCB:
+            self.stopCB(self)
+    
+    def benchmark(self, parent):
+        """ Ask how to benchmark the command, then run it repeatedly and show its timings """
+        if self.disabled or not self.benchmarkCB:
+            return
+        options = RunnerBenchmarkPopup(parent.winfo_toplevel(), self.buttonValue).show()
+        if options is not None:
+            self.benchmarkCB(self, options)
+    
+    @property
+    def isRunning(self):
+        return self.run is not None and not self.run.isDone
+    
+    @property
+    def timings(self):
+        return self.timingsCB(self) if self.timingsCB else None
+    
+    def showOutput(self):
+        if self.showOutputCB:
+            self.showOutputCB(self)
+    
+    def showState(self):
+        """ Redraw the button to reflect the state of the most recent run """
+        self.redraw()
+        
+#----------------------------------------------------------------------------
+class CmdRow(object):
+    """ The Tk widgets for one visible line of the command list:  a Button and an Entry.
+    
+        Rows are reused as the list scrolls, so show() may be called with a
+        different CmdWidget at any time.  Event handling is done with class
+        bindings on the "CmdRow" bindtag, and the right-click menu and the
+        tooltips are shared by all rows, so a row costs only its two widgets.
+    """
+    menu     = None  # the shared CmdMenu
+    toolTips = None  # the shared ToolTipManager
+    
+    # Button colors for each CmdRun state
+    STATE_COLORS = {
+        CmdRun.PENDING:   "light yellow",
+        CmdRun.RUNNING:   "yellow",
+        CmdRun.SUCCEEDED: "pale green",
+        CmdRun.FAILED:    "salmon",
+        CmdRun.CANCELLED: "light gray",
+        CmdRun.SKIPPED:   "gray75",
+        CmdRun.TIMED_OUT: "orange",
+    }
+    SELECTED_COLOR = "light blue"
+    CONFLICT_COLOR = "red"
+    
+    def __init__(self, parent, row, cmdWidth=80):
+        self.parent = parent
+        self.widget = None  # the CmdWidget being displayed
+        
+        # Every change to the text, typed, pasted or inserted, goes through cmdVar to the CmdWidget
+        self.cmdVar = StringVar(parent)
+        self.cmdVar.trace("w", self.onEdit)
+        self.cmdText = Entry(parent, width=cmdWidth, textvariable=self.cmdVar)
+        self.cmdText.grid(row=row, column=1, sticky="ew", ipady=2)
+        self.cmdText.row = self
+        self.normalEntryBg = self.cmdText.cget("bg")
+
+        self.button = Button(parent, command=self.execute)
+        self.button.grid(row=row, column=0, sticky="ew", padx=2, pady=2)
+        self.button.row = self
+        self.normalBg = self.button.cget("bg")
+        self.normalActiveBg = self.button.cget("activebackground")
+        self.normalFg = self.button.cget("fg")
+        self.widgets = [self.button, self.cmdText]
+
+        if not parent.bind_class("CmdRow"):
+            # First row in this Tk instance:  create the class bindings
+            parent.bind_class("CmdRow", "<Button-3>", CmdRow.onPopup)
+            parent.bind_class("CmdRow", "<Control-Button-1>", CmdRow.onToggleSelected)
+            
+        for w in self.widgets:
+            # "CmdRow" goes before the widget class tag, so Ctrl-click can "break" before the button fires
+            bindtags = list(w.bindtags())
+            bindtags.insert(1, "CmdRow")
+            w.bindtags(tuple(bindtags))
+            if self.toolTips:
+                self.toolTips.attach(w)
+    
+    @staticmethod
+    def onPopup(event):
+        """ Display the shared popup menu (right-mouse menu) for the clicked row """
+        row = event.widget.row
+        if row.widget is not None and row.menu:
+            row.menu.popup(row.widget, event)
+            
+    @staticmethod
+    def onToggleSelected(event):
+        """ Ctrl-click adds or removes the row's CmdWidget from the "Run Selected" set """
+        row = event.widget.row
+        if row.widget is not None:
+            row.widget.toggleSelected()
+        return "break"  # don't let Ctrl-click also press the button
+    
+    def onEdit(self, *args):
+        """ Copy the edited Entry text into the CmdWidget """
+        text = self.cmdVar.get()
+        if self.widget is not None and text != self.widget.cmdValue:
+            self.widget.setCmdValue(text)
+    
+    def show(self, widget):
+        """ Display widget in this row """
+        if self.widget is not widget:
+            if self.widget is not None and self.widget.row is self:
+                self.widget.row = None
+            self.widget = widget
+            widget.row = self
+            self.button.grid()
+            self.cmdText.grid()
+        
+        state = DISABLED if widget.disabled else NORMAL
+        if self.cmdVar.get() != widget.cmdValue:
+            self.cmdVar.set(widget.cmdValue)  # onEdit() sees it's unchanged
+        self.cmdText.config(state=state, bg=self.SELECTED_COLOR if widget.selected else self.normalEntryBg)
+        
+        if widget.run is None:
+            bg, activeBg = self.normalBg, self.normalActiveBg
+        else:
+            bg = activeBg = self.STATE_COLORS[widget.run.state]
+        self.button.config(text=widget.label, state=state, bg=bg, activebackground=activeBg,
+                           fg=self.CONFLICT_COLOR if widget.conflict else self.normalFg)
+    
+    def hide(self):
+        """ Remove the row from the display when there is no CmdWidget to show in it """
+        if self.widget is not None and self.widget.row is self:
+            self.widget.row = None
+        self.widget = None
+        self.button.grid_remove()
+        self.cmdText.grid_remove()
+    
+    @staticmethod
+    def toolTipFor(w):
+        """ ToolTipManager callback:  the tooltip text for a row's Button or Entry """
+        widget = w.row.widget
+        if widget is None:
+            return None
+        text = widget.tooltipValue
+        timings = widget.timings
+        if timings:
+            text = text + "\n\n" + timings if text else timings
+        if widget.conflict == CmdWidget.CHANGED_ON_DISK:
+            return "Changed on disk.  Revert to load the new version, or Save to keep your edits.\n\n" + text
+        if widget.conflict == CmdWidget.REMOVED_ON_DISK:
+            return "Removed on disk.  Save to keep this entry.\n\n" + text
+        return text
+        
+    def execute(self):
+        if self.widget is not None:
+            self.widget.execute()
+        
+#----------------------------------------------------------------------------
+class CmdMenu(Menu):
+    """ The right-click menu shared by all CmdRows.  It acts on the CmdWidget passed to popup(). """
+    def __init__(self, parent):
+        Menu.__init__(self, parent, tearoff=False, postcommand=self.onPopup)
+        self.widget = None
+        self.add_command(label="Delete", command=lambda: self.widget.delete())
+        self.add_command(label="Revert", command=lambda: self.widget.revert())
+        self.add_command(label="Rename", command=lambda: self.widget.rename(self.master))
+        self.add_command(label="Edit ToolTip", command=lambda: self.widget.editToolTip(self.master))
+        self.add_command(label="Select", command=lambda: self.widget.toggleSelected())
+        self.add_command(label="Show Output", command=lambda: self.widget.showOutput())
+        self.add_command(label="Run with Dependencies", command=lambda: self.widget.executeWithDeps())
+        self.add_command(label="Force Run", command=lambda: self.widget.execute(force=True))
+        self.add_command(label="Stop", command=lambda: self.widget.stop())
+        self.add_command(label="Benchmark...", command=lambda: self.widget.benchmark(self.master))
+        
+    def onPopup(self):
+        self.entryconfig(0, label="Undelete" if self.widget.disabled else "Delete")
+        self.entryconfig(4, label="Deselect" if self.widget.selected else "Select")
+        self.entryconfig(5, state=NORMAL if self.widget.run else DISABLED)
+        self.entryconfig(6, state=DISABLED if self.widget.disabled else NORMAL)
+        self.entryconfig(7, state=NORMAL if self.widget.cmd.get("inputs") and not self.widget.disabled else DISABLED)
+        self.entryconfig(8, state=NORMAL if self.widget.isRunning else DISABLED)
+        self.entryconfig(9, state=DISABLED if self.widget.disabled else NORMAL)
+        
+    def popup(self, widget, event):
+        """ Display the menu for widget """
+        self.widget = widget
+        self.post(event.x_root, event.y_root)
+        
+#----------------------------------------------------------------------------
+class CmdTab(object):
+    """ One command file open in the workspace:  its commands, edits and saved state.
+    
+        RunnerApp builds a tab's command list and file watcher the first time
+        the tab is shown, and drops them, along with the commands, once the tab
+        has not been shown for a while (see RunnerApp.unloadIdleTabs()).
+    """
+    def __init__(self, cmdFile=None, title=None, cmdWidth=0, maxParallel=0):
+        self.cmdFile     = cmdFile
+        self.title       = title
+        self.cmdWidth    = cmdWidth
+        self.maxParallel = maxParallel
+        self.include     = []     # the file's "include" field, written back when it is saved
+        self.sessions    = {}     # the file's "sessions" field, likewise
+        self.store       = CmdStore(CmdWidget)
+        self.search      = SearchIndex(self.store)
+        self.filterText  = ""
+        self.page        = None   # the workspace notebook page
+        self.cmdList     = None   # the VirtualList, while the tab is loaded
+        self.watcher     = None
+        self.buildCache  = None
+        self.history     = None
+        self.pendingCmds = []     # cmds still to be added by a progressive load (see RunnerApp.loadCmds())
+        self.modified    = False  # the file menu's modified flag for this tab
+        self.changedOnDisk = False  # the file changed while the tab was not shown
+        self.lastShown   = time.time()
+        
+    @property
+    def isLoaded(self):
+        return self.cmdList is not None
+    
+    @property
+    def name(self):
+        return os.path.basename(self.cmdFile) if self.cmdFile else "Untitled"
+    
+    @property
+    def isBusy(self):
+        return any(w.isRunning for w in self.store)
+    
+    def isFile(self, path):
+        return self.cmdFile is not None and os.path.abspath(self.cmdFile) == os.path.abspath(path)
+    
+    def getBuildCache(self):
+        """ Return the BuildCache for the tab's command file """
+        if self.buildCache is None or self.buildCache.cmdFile != self.cmdFile:
+            self.buildCache = BuildCache.forCmdFile(self.cmdFile)
+        return self.buildCache
+    
+    def getHistory(self):
+        """ Return the History for the tab's command file, or None if it can't be opened """
+        path = self.cmdFile + History.SUFFIX if self.cmdFile else None
+        if self.history is not None and self.history.path != path:
+            self.history.close()
+            self.history = None
+        if self.history is None and path:
+            try:
+                self.history = History(path)
+            except sqlite3.Error:
+                pass
+        return self.history
+    
+    def clear(self):
+        """ Drop the commands, e.g. when the tab is unloaded """
+        self.pendingCmds = []
+        self.store.load([])
+        self.store.unsubscribe(self.search.onStoreChange)
+        self.search = SearchIndex(self.store)
+    
+    def close(self):
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+
+def tabProperty(name):
+    """ A RunnerApp attribute that belongs to the current CmdTab """
+    return property(lambda self: getattr(self.tab, name),
+                    lambda self, value: setattr(self.tab, name, value))
+
+#----------------------------------------------------------------------------
+class RunnerApp(object):
+    """ A simple GUI for running a canned set of commands on demand.
+    
+        The commands are loaded from a file in JSON format.  The file
+        contains an array of objects containing a "button" field, a "cmd"
+        field, and an optional "tooltip" field, as in the following example:
+        
+        [
+           {
+              "button" : "Backup Database",
+              "cmd"    : "pgdump > db_backup.sql",
+              "tooltip": "Dump the database contents to a SQL file"
+           },
+           {
+              "button" : "Restore Database",
+              "cmd"    : "psql -U admin < db_backup.sql",
+              "tooltip": "Restore the database contents from an SQL file"
+           }
+        ]
+    """
+    DEFAULT_CMD_WIDTH = 80
+    POLL_MS = 25  # how often to check the executor for run events and redraw output
+    OUTPUT_HEIGHT = 200
+    BACKGROUND_SAVE_SIZE = 1000  # files with at least this many commands are saved in the background
+    BENCHMARK_OUTPUT_LINES = 20  # output kept for each benchmark run, which nobody sees
+    LOAD_CHUNK = 2000  # with progressive loading, entries added per idle callback
+    UNLOAD_SECONDS = 600  # tabs not shown for this long are unloaded
+    UNLOAD_CHECK_MS = 60 * 1000
+    
+    # The state of the command file being displayed belongs to the current tab
+    store       = tabProperty("store")
+    search      = tabProperty("search")
+    filterText  = tabProperty("filterText")
+    cmdList     = tabProperty("cmdList")
+    cmdFile     = tabProperty("cmdFile")
+    title       = tabProperty("title")
+    cmdWidth    = tabProperty("cmdWidth")
+    maxParallel = tabProperty("maxParallel")
+    watcher     = tabProperty("watcher")
+    buildCache  = tabProperty("buildCache")
+    history     = tabProperty("history")
+    pendingCmds = tabProperty("pendingCmds")
+    
+    def __init__(self):
+        self.args     = None
+        self.programTitle = None
+        self.root     = None
+        self.fileMenu = None
+        self.notebook = None
+        self.tabs     = []    # CmdTabs, in notebook order
+        self.tab      = None  # the tab being displayed
+        self.tab      = self.addTab(None)
+        self.filterVar = None
+        self.executor = Executor()
+        self.saver    = BackgroundSaver()
+        self.paned    = None
+        self.outputs  = None
+        self.pipelines = []  # Pipelines that are still running
+        self.benchmarks = []  # BenchmarkWindows whose benchmarks are still running
+        self.snapshots = {}  # CmdRun -> (BuildCache, Snapshot), recorded if the run succeeds
+        self.indexing = set()  # SearchIndexes being built from idle callbacks (see indexSearch())
+        
+    @property
+    def widgets(self):
+        """ The CmdWidgets, in display order """
+        return self.store.records
+    
+    @property
+    def isModified(self):
+        return self.fileMenu.isModified
+    
+    @isModified.setter
+    def isModified(self, value):
+        self.fileMenu.setModified(value)
+    
+    def applyArgs(self, args):
+        """ Take settings from the parsed command line (see runner.parseCmdLine()) """
+        self.args = args
+        if self.args.cmdWidth >= 0:
+            self.cmdWidth = self.args.cmdWidth
+        if self.args.maxParallel >= 0:
+            self.maxParallel = self.args.maxParallel
+        self.executor.logs = None if self.args.noLogs else RunLogs(self.args.logDir)
+        if self.args.daemon:
+            try:
+                self.executor = ExecutorDaemon.connect(self.args.socket, start=True,
+                                                       maxParallel=self.args.maxParallel)
+            except DaemonError as e:
+                print("runner: {}; running commands in this process".format(e), file=sys.stderr)
+            else:
+                warning = ExecutorDaemon.jobsWarning(self.executor, self.args.maxParallel)
+                if warning:
+                    print("runner: " + warning, file=sys.stderr)
+        
+        self.programTitle = os.path.splitext(os.path.basename(sys.argv[0]))[0].capitalize()
+        self.title = self.programTitle
+
+    def addTab(self, cmdFile):
+        """ Add a tab for cmdFile (or for a new file if None) without showing or loading it """
+        tab = CmdTab(cmdFile, self.programTitle,
+                     cmdWidth=max(self.args.cmdWidth, 0) if self.args else 0,
+                     maxParallel=max(self.args.maxParallel, 0) if self.args else 0)
+        tab.store.subscribe(self.onStoreChange)
+        self.tabs.append(tab)
+        if self.notebook is not None:
+            self.addPage(tab)
+        return tab
+    
+    def addPage(self, tab):
+        """ Add an (empty) notebook page for tab; its contents are built when it is shown """
+        tab.page = Frame(self.notebook)
+        self.notebook.add(tab.page, text=tab.name)
+    
+    def openTab(self, path, show=True):
+        """ Return the tab for the command file at path, adding one if it isn't open yet """
+        for tab in self.tabs:
+            if tab.isFile(path):
+                break
+        else:
+            tab = self.addTab(path)
+        if show:
+            self.showTab(tab)
+        return tab
+    
+    def tabOf(self, widget):
+        """ The tab a CmdWidget belongs to, or None if its tab was closed or unloaded """
+        for tab in self.tabs:
+            if tab.store is widget.store:
+                return tab
+        return None
+    
+    def buildTab(self, tab):
+        """ Create the command list and file watcher of tab's page """
+        tab.cmdList = VirtualList(tab.page, functools.partial(self.makeRow, tab=tab), self.bindRow)
+        tab.cmdList.body.grid_columnconfigure(1, weight=1)
+        tab.cmdList.pack(fill="both", expand=True)
+        tab.watcher = FileWatcher(self.root, functools.partial(self.onFileChanged, tab))
+    
+    def showTab(self, tab):
+        """ Display tab, building and loading it if it isn't loaded """
+        if tab is self.tab and tab.isLoaded:
+            return
+        self.tab.lastShown = time.time()
+        self.tab = tab
+        load = not tab.isLoaded
+        if load:
+            self.buildTab(tab)
+        if self.notebook.select() != str(tab.page):
+            self.notebook.select(tab.page)  # calls back here, but tab is already current and built
+        self.fileMenu.currFile = tab.cmdFile
+        self.fileMenu.setModified(tab.modified)
+        self.filterVar.set(tab.filterText)
+        if load:
+            try:
+                self.loadCmds(progressive=True)
+            except (IOError, ValueError) as e:
+                self.showCmdFileError(e)
+        elif tab.changedOnDisk:
+            self.onFileChanged(tab)
+        self.executor.maxParallel = self.maxParallel
+        self.setTitle()
+    
+    def onTabChanged(self, event):
+        """ <<NotebookTabChanged>> handler """
+        selected = self.notebook.select()
+        for tab in self.tabs:
+            if str(tab.page) == selected:
+                self.showTab(tab)
+                break
+    
+    def updateTabLabel(self, tab):
+        if tab.page is not None:
+            self.notebook.tab(tab.page, text=tab.name + (" *" if tab.modified else ""))
+    
+    def unloadTab(self, tab):
+        """ Drop tab's command list and commands; they are reloaded when it is shown again """
+        tab.watcher.stop()
+        tab.watcher = None
+        tab.cmdList.destroy()
+        tab.cmdList = None
+        tab.clear()
+        tab.close()
+    
+    def unloadIdleTabs(self):
+        """ Unload the unmodified, idle tabs that have not been shown for UNLOAD_SECONDS.
+            Reschedules itself on the Tk mainloop.
+        """
+        now = time.time()
+        for tab in self.tabs:
+            if tab is not self.tab and tab.isLoaded and not tab.modified and not tab.isBusy and \
+               not self.pipelines and now - tab.lastShown > self.UNLOAD_SECONDS:
+                self.unloadTab(tab)
+        self.root.after(self.UNLOAD_CHECK_MS, self.unloadIdleTabs)
+    
+    def onCloseTab(self):
+        """ Close the current tab, after asking to save it if it is modified.  The last tab can't be closed. """
+        if len(self.tabs) < 2:
+            return
+        if self.isModified and not self.fileMenu.askSave():
+            return
+        tab = self.tab
+        index = self.tabs.index(tab)
+        self.tabs.remove(tab)
+        if tab.isLoaded:
+            self.unloadTab(tab)
+        tab.close()
+        self.notebook.forget(tab.page)
+        tab.page.destroy()
+        self.showTab(self.tabs[min(index, len(self.tabs) - 1)])
+
+    def onFileOpen(self, path=None):
+        """ Called by the fileMenu.onFileOpen method """
+        if path:
+            self.fileMenu.currFile = path
+        if self.fileMenu.currFile and os.path.exists(self.fileMenu.currFile):
+            self.cmdFile = self.fileMenu.currFile
+            self.updateTabLabel(self.tab)
+            # Settings not given on the command line come from the new file
+            self.cmdWidth = max(self.args.cmdWidth, 0)
+            self.maxParallel = max(self.args.maxParallel, 0)
+            try:
+                self.loadCmds()
+            except (IOError, ValueError) as e:  # e.g. unreadable, or not a command file
+                self.showCmdFileError(e)
+        return True
+    
+    @timed("runner_load_cmds_seconds", "Time to load the command file into the GUI")
+    def loadCmds(self, keepEdits=False, progressive=False):
+        """ Read self.cmdFile and make the command list match it.
+            When a file is already loaded, the existing CmdWidgets are reused for
+            entries that are still present, so only the entries that changed are
+            created, updated or removed.
+            If keepEdits is True, unsaved edits are kept (see CmdStore.load()).
+            If progressive is True and nothing is loaded yet, only the first
+            LOAD_CHUNK entries are loaded now, and the rest are added from
+            idle callbacks, so the first screenful appears right away.
+        """
+        self.pendingCmds = []  # not in the store yet, so they have no edits to keep
+        cmds = []
+        if self.cmdFile and os.path.exists(self.cmdFile):
+            self.watcher.watch(self.cmdFile)  # first, so a file with errors is reloaded once it's fixed
+            cmds = self.readCmds()
+        if progressive and self.root is not None and not len(self.store) and len(cmds) > self.LOAD_CHUNK:
+            self.pendingCmds = cmds[self.LOAD_CHUNK:]
+            cmds = cmds[:self.LOAD_CHUNK]
+            self.root.after_idle(self.loadMore, self.tab)
+        self.store.load(cmds, keepEdits)
+        
+        for row in self.cmdList.rows:
+            row.cmdText.config(width=self.cmdWidth or self.DEFAULT_CMD_WIDTH)
+        self.applyFilter(keepScroll=keepEdits)
+        self.executor.maxParallel = self.maxParallel
+        self.isModified = self.store.isModified
+        self.setTitle()
+        if not keepEdits:
+            self.adoptRuns()
+    
+    def adoptRuns(self):
+        """ With the executor daemon, follow the runs of this file's commands that are
+            still going, e.g. ones started before this window was opened
+        """
+        if not isinstance(self.executor, RemoteExecutor) or not self.cmdFile:
+            return
+        group = os.path.abspath(self.cmdFile)
+        try:
+            runs = self.executor.status()
+        except DaemonError:
+            return
+        followed = set(run.remoteId for run in list(self.executor.remote.values()))
+        for info in runs:
+            if info["group"] != group or info["run"] in followed or \
+               info["state"] not in (CmdRun.PENDING, CmdRun.RUNNING):
+                continue
+            self.finishLoading()
+            widget = self.store.find(info["name"])
+            if widget is None or widget.isRunning:
+                continue
+            run = self.executor.attach(info["run"], owner=widget)
+            if run is not None:
+                widget.run = run
+                widget.showState()
+    
+    def loadMore(self, tab):
+        """ Add the next chunk of tab's progressive load, and schedule the one after it """
+        if not tab.pendingCmds:
+            return
+        cmds, tab.pendingCmds = tab.pendingCmds[:self.LOAD_CHUNK], tab.pendingCmds[self.LOAD_CHUNK:]
+        for cmd in cmds:
+            tab.store.add(cmd)
+        if tab is self.tab:
+            self.applyFilter(keepScroll=True)  # other tabs are filtered when shown
+        if tab.pendingCmds:
+            self.root.after_idle(self.loadMore, tab)
+    
+    def indexSearch(self, tab):
+        """ Build tab's search index a chunk at a time from idle callbacks, unless that's under way.
+            Until it's built, the filter checks every entry.
+        """
+        search = tab.search
+        if search.built or search in self.indexing:
+            return
+        self.indexing.add(search)
+        self.root.after_idle(self.indexMore, tab, search)
+    
+    def indexMore(self, tab, search):
+        """ Index the next chunk of tab's search index, and schedule the one after it """
+        if tab.search is not search or search.buildSome():
+            self.indexing.discard(search)  # done, or dropped when the tab was unloaded
+        else:
+            self.root.after_idle(self.indexMore, tab, search)
+    
+    def finishLoading(self):
+        """ Add whatever a progressive load has not added yet.  Call this before
+            anything that needs every entry, e.g. saving.
+        """
+        if self.pendingCmds:
+            cmds, self.pendingCmds = self.pendingCmds, []
+            for cmd in cmds:
+                self.store.add(cmd)
+            self.applyFilter(keepScroll=True)
+    
+    def onFileChanged(self, tab):
+        """ Called by tab's FileWatcher when its command file changes on disk.
+            A tab that isn't displayed is reloaded when it is shown.
+        """
+        if tab is not self.tab:
+            tab.changedOnDisk = True
+            return
+        tab.changedOnDisk = False
+        if not os.path.exists(self.cmdFile):
+            return
+        try:
+            self.loadCmds(keepEdits=True)
+        except (CmdFileError, EnvironmentError) as e:  # e.g. removed or made unreadable since the check
+            self.showCmdFileError(e)
+        except ValueError:
+            pass  # not valid JSON (yet); the next change will be picked up
+    
+    def showCmdFileError(self, error):
+        tkMessageBox.showerror("Runner", "Can't load {}:\n\n{}".format(self.cmdFile, error))
+    
+    def readCmds(self):
+        cmdFile = readCmdFile(self.cmdFile)
+        self.title = cmdFile.title
+        self.tab.include = cmdFile.include
+        self.tab.sessions = cmdFile.sessions
+        if self.notebook is not None:
+            for path in cmdFile.includePaths():
+                self.openTab(path, show=False)
+        if cmdFile.width and self.cmdWidth <= 0:
+            self.cmdWidth = cmdFile.width
+        if cmdFile.maxParallel and self.maxParallel <= 0:
+            self.maxParallel = cmdFile.maxParallel
+        return cmdFile.cmds
+
+    
+#     def makeCmdButton(self, parent, cmd, row):
+#         cmdText = Entry(parent, width=self.cmdWidth)
+#         cmdText.grid(row=row, column=1, sticky="ew", ipady=2)
+#         cmdText.delete(0, END)
+#         cmdText.insert(0, cmd["cmd"])
+# 
+#         button = Button(parent, text=cmd["button"], command=lambda: self.execute(cmd["button"], cmdText))
+#         button.grid(row=row, column=0, sticky="ew", padx=2, pady=2)
+#         
+#         if "tooltip" in cmd:
+#             ToolTip(button, cmd["tooltip"])
+#             ToolTip(cmdText, cmd["tooltip"])
+        
+    def setTitle(self):
+        self.root.title("{}: {}{}".format(self.title, os.path.basename(self.cmdFile), " *" if self.isModified else ""))
+    
+    def onModified(self, isModified):
+        self.tab.modified = isModified
+        self.updateTabLabel(self.tab)
+        self.setTitle()
+    
+    def onRevert(self):
+        self.finishLoading()
+        for w in self.widgets:
+            if w.added:
+                w.delete()
+            else:
+                w.revert()
+        self.isModified = False
+        return True
+    
+    @timed("runner_store_change_seconds", "Time the GUI takes to react to a change to an entry, e.g. a keystroke")
+    def onStoreChange(self, event, widget):
+        """ CmdStore listener """
+        if widget is not None and widget.store is not self.store:
+            return  # another tab's; only the displayed tab is edited
+        if event == CmdStore.MODIFIED:
+            self.isModified = self.store.isModified
+        elif event == CmdStore.CHANGED:
+            widget.redraw()
+        
+    def addMenuBar(self):
+        """ Attaches a Menu to the root window """
+        menubar = Menu(self.root)
+        self.root.config(menu=menubar)
+        
+        self.fileMenu = RunnerFileMenu(menubar, tearoff=False)
+        menubar.add_cascade(label="File", menu=self.fileMenu)
+        self.fileMenu.onModifiedCB = self.onModified
+        self.fileMenu.onRevertCB   = self.onRevert
+        self.fileMenu.onFileOpenCB = lambda f: self.onFileOpen(f)
+        self.fileMenu.saveToFileCB = self.saveToFile
+        self.fileMenu.onExitCB     = self.onExit
+        self.fileMenu.onOpenTabCB  = self.openTab
+        self.fileMenu.onCloseTabCB = self.onCloseTab
+        self.fileMenu.currFile = self.args.commandFile
+        
+        editMenu = Menu(menubar, tearoff=False)
+#         editMenu.add_command(label="Preferences...", command=self.onEditPreferences)
+        menubar.add_cascade(label="Edit", menu=editMenu)
+        
+        actionMenu = Menu(menubar, tearoff=False)
+        actionMenu.add_command(label="Add Button", command=self.onAddButton)
+        actionMenu.add_separator()
+        actionMenu.add_command(label="Run Selected", command=self.onRunSelected, accelerator="Ctrl+R")
+        actionMenu.add_command(label="Clear Selection", command=self.onClearSelection)
+        actionMenu.add_separator()
+        actionMenu.add_command(label="Save Metrics...", command=self.onSaveMetrics)
+        menubar.add_cascade(label="Actions", menu=actionMenu)
+        
+        menubar.add_command(label=" + ", command=self.onAddButton, foreground="red")
+    
+    def onAddButton(self):
+        name = RunnerNamePopup(self.root).show()
+        if name is None:
+            return
+        
+        cmd = {
+            "button":  name,
+            "cmd":     "",
+            "tooltip": name
+        }
+
+#         self.makeCmdButton(self.root, cmd, self.row)
+#         self.row += 1
+        if self.filterText:
+            self.filterVar.set("")  # make sure the new entry is shown
+        self.store.add(cmd, added=True)
+        self.cmdList.refresh()
+        self.cmdList.see(len(self.widgets) - 1)
+    
+    @timed("runner_filter_seconds", "Time to apply the filter after each keystroke")
+    def setFilter(self, text):
+        """ Show only the entries whose button, command or tooltip contain every word of text """
+        self.filterText = text
+        self.applyFilter()
+    
+    def applyFilter(self, keepScroll=False):
+        """ Display the entries matching self.filterText.  Rows are reused, not rebuilt. """
+        items = self.search.search(self.filterText)
+        if keepScroll:
+            self.cmdList.items = items
+            self.cmdList.refresh()
+        else:
+            self.cmdList.setItems(items)
+    
+    def onFilterKey(self, event):
+        if event.keysym == "Escape":
+            self.filterVar.set("")
+        elif event.keysym == "Return" and len(self.cmdList.items) == 1:
+            self.cmdList.items[0].execute()
+    
+    def onSaveMetrics(self):
+        """ Write runner's own timings to a file chosen by the user """
+        path = tkFileDialog.asksaveasfilename(title="Save Metrics", defaultextension=".prom",
+                                              filetypes=[("Prometheus text", "*.prom"), ("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            Metrics.dump(path)
+        except (IOError, OSError) as e:
+            tkMessageBox.showerror("Save Metrics", "Can't write {}:\n\n{}".format(path, e))
+    
+    def selectedWidgets(self):
+        return [w for w in self.widgets if w.selected]
+    
+    def onRunSelected(self):
+        """ Start every selected command.  The executor runs them in parallel, up to maxParallel at a time. """
+        for w in self.selectedWidgets():
+            w.execute()
+    
+    def onClearSelection(self):
+        for w in self.selectedWidgets():
+            w.setSelected(False)
+    
+    @timed("runner_save_seconds", "Time the GUI is busy saving the command file")
+    def saveToFile(self, path):
+        self.finishLoading()
+        for w in self.widgets:
+            w.commit()
+            
+        data = {
+                "title": self.title,
+                "width": self.cmdWidth,
+                "cmds" : self.store.cmds(),
+               }
+        if self.maxParallel > 0:
+            data["maxParallel"] = self.maxParallel
+        if self.tab.include:
+            data["include"] = self.tab.include
+        if self.tab.sessions:
+            data["sessions"] = self.tab.sessions
+            
+        if len(self.widgets) < self.BACKGROUND_SAVE_SIZE:
+            try:
+                writeIfChanged(path, json.dumps(data, indent=True))
+            except (IOError, OSError) as e:
+                self.fileMenu.onSaveComplete(path, str(e))
+                return False
+            self.onSaved(path)
+            return True
+        
+        # Big file:  serialize and write a snapshot of the data in the background
+        data["cmds"] = [dict(cmd) for cmd in data["cmds"]]
+        self.saver.save(path, lambda: json.dumps(data, indent=True), self.onSaveDone)
+        return FileMenu.SAVE_PENDING
+    
+    def onSaveDone(self, path, error):
+        """ BackgroundSaver callback """
+        tab = self.tab
+        for t in self.tabs:
+            if t.isFile(path):
+                tab = t
+        if tab is self.tab:
+            self.fileMenu.onSaveComplete(path, error)
+        elif error:
+            # Saved from a tab that is no longer displayed
+            tab.modified = True
+            self.updateTabLabel(tab)
+            tkMessageBox.showerror(title="Save Failed", message="Could not save {}:\n\n{}".format(path, error))
+        if not error:
+            self.onSaved(path)
+    
+    def recordSnapshot(self, buildCache, snapshot):
+        """ Record a succeeded run's snapshot in buildCache, and save it, on the saver's thread:
+            that stats the run's outputs and fsyncs the whole cache
+        """
+        def makeData():
+            buildCache.record(snapshot, save=False)
+            return buildCache.dump()
+        self.saver.save(buildCache.path, makeData, self.onBuildCacheSaved)
+    
+    def onBuildCacheSaved(self, path, error):
+        """ BackgroundSaver callback for recordSnapshot() """
+        pass  # the cache is only an optimization
+    
+    def onSaved(self, path):
+        for tab in self.tabs:
+            if tab.isFile(path) and tab.watcher is not None:
+                tab.watcher.sync()  # don't reload our own changes
+    
+    def getBuildCache(self):
+        """ Return the BuildCache for the current command file """
+        return self.tab.getBuildCache()
+    
+    def getHistory(self):
+        """ Return the History for the current command file, or None if it can't be opened """
+        return self.tab.getHistory()
+    
+    def onTimings(self, widget):
+        """ Called by CmdWidget.timings for its tooltip """
+        tab = self.tabOf(widget)
+        history = tab.getHistory() if tab is not None else None
+        return history.describeTimings(widget.cmd["button"]) if history else None
+    
+    @staticmethod
+    def groupOf(tab):
+        """ The group of tab's runs (see CmdRun):  the absolute path of its command file """
+        return os.path.abspath(tab.cmdFile) if tab.cmdFile else None
+    
+    def executeCmd(self, widget, cmdText, force=False):
+        """ Called by CmdWidget.execute() to start a command in the background.
+            A command whose outputs are up to date is not run unless force is True.
+            Its inputs are hashed on the run's worker thread, so big ones don't block the GUI.
+        """
+        tab = self.tabOf(widget) or self.tab
+        buildCache = tab.getBuildCache() if tab.cmdFile and widget.cmd.get("inputs") else None
+        cmd = widget.cmd
+        def check(run):
+            snapshot = buildCache.check(cmd, cmdText)
+            if snapshot is None:
+                return False
+            self.snapshots[run] = (buildCache, snapshot)  # recorded on the GUI thread when the run succeeds
+            return snapshot.upToDate and not force
+        
+        return self.executor.submit(widget.cmd["button"], cmdText, owner=widget, policy=widget.policy,
+                                    maxLines=widget.cmd.get("maxOutputLines", 0),
+                                    maxBytes=widget.cmd.get("maxOutputBytes", 0),
+                                    timeout=widget.cmd.get("timeout", 0),
+                                    limits=widget.cmd.get("limits"),
+                                    shell=widget.cmd.get("shell"),
+                                    group=self.groupOf(tab),
+                                    session=sessionFor(widget.cmd, tab.sessions),
+                                    check=check if buildCache else None)
+    
+    def runPipeline(self, widget):
+        """ Called by CmdWidget.executeWithDeps() to run widget's command after its dependencies """
+        self.finishLoading()
+        store = self.store  # the pipeline keeps running if another tab is shown
+        def submit(name):
+            w = store.find(name)
+            if w is None or w.disabled:
+                return None  # a deleted entry:  its dependents are skipped
+            run = self.executeCmd(w, w.cmdValue)
+            if run is not None:
+                w.run = run
+                w.showState()
+            return run
+        
+        def onSkip(name):
+            w = store.find(name)
+            if w is not None:
+                w.run = CmdRun(name, w.cmdValue, owner=w)
+                w.run.state = CmdRun.SKIPPED
+                w.showState()
+        
+        pipeline = Pipeline(dependencyGraph(store.cmds()), [widget.name], submit, onSkip)
+        pipeline.start()
+        if not pipeline.isDone:
+            self.pipelines.append(pipeline)
+    
+    def pollExecutor(self):
+        """ Drain run events from the executor and redraw output panes that changed.
+            Reschedules itself on the Tk mainloop.
+        """
+        self.executor.poll(self.onRunEvent)
+        self.saver.poll()
+        for tab in self.tabs:
+            if tab.history is not None:
+                tab.history.flushIfDue()
+        if self.outputs is not None:
+            self.outputs.flush()
+        self.root.after(self.POLL_MS, self.pollExecutor)
+    
+    def getOutputs(self):
+        """ Return the output notebook, adding it below the buttons the first time """
+        if self.outputs is None:
+            self.outputs = OutputNotebook(self.paned)
+            self.paned.add(self.outputs, height=self.OUTPUT_HEIGHT)
+        return self.outputs
+    
+    def onBenchmark(self, widget, options):
+        """ Called by CmdWidget.benchmark() to run widget's command repeatedly.
+            Benchmark runs are not shown in the output panes or recorded in the history.
+        """
+        cmd = widget.cmd
+        cmdText = widget.cmdValue
+        session = sessionFor(cmd, (self.tabOf(widget) or self.tab).sessions)
+        def submit(slot):
+            return self.executor.submit(widget.name, cmdText, owner=(benchmark, slot),
+                                        maxLines=self.BENCHMARK_OUTPUT_LINES,
+                                        timeout=cmd.get("timeout", 0),
+                                        limits=cmd.get("limits"),
+                                        shell=cmd.get("shell"),
+                                        session=session,
+                                        log=False)
+        
+        benchmark = CmdBenchmark(widget.name, cmdText, submit, **options)
+        window = BenchmarkWindow(self.root, benchmark)
+        window.stopCB = self.stopBenchmark
+        self.benchmarks.append(window)
+        benchmark.start()
+    
+    def stopBenchmark(self, window):
+        window.benchmark.stop()
+        for run in list(window.benchmark.runs):
+            self.executor.cancel(run)
+        if window.benchmark.isDone and window in self.benchmarks:
+            self.benchmarks.remove(window)
+    
+    def onStop(self, widget):
+        """ Called by CmdWidget.stop() """
+        self.executor.cancelKey(widget)
+    
+    def onShowOutput(self, widget):
+        """ Called by CmdWidget.showOutput() """
+        if self.outputs is not None:
+            self.outputs.show((self.groupOf(self.tabOf(widget) or self.tab), widget.name))
+    
+    def onRunEvent(self, event, run, data):
+        """ Handle one event from the executor (on the GUI thread) """
+        for window in self.benchmarks:
+            if window.benchmark.owns(run):
+                window.benchmark.onRunEvent(event, run, data)
+                if window.benchmark.isDone:
+                    self.benchmarks.remove(window)
+                return
+        
+        # By file and button, as the daemon keys runs:  a reloaded file's new CmdWidgets keep their panes
+        key = (run.group, run.name)
+        if event == "start":
+            self.getOutputs().paneFor(key, run.name).attach(run)
+        elif event == "output":
+            self.getOutputs().markDirty(key)
+        elif event == "exit":
+            buildCache, snapshot = self.snapshots.pop(run, (None, None))
+            # An up-to-date run's snapshot is the one already recorded:  don't rewrite the cache
+            if snapshot is not None and run.state == CmdRun.SUCCEEDED and not run.upToDate:
+                self.recordSnapshot(buildCache, snapshot)
+            tab = self.tabOf(run.owner) if run.owner is not None else self.tab
+            history = tab.getHistory() if tab is not None else None
+            if history is not None:
+                history.record(run)
+            if run.upToDate:
+                self.getOutputs().paneFor(key, run.name).attach(run)
+            pane = self.getOutputs().panes.get(key)
+            if pane is not None and pane.run is run and run.upToDate:
+                pane.setStatus("$ {}    [up to date, not run]".format(run.cmdText))
+            elif pane is not None and pane.run is run:
+                pane.refresh()
+                if run.error:
+                    pane.setStatus("$ {}    [could not run: {}]".format(run.cmdText, run.error))
+                elif run.timedOut:
+                    pane.setStatus("$ {}    [timed out after {}s]".format(run.cmdText, run.timeout))
+                else:
+                    pane.setStatus("$ {}    [{}, exit code {}]".format(run.cmdText, run.state, run.returncode))
+        
+        widget = run.owner
+        if widget is not None and widget.run is run:
+            widget.showState()
+        
+        if self.pipelines:
+            for pipeline in self.pipelines:
+                pipeline.onRunEvent(event, run, data)
+            self.pipelines = [p for p in self.pipelines if not p.isDone]
+    
+    def makeRow(self, parent, row, tab=None):
+        """ Called by tab's command list to create a CmdRow """
+        tab = tab or self.tab
+        return CmdRow(parent, row, cmdWidth=tab.cmdWidth or self.DEFAULT_CMD_WIDTH)
+    
+    def bindRow(self, row, widget):
+        """ Called by the command list to display widget in row, or hide the row if widget is None """
+        if widget is None:
+            row.hide()
+        else:
+            row.show(widget)
+        
+    @timed("runner_build_gui_seconds", "Time to create the main window")
+    def buildGUI(self):
+        self.root = Tk()
+        self.addMenuBar()
+        self.setTitle()
+
+        filterBar = Frame(self.root)
+        filterBar.pack(fill="x")
+        Label(filterBar, text="Filter:").pack(side="left")
+        self.filterVar = StringVar(self.root)
+        self.filterVar.trace("w", lambda *args: self.setFilter(self.filterVar.get()))
+        filterEntry = Entry(filterBar, textvariable=self.filterVar)
+        filterEntry.pack(side="left", fill="x", expand=True)
+        filterEntry.bind("<Key>", self.onFilterKey)
+        filterEntry.bind("<FocusIn>", lambda e: self.indexSearch(self.tab))  # before the first keystroke, if it can
+        
+        self.paned = PanedWindow(self.root, orient=VERTICAL)
+        self.paned.pack(fill="both", expand=True)
+        self.notebook = ttk.Notebook(self.paned)
+        self.paned.add(self.notebook)
+        for tab in self.tabs:
+            self.addPage(tab)
+        self.buildTab(self.tab)
+        self.notebook.bind("<<NotebookTabChanged>>", self.onTabChanged)
+        self.outputs = None
+            
+        CmdWidget.executeCB = self.executeCmd
+        CmdWidget.executeDepsCB = self.runPipeline
+        CmdWidget.showOutputCB = self.onShowOutput
+        CmdWidget.timingsCB = self.onTimings
+        CmdWidget.stopCB = self.onStop
+        CmdWidget.benchmarkCB = self.onBenchmark
+        CmdRow.menu = CmdMenu(self.root)
+        CmdRow.toolTips = ToolTipManager(self.root, CmdRow.toolTipFor)
+        self.root.after(self.POLL_MS, self.pollExecutor)
+        self.root.after(self.UNLOAD_CHECK_MS, self.unloadIdleTabs)
+        self.root.bind("<Control-s>", lambda e: self.fileMenu.onFileSave())
+        self.root.bind("<Control-r>", lambda e: self.onRunSelected())
+        self.root.bind("<Control-f>", lambda e: filterEntry.focus_set())
+        self.root.protocol("WM_DELETE_WINDOW", self.fileMenu.onExit)
+
+    def onExit(self):
+        for tab in self.tabs:
+            if tab.modified and tab is not self.tab:
+                # The file menu only asked about the displayed tab
+                self.showTab(tab)
+                if not self.fileMenu.askSave():
+                    return
+        self.saver.close()  # finish any background save before the process exits
+        for tab in self.tabs:
+            tab.close()
+        if isinstance(self.executor, RemoteExecutor):
+            self.executor.close()  # its runs carry on in the daemon
+        else:
+            self.executor.closeSessions()
+        if self.args.metrics:
+            Metrics.dump(self.args.metrics)
+        self.root.destroy()
+
+    def run(self, args):
+        """ Run the GUI until the window is closed.  args is the parsed command line. """
+        self.applyArgs(args)
+        self.cmdFile = self.args.commandFile
+        for path in self.args.moreFiles:
+            self.openTab(path, show=False)
+        self.buildGUI()
+        self.root.update()  # show the (empty) window before reading the file
+        try:
+            self.loadCmds(progressive=True)
+        except (IOError, ValueError) as e:  # e.g. unreadable, or not a command file
+            self.showCmdFileError(e)
+        self.root.mainloop()
+
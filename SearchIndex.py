@@ -0,0 +1,177 @@
+#!/usr/bin/python
+#
+#   File: SearchIndex.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Substring search over the records of a CmdStore.
+
+Each record's button, command and tooltip text is split into trigrams (all
+3-character substrings), and the index maps each trigram to the records
+containing it.  A search term of 3 or more characters only has to check
+the records in the intersection of its trigrams' sets, which is usually a
+handful even in a 10k-entry file.  Shorter terms, and terms that extend the
+previous query as you type, are checked against a smaller candidate list.
+
+Building the index for a big file takes a while, so it can be built a
+chunk at a time with buildSome() (the GUI does it from idle callbacks);
+until it is built, search() falls back to checking every record.  After
+that it is kept up to date from the store's change notifications:  edited
+records are reindexed on the next search, and a reload only reindexes the
+records whose text changed.
+"""
+from __future__ import print_function, division
+
+from CmdStore import CmdStore
+
+EMPTY = frozenset()
+
+
+#----------------------------------------------------------------------------
+def trigrams(text):
+    return set(text[i:i+3] for i in range(len(text) - 2))
+
+#----------------------------------------------------------------------------
+class SearchIndex(object):
+    """ Finds the records of a CmdStore whose button, command or tooltip contain some text """
+    BUILD_CHUNK = 200  # records indexed by each buildSome()
+
+    def __init__(self, store):
+        self.store = store
+        self.texts = {}      # record -> the lowercase text it is indexed under
+        self.grams = {}      # trigram -> set of records
+        self.stale = set()   # records edited since they were indexed
+        self.built = False
+        self.position = 0    # the records before this one are indexed, while building
+        self.reloaded = False  # the store was reloaded since the last sync()
+        self.lastTerms  = None  # the previous search, to narrow it as the user types
+        self.lastResult = None
+        store.subscribe(self.onStoreChange)
+
+    @staticmethod
+    def textOf(record):
+        return "\n".join((record.buttonValue, record.cmdValue, record.tooltipValue)).lower()
+
+    def onStoreChange(self, event, record):
+        """ CmdStore listener """
+        if event == CmdStore.MODIFIED:
+            return  # the text didn't change
+        self.lastTerms = None
+        if not self.built and not self.position:
+            return  # nothing indexed yet
+        if event == CmdStore.LOADED:
+            self.reloaded = True
+        else:
+            self.stale.add(record)
+
+    def add(self, record):
+        text = self.textOf(record)
+        self.texts[record] = text
+        for gram in trigrams(text):
+            records = self.grams.get(gram)
+            if records is None:
+                self.grams[gram] = records = set()
+            records.add(record)
+
+    def remove(self, record):
+        text = self.texts.pop(record, None)
+        if text is None:
+            return
+        for gram in trigrams(text):
+            records = self.grams.get(gram)
+            if records is not None:
+                records.discard(record)
+                if not records:
+                    del self.grams[gram]
+
+    def update(self, record):
+        """ Reindex record if its text changed """
+        if self.texts.get(record) != self.textOf(record):
+            self.remove(record)
+            self.add(record)
+
+    def buildSome(self, count=BUILD_CHUNK):
+        """ Index the next count records, if the index isn't built yet.  Return True once it is. """
+        if self.built:
+            return True
+        records = self.store.records
+        for record in records[self.position:self.position + count]:
+            self.add(record)
+        self.position += count
+        if self.position >= len(records):
+            self.built = True
+            self.sync()  # whatever changed while it was being built
+        return self.built
+
+    def sync(self):
+        """ Bring the index up to date with the store, building all of it if need be """
+        if not self.built:
+            self.buildSome(len(self.store.records))
+            return
+        if self.reloaded:
+            current = set(self.store.records)
+            for record in [r for r in self.texts if r not in current]:
+                self.remove(record)
+            for record in self.store.records:
+                self.update(record)
+            self.reloaded = False
+        else:
+            for record in self.stale:
+                if record.store is self.store:
+                    self.update(record)
+        self.stale.clear()
+
+    def candidates(self, term):
+        """ The records that contain every trigram of term, or None if term is too short to tell """
+        if len(term) < 3:
+            return None
+        sets = sorted((self.grams.get(gram, EMPTY) for gram in trigrams(term)), key=len)
+        result = set(sets[0])
+        for records in sets[1:]:
+            if not result:
+                break
+            result &= records
+        return result
+
+    def search(self, query):
+        """ Return the records containing every whitespace-separated word of query
+            (ignoring case), in store order.
+        """
+        terms = query.lower().split()
+        if not terms:
+            return self.store.records
+        if self.built:
+            self.sync()
+
+        if self.lastTerms is not None and len(terms) >= len(self.lastTerms) and \
+           all(old in new for old, new in zip(self.lastTerms, terms)):
+            # Typing more of the same query can only narrow the result
+            records = self.lastResult
+        elif not self.built:
+            records = self.store.records  # check them all
+        else:
+            candidates = None
+            for term in terms:
+                found = self.candidates(term)
+                if found is not None:
+                    candidates = found if candidates is None else candidates & found
+            if candidates is None:
+                records = self.store.records
+            else:
+                records = [r for r in self.store.records if r in candidates]
+
+        if self.built:
+            texts = self.texts
+            result = [r for r in records if all(term in texts[r] for term in terms)]
+        else:
+            result = []
+            for r in records:
+                text = self.textOf(r)
+                if all(term in text for term in terms):
+                    result.append(r)
+        self.lastTerms, self.lastResult = terms, result
+        return result
@@ -0,0 +1,224 @@
+#!/usr/bin/python
+#
+#   File: ShellSession.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Long-lived shells for commands that need an expensive environment.
+
+A command file may declare named sessions, each with setup commands and
+optionally the shell to run them in:
+
+    "sessions": {
+        "dev": {"setup": ["source venv/bin/activate", "cd project"], "shell": "/bin/bash"}
+    }
+
+A session's definition may also be just its setup, as a string.  A command
+with "session": "dev" then runs in that session's shell instead of a new
+/bin/sh.  The shell is started, and runs the setup, when the first such
+command runs; later commands find everything the setup did (the virtualenv,
+modules, working directory, variables) already in place.
+
+Runs share a session's shell when they run in the same directory, and, if
+the session lists environment variables in "env" (e.g. ["VIRTUAL_ENV"]),
+when they have the same values for those.  Otherwise a run's environment
+doesn't matter:  the shell has the environment of the run that started it.
+This only makes a difference with the executor daemon (see ExecutorDaemon),
+whose clients may run in different directories and environments.
+
+Each command runs in a subshell of the session, "(eval CMD) </dev/null", so
+its own cd, exit or assignments don't leak into the next command.  After
+the subshell the session prints a marker:  a random token followed by the
+exit status.  The reader passes on everything before the marker as output,
+and takes the command's return code from it.
+
+A session runs one command at a time; the Executor holds back other runs for
+the same session until it is free.  A shell without job control doesn't put
+the subshell in a process group of its own, so cancelling a run, or its
+timeout, terminates the whole session.  If the session dies for that or any
+other reason, it is started again, setup and all, for the next command.
+"""
+from __future__ import print_function, division
+
+import os
+import time
+import errno
+import pipes
+import shlex
+import binascii
+import subprocess
+
+from Metrics import histogram, counter
+
+DEFAULT_SHELL = "/bin/sh"
+CHUNK_SIZE = 64 * 1024
+
+STARTS = counter("runner_session_starts_total", "Shell sessions started, including restarts")
+SETUP  = histogram("runner_session_setup_seconds", "Time to start a shell session and run its setup")
+
+
+#----------------------------------------------------------------------------
+def sessionSpec(name, definition):
+    """ Return the session called name, as a dict with "name", "setup" and "shell"
+        fields, from its definition in a command file's "sessions" object.
+        Raises ValueError if the definition is invalid.
+    """
+    if isinstance(definition, basestring):
+        definition = {"setup": definition}
+    if not isinstance(definition, dict):
+        raise ValueError("session \"{}\" must be an object or a setup command".format(name))
+    for field in definition:
+        if field not in ("setup", "shell", "env"):
+            raise ValueError("session \"{}\": unknown field \"{}\"".format(name, field))
+    setup = definition.get("setup", "")
+    if isinstance(setup, list) and all(isinstance(line, basestring) for line in setup):
+        setup = "\n".join(setup)
+    if not isinstance(setup, basestring):
+        raise ValueError("session \"{}\": setup must be a command or a list of commands".format(name))
+    shell = definition.get("shell", DEFAULT_SHELL)
+    if not isinstance(shell, basestring) or not shell.strip():
+        raise ValueError("session \"{}\": shell must be a command, e.g. \"/bin/bash\"".format(name))
+    spec = {"name": name, "setup": setup, "shell": shell}
+    env = definition.get("env", [])
+    if not isinstance(env, list) or not all(isinstance(var, basestring) for var in env):
+        raise ValueError("session \"{}\": env must be a list of environment variable names".format(name))
+    if env:
+        spec["env"] = env
+    return spec
+
+def sessionFor(cmd, sessions):
+    """ The session cmd runs in (see sessionSpec()), given its file's "sessions" object, or None """
+    name = cmd.get("session")
+    if name is None:
+        return None
+    return sessionSpec(name, (sessions or {}).get(name, ""))
+
+def sessionKey(spec):
+    """ Sessions with equal keys have the same definition """
+    return (spec["name"], spec["setup"], spec["shell"], tuple(spec.get("env", ())))
+
+def encode(text):
+    return text.encode("utf-8") if isinstance(text, unicode) else text
+
+def partialMarker(data, marker):
+    """ The length of the longest end of data that is the start of marker """
+    for n in range(min(len(data), len(marker) - 1), 0, -1):
+        if data.endswith(marker[:n]):
+            return n
+    return 0
+
+#----------------------------------------------------------------------------
+class ShellSession(object):
+    """ A shell process that runs commands one at a time, after running its setup once.
+        Only one thread at a time may use a session (see Executor._dispatch()).
+    """
+    def __init__(self, spec, cwd=None, env=None):
+        """ The shell runs in directory cwd with environment env, or this process's if None """
+        self.spec    = spec
+        self.name    = spec["name"]
+        self.cwd     = cwd
+        self.env     = env
+        self.process = None
+        self.isSetUp = False
+        self.marker  = None
+        self.startTime = None
+        self.lastUsed = None # when the last command was started, for Executor._session()
+        self.pending = b""   # output read after the last marker, e.g. from a command's background job
+        self.status  = None  # the exit status of the last command, or None if the shell exited during it
+        self.error   = None  # why the last command didn't run
+
+    @property
+    def isAlive(self):
+        return self.process is not None and not self.process.stdin.closed and self.process.poll() is None
+
+    def ensureStarted(self):
+        """ Start the shell if it isn't running, and return its Popen.  The setup is
+            run by the next run().  Raises OSError if the shell can't be started.
+        """
+        if self.isAlive:
+            return self.process
+        STARTS.inc()
+        # close_fds:  the shell outlives the run that starts it, and must not hold other runs' pipes open
+        self.process = subprocess.Popen(shlex.split(encode(self.spec["shell"])), stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, close_fds=True,
+                                        preexec_fn=os.setsid if os.name == "posix" else None,
+                                        cwd=self.cwd, env=self.env)
+        self.startTime = time.time()
+        self.isSetUp = False
+        self.marker = b"__runner_session_{}__".format(binascii.hexlify(os.urandom(8)))
+        self.pending = b""
+        return self.process
+
+    def run(self, cmdText):
+        """ Run cmdText in the session, first running the setup if the shell is new.
+            Generates the output as it arrives.  Afterwards self.status is the exit
+            status, or None if the shell exited; self.error is set if the setup failed.
+        """
+        self.error = None
+        self.lastUsed = time.time()
+        if not self.isSetUp:
+            for data in self._send(encode(self.spec["setup"])):
+                yield data
+            if self.status != 0:
+                self.error = "the setup of session \"{}\" {}".format(
+                    self.name, "ended the shell" if self.status is None else "exited with {}".format(self.status))
+                self.close()
+                return
+            self.isSetUp = True
+            SETUP.observe(time.time() - self.startTime)
+        for data in self._send(b"(eval {}) </dev/null".format(pipes.quote(encode(cmdText)))):
+            yield data
+
+    def close(self):
+        """ End the shell once it finishes what it's running """
+        if self.process is not None:
+            try:
+                self.process.stdin.close()  # the shell exits when it reads to the end
+            except (IOError, OSError):
+                pass
+        self.isSetUp = False
+
+    def _send(self, script):
+        """ Have the shell run script and print the marker.  Generate the output
+            until the marker, then set self.status from it.
+        """
+        self.status = None
+        try:
+            self.process.stdin.write(b"{}\nprintf '%s%d\\n' {} \"$?\"\n".format(script, self.marker))
+            self.process.stdin.flush()
+        except (IOError, OSError, ValueError):
+            return  # the shell is gone
+        marker = self.marker
+        data, self.pending = self.pending, b""
+        fd = self.process.stdout.fileno()
+        while True:
+            i = data.find(marker)
+            if i >= 0:
+                end = data.find(b"\n", i)
+                if i:
+                    yield data[:i]
+                if end >= 0:
+                    self.status = int(data[i + len(marker):end])
+                    self.pending = data[end + 1:]
+                    return
+                data = data[i:]
+            else:
+                keep = partialMarker(data, marker)
+                if len(data) > keep:
+                    yield data[:len(data) - keep]
+                    data = data[len(data) - keep:]
+            try:
+                chunk = os.read(fd, CHUNK_SIZE)
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            if not chunk:
+                if data:
+                    yield data
+                return
+            data += chunk
@@ -0,0 +1,77 @@
+#!/usr/bin/python
+#
+#   File: ToolTipManager.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+A single tooltip window shared by any number of widgets.
+
+Unlike idlelib's ToolTip, which binds three callbacks on every widget and
+holds a copy of the text, widgets only get an extra bindtag, and the text is
+looked up with a callback at the moment the tip is shown.
+"""
+from __future__ import print_function, division
+
+from Tkinter import Toplevel, Label, SOLID, LEFT
+
+
+#----------------------------------------------------------------------------
+class ToolTipManager(object):
+    """ Shows textFor(widget) near a widget after the pointer has rested on it """
+    DELAY_MS = 1500
+
+    def __init__(self, root, textFor, tag="ToolTipManager"):
+        self.root      = root
+        self.textFor   = textFor
+        self.tag       = tag
+        self.widget    = None  # the widget under the pointer
+        self.afterId   = None
+        self.tipWindow = None
+        self.label     = None
+
+        root.bind_class(tag, "<Enter>", self.onEnter)
+        root.bind_class(tag, "<Leave>", self.onLeave)
+        root.bind_class(tag, "<ButtonPress>", self.onLeave)
+
+    def attach(self, widget):
+        """ Give widget a tooltip """
+        widget.bindtags(widget.bindtags() + (self.tag,))
+
+    def onEnter(self, event):
+        self.cancel()
+        self.widget = event.widget
+        self.afterId = self.root.after(self.DELAY_MS, self.show)
+
+    def onLeave(self, event=None):
+        self.cancel()
+        self.hide()
+
+    def cancel(self):
+        if self.afterId is not None:
+            self.root.after_cancel(self.afterId)
+            self.afterId = None
+
+    def show(self):
+        self.afterId = None
+        text = self.textFor(self.widget)
+        if not text:
+            return
+        if self.tipWindow is None:
+            self.tipWindow = Toplevel(self.root)
+            self.tipWindow.wm_overrideredirect(1)
+            self.label = Label(self.tipWindow, justify=LEFT, background="#ffffe0", relief=SOLID, borderwidth=1)
+            self.label.pack()
+        self.label.config(text=text)
+        x = self.widget.winfo_rootx() + 20
+        y = self.widget.winfo_rooty() + self.widget.winfo_height() + 1
+        self.tipWindow.wm_geometry("+{}+{}".format(x, y))
+        self.tipWindow.deiconify()
+        self.tipWindow.lift()
+
+    def hide(self):
+        if self.tipWindow is not None:
+            self.tipWindow.withdraw()
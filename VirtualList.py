@@ -0,0 +1,146 @@
+#!/usr/bin/python
+#
+#   File: VirtualList.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+A scrollable list that only creates widgets for the rows that are visible.
+
+The list displays a sequence of items (any Python objects).  Widgets for a
+row are created by a makeRow(parent, gridRow) callback, and are reused as the
+list scrolls:  bindRow(row, item) is called to display a different item in an
+existing row, or bindRow(row, None) to hide a row that is not needed.
+
+Row objects must have a "widgets" attribute listing their Tk widgets, so the
+list can attach mouse wheel bindings to them.
+"""
+from __future__ import print_function, division
+
+from Tkinter import Frame, Scrollbar
+
+
+#----------------------------------------------------------------------------
+class VirtualList(Frame):
+    """ A Frame with a scrollbar that displays items through a small pool of reusable rows """
+    DEFAULT_ROWS = 25   # number of rows to request room for initially
+    WHEEL_UNITS  = 3    # rows scrolled per mouse wheel click
+
+    def __init__(self, parent, makeRow, bindRow, **kwargs):
+        Frame.__init__(self, parent, **kwargs)
+        self.makeRow   = makeRow
+        self.bindRow   = bindRow
+        self.items     = []
+        self.rows      = []   # row objects, in display order
+        self.first     = 0    # index of the item displayed in the top row
+        self.nVisible  = self.DEFAULT_ROWS
+        self.rowHeight = 0    # measured when the first row is displayed
+
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.body = Frame(self)
+        self.body.grid(row=0, column=0, sticky="nsew")
+        self.body.grid_propagate(False)  # the number of rows shown depends on the size, not vice versa
+        self.body.bind("<Configure>", self.onConfigure)
+
+        self.scrollbar = Scrollbar(self, command=self.onScroll)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        # A bindtag shared by all of this list's row widgets, for mouse wheel scrolling
+        self.tag = "VirtualList{}".format(id(self))
+        self.bind_class(self.tag, "<MouseWheel>", self.onWheel)
+        self.bind_class(self.tag, "<Button-4>", self.onWheel)
+        self.bind_class(self.tag, "<Button-5>", self.onWheel)
+        self.addBindTag(self.body)
+
+    def addBindTag(self, widget):
+        widget.bindtags(widget.bindtags() + (self.tag,))
+
+    def setItems(self, items):
+        """ Display items.  The list is not copied, so call refresh() after changing it. """
+        self.items = items
+        self.first = 0
+        self.refresh()
+
+    def refresh(self):
+        """ Rebind every visible row to the item it should display """
+        self.first = max(0, min(self.first, len(self.items) - self.nVisible))
+        nShown = min(self.nVisible, len(self.items) - self.first)
+        while len(self.rows) < nShown:
+            row = self.makeRow(self.body, len(self.rows))
+            for w in row.widgets:
+                self.addBindTag(w)
+            self.rows.append(row)
+
+        for i, row in enumerate(self.rows):
+            self.bindRow(row, self.items[self.first + i] if i < nShown else None)
+
+        if nShown > 0 and (self.rowHeight == 0 or len(self.items) <= self.DEFAULT_ROWS):
+            self.fitSize()
+        self.updateScrollbar()
+
+    def refreshItem(self, index):
+        """ Rebind the row displaying items[index], if it is visible """
+        i = index - self.first
+        if 0 <= i < min(self.nVisible, len(self.rows)):
+            self.bindRow(self.rows[i], self.items[index])
+
+    def fitSize(self):
+        """ Request room for all of the items, up to DEFAULT_ROWS rows.
+            The first call measures the row height.
+        """
+        if self.rowHeight == 0:
+            self.body.update_idletasks()
+            x, y, width, height = self.body.grid_bbox(0, 0)
+            self.rowHeight = height
+            x, y, width, height = self.body.grid_bbox()
+            self.body.config(width=width)
+        height = self.rowHeight * min(self.DEFAULT_ROWS, len(self.items))
+        if height > self.body.winfo_reqheight():
+            self.body.config(height=height)
+
+    def updateScrollbar(self):
+        n = len(self.items)
+        if n <= self.nVisible:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.first / n, (self.first + self.nVisible) / n)
+
+    def scrollTo(self, first):
+        first = max(0, min(first, len(self.items) - self.nVisible))
+        if first != self.first:
+            self.first = first
+            self.refresh()
+
+    def see(self, index):
+        """ Scroll so items[index] is visible """
+        if index < self.first:
+            self.scrollTo(index)
+        elif index >= self.first + self.nVisible:
+            self.scrollTo(index - self.nVisible + 1)
+
+    def onScroll(self, *args):
+        """ Scrollbar command """
+        if args[0] == "moveto":
+            self.scrollTo(int(round(float(args[1]) * len(self.items))))
+        elif args[0] == "scroll":
+            step = self.nVisible if args[2] == "pages" else 1
+            self.scrollTo(self.first + int(args[1]) * step)
+
+    def onWheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scrollTo(self.first - self.WHEEL_UNITS)
+        else:
+            self.scrollTo(self.first + self.WHEEL_UNITS)
+
+    def onConfigure(self, event):
+        """ Show as many rows as fit in the new size """
+        if self.rowHeight > 0:
+            nVisible = max(1, event.height // self.rowHeight)
+            if nVisible != self.nVisible:
+                self.nVisible = nVisible
+                self.refresh()
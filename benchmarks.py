@@ -0,0 +1,372 @@
+#!/usr/bin/python
+#
+#   File: benchmarks.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Usage: benchmarks.py [-h] [-s SIZES] [-r REPEAT] [-o FILE] [-c FILE] [--gui]
+
+Performance benchmarks for runner, on synthetic command files of 10, 1000
+and 10000 entries (by default).  For each size it measures:
+
+  readCold    readCmdFile() of the file, parsing it
+  read        readCmdFile() of the file, from the parsed-file cache
+  load        loadCmds() into a new app, and the memory it took
+  reload      loadCmds() again when nothing changed
+  keystroke   CmdWidget.setCmdValue(), which notifies the app, when an edit
+              makes an entry modified or unmodified
+  updateButton  CmdWidget.updateButton()
+  save        saveToFile() after one edit:  the time the GUI thread is busy,
+              and the time until the file is written
+  saveUnchanged  saveToFile() with nothing changed
+  filterIndex building a chunk of the filter's search index (the GUI builds
+              one per idle callback)
+  filter      setFilter() for each keystroke of typing, then erasing, a query
+  execute     the time a click blocks the GUI (execute()), and the time until
+              the "start" and "exit" events of a trivial command arrive
+
+Each size runs in a separate process, so that memory figures don't include
+the previous sizes, and with its own cache directory.  Results are printed as a table and written as JSON with
+-o; pass an earlier JSON file with -c to print the ratio of each median to
+the earlier one.
+
+By default the GUI-free model layer is measured:  RunnerApp with plain
+objects in place of the Tk command list and file menu.  With --gui, a real
+(withdrawn) Tk window is used, so a display is needed, e.g.
+    xvfb-run python benchmarks.py --gui
+"""
+#----------------------------------------------------------------------------
+from __future__ import print_function, division
+
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import platform
+import resource
+import tempfile
+import subprocess
+from argparse import ArgumentParser, SUPPRESS
+
+DEFAULT_SIZES = "10,1000,10000"
+KEYSTROKES = 2000
+CLICKS = 50
+FILTER_QUERIES = ["command 99", "synthetic 5", "echo"]
+
+
+#----------------------------------------------------------------------------
+def generateCmdFile(path, count):
+    """ Write a synthetic command file with count entries """
+    cmds = []
+    for i in range(count):
+        cmds.append({
+            "button" : "Command {}".format(i),
+            "cmd"    : "echo {} > /dev/null".format(i),
+            "tooltip": "Synthetic command number {}".format(i),
+        })
+    with open(path, "w") as f:
+        json.dump({"title": "Benchmark {}".format(count), "cmds": cmds}, f, indent=True)
+
+def stats(samples):
+    """ Summarize a list of durations in seconds, in milliseconds """
+    samples = sorted(samples)
+    n = len(samples)
+    return {
+        "n"     : n,
+        "min"   : samples[0] * 1000,
+        "median": samples[n // 2] * 1000,
+        "p95"   : samples[min(n - 1, int(n * 0.95))] * 1000,
+        "max"   : samples[-1] * 1000,
+        "mean"  : sum(samples) / n * 1000,
+    }
+
+def residentKB():
+    """ The current resident set size of this process, in KB """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except (IOError, OSError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak, not current, but better than nothing
+
+#----------------------------------------------------------------------------
+def makeModelApp():
+    """ Return a RunnerApp whose Tk parts are replaced by plain objects """
+    from RunnerGUI import RunnerApp, CmdWidget
+
+    class ModelList(object):
+        rows = []
+        def setItems(self, items):
+            self.items = items
+        def refresh(self):
+            pass
+
+    class ModelFileMenu(object):
+        isModified = False
+        def setModified(self, value):
+            self.isModified = value
+        def onSaveComplete(self, path, error=None):
+            self.error = error
+
+    class ModelWatcher(object):
+        def watch(self, path):
+            pass
+        def sync(self):
+            pass
+
+    class ModelApp(RunnerApp):
+        def setTitle(self):
+            pass
+
+    app = ModelApp()
+    app.cmdList  = ModelList()
+    app.fileMenu = ModelFileMenu()
+    app.watcher  = ModelWatcher()
+    CmdWidget.executeCB = app.executeCmd  # as in RunnerApp.buildGUI()
+    return app
+
+def makeApp(path, gui):
+    """ Return an app for the command file at path, without loading it """
+    import runner
+    args = runner.parseCmdLine([path])
+    if gui:
+        from RunnerGUI import RunnerApp
+        app = RunnerApp()
+        app.applyArgs(args)
+        app.cmdFile = path
+        app.buildGUI()
+        app.root.withdraw()
+    else:
+        app = makeModelApp()
+        app.applyArgs(args)
+        app.cmdFile = path
+    return app
+
+def settle(app):
+    """ Let Tk finish redrawing, when there is a GUI """
+    if app.root is not None:
+        app.root.update()
+
+def destroy(app):
+    if app.history is not None:
+        app.history.close()
+    if app.root is not None:
+        app.root.destroy()
+
+#----------------------------------------------------------------------------
+def benchmarkSize(count, repeat, gui):
+    """ Run every benchmark for a file of count entries.  Return a dict of results. """
+    from CmdFile import readCmdFile
+
+    tmpDir = tempfile.mkdtemp(prefix="runner-bench-")
+    os.environ["XDG_CACHE_HOME"] = tmpDir  # keep the synthetic files out of the user's caches
+    try:
+        path = os.path.join(tmpDir, "cmds.json")
+        generateCmdFile(path, count)
+        results = {"entries": count, "fileBytes": os.path.getsize(path)}
+
+        results["readCold"] = stats([timed(readCmdFile, path, False) for i in range(repeat)])
+        readCmdFile(path)  # fill the cache
+        results["read"] = stats([timed(readCmdFile, path) for i in range(repeat)])
+
+        # Load into a fresh app, measuring memory the first time
+        loads = []
+        for i in range(repeat):
+            app = makeApp(path, gui)
+            gc.collect()
+            before = residentKB()
+            start = time.time()
+            app.loadCmds()
+            settle(app)
+            loads.append(time.time() - start)
+            if i == 0:
+                gc.collect()
+                results["loadMemoryKB"] = residentKB() - before
+            if i < repeat - 1:
+                destroy(app)
+        results["load"] = stats(loads)
+
+        results["reload"] = stats([timed(lambda: (app.loadCmds(keepEdits=True), settle(app))) for i in range(repeat)])
+
+        # Each keystroke flips an entry between modified and unmodified, the expensive case
+        samples = []
+        for i in range(KEYSTROKES):
+            widget = app.widgets[i // 2 % len(app.widgets)]
+            text = widget.cmd["cmd"] + "x" if i % 2 == 0 else widget.cmd["cmd"]
+            samples.append(timed(widget.setCmdValue, text))
+        settle(app)
+        results["keystroke"] = stats(samples)
+
+        results["updateButton"] = stats([timed(app.widgets[i % len(app.widgets)].updateButton)
+                                         for i in range(KEYSTROKES)])
+
+        # Save after a one-character edit; big files finish in the background
+        busy, total = [], []
+        for i in range(repeat):
+            widget = app.widgets[i % len(app.widgets)]
+            widget.setCmdValue(widget.cmdValue + "x")
+            start = time.time()
+            app.saveToFile(path)
+            busy.append(time.time() - start)
+            app.saver.wait()
+            total.append(time.time() - start)
+        results["save"] = stats(busy)
+        results["saveTotal"] = stats(total)
+        results["saveUnchanged"] = stats([timed(lambda: (app.saveToFile(path), app.saver.wait()))
+                                          for i in range(repeat)])
+
+        samples = []
+        while not app.search.built:
+            samples.append(timed(app.search.buildSome))
+        results["filterIndex"] = stats(samples)
+        samples = []
+        for query in FILTER_QUERIES:
+            for n in list(range(1, len(query) + 1)) + list(range(len(query) - 1, -1, -1)):
+                samples.append(timed(lambda: (app.setFilter(query[:n]), settle(app))))
+        results["filter"] = stats(samples)
+
+        results["execute"] = benchmarkExecute(app, gui)
+        destroy(app)
+        return results
+    finally:
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+def benchmarkExecute(app, gui):
+    """ Click a button running a trivial command CLICKS times, one at a time """
+    widget = app.widgets[0]
+    widget.setCmdValue("true")
+    app.executor.maxParallel = 1
+    clicks, starts, exits = [], [], []
+    times = {}
+
+    def onRunEvent(event, run, data):
+        times[event] = time.time()
+        if gui:
+            app.onRunEvent(event, run, data)
+
+    for i in range(CLICKS):
+        times.clear()
+        start = time.time()
+        widget.execute()
+        clicks.append(time.time() - start)
+        while "exit" not in times:
+            app.executor.poll(onRunEvent, timeout=1)
+        starts.append(times["start"] - start)
+        exits.append(times["exit"] - start)
+    return {"click": stats(clicks), "toStart": stats(starts), "toExit": stats(exits)}
+
+def timed(fn, *args):
+    start = time.time()
+    fn(*args)
+    return time.time() - start
+
+#----------------------------------------------------------------------------
+def runAll(args):
+    """ Run each size in a child process and collect the results """
+    report = {
+        "python"   : platform.python_version(),
+        "platform" : platform.platform(),
+        "mode"     : "gui" if args.gui else "model",
+        "time"     : time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat"   : args.repeat,
+        "results"  : [],
+    }
+    for size in args.sizes:
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", str(size), "-r", str(args.repeat)]
+        if args.gui:
+            cmd.append("--gui")
+        print("Benchmarking {} entries...".format(size), file=sys.stderr)
+        output = subprocess.check_output(cmd)
+        report["results"].append(json.loads(output))
+    return report
+
+# The medians shown in the table and compared with -c
+COLUMNS = [
+    ("readCold",      ("readCold",)),
+    ("read",          ("read",)),
+    ("load",          ("load",)),
+    ("reload",        ("reload",)),
+    ("keystroke",     ("keystroke",)),
+    ("updateButton",  ("updateButton",)),
+    ("save",          ("save",)),
+    ("saveTotal",     ("saveTotal",)),
+    ("saveUnchanged", ("saveUnchanged",)),
+    ("filterIndex",   ("filterIndex",)),
+    ("filter",        ("filter",)),
+    ("click",         ("execute", "click")),
+    ("toExit",        ("execute", "toExit")),
+]
+
+def median(result, keys):
+    """ The median of the benchmark at keys in result, or None if result doesn't have it """
+    for key in keys:
+        result = result.get(key)
+        if result is None:
+            return None
+    return result["median"]
+
+def printReport(report, baseline=None):
+    """ Print the median of each benchmark in ms, with the ratio to baseline if given """
+    old = {}
+    if baseline:
+        old = dict((r["entries"], r) for r in baseline["results"])
+    print("{:>14} ".format("entries") + "".join("{:>10}".format(r["entries"]) for r in report["results"]))
+    for name, keys in COLUMNS:
+        line = "{:>14} ".format(name)
+        for result in report["results"]:
+            value = median(result, keys)
+            oldValue = median(old[result["entries"]], keys) if result["entries"] in old else None
+            if value is None:
+                line += "{:>10}".format("-")
+            elif oldValue is not None:
+                line += "{:>10}".format("{:.2f}x".format(value / max(oldValue, 1e-6)))
+            else:
+                line += "{:>10.3f}".format(value)
+        print(line)
+    print("{:>14} ".format("memory KB") + "".join("{:>10}".format(r["loadMemoryKB"]) for r in report["results"]))
+    print("(median ms{})".format(", relative to the baseline" if baseline else ""))
+
+#----------------------------------------------------------------------------
+def parseCmdLine(argv=None):
+    parser = ArgumentParser(description="Performance benchmarks for runner")
+    parser.add_argument("-s", "--sizes", default=DEFAULT_SIZES,
+                        help="Comma-separated numbers of entries to benchmark (default {})".format(DEFAULT_SIZES))
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="How many times to repeat the load and save benchmarks (default 5)")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="Write the results to FILE as JSON")
+    parser.add_argument("-c", "--compare", metavar="FILE",
+                        help="Compare with the results in FILE, from an earlier -o")
+    parser.add_argument("--gui", action="store_true",
+                        help="Measure with a real Tk window (needs a display)")
+    parser.add_argument("--worker", type=int, help=SUPPRESS)  # internal:  benchmark one size
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+    return args
+
+def main(argv=None):
+    args = parseCmdLine(argv)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    if args.worker is not None:
+        json.dump(benchmarkSize(args.worker, args.repeat, args.gui), sys.stdout)
+        return 0
+
+    report = runAll(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    printReport(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=True, sort_keys=True)
+    return 0
+
+#----------------------------------------------------------------------------
+if __name__ == '__main__':
+    sys.exit(main())
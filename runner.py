@@ -7,12 +7,14 @@
 # Copyright (c) 2015 Ellery Chan
 #----------------------------------------------------------------------------
 """
-Usage: runner.py [-h] [-w CMDWIDTH] commandFile
+Usage: runner.py [-h] [-w CMDWIDTH] [-j MAXPARALLEL] [-r NAME] [-d] [-f] [--daemon] commandFile [FILE ...]
+       runner.py --serve [-j MAXPARALLEL] [--idleExit SECONDS]
+       runner.py --status
 
 A simple GUI for running a canned set of commands on demand. The commands are
 loaded from a file in JSON format. The file contains an array of objects
-containing a "button" field, a "cmd" field, and an optional "tooltip" field,
-as in the following example:
+containing a "button" field, a "cmd" field, and optional "tooltip" and
+"policy" fields, as in the following example:
 
 [
    {
@@ -23,508 +25,593 @@ as in the following example:
    {
       "button" : "Restore Database",
       "cmd" : "psql -U admin < db_backup.sql",
-      "tooltip": "Restore the database contents from an SQL file"
+      "tooltip": "Restore the database contents from an SQL file",
+      "policy": "drop"
    }
 ]
 
+The "policy" field says what happens when the button is clicked while its
+command is still running: "queue" (the default) runs it again afterwards,
+"drop" ignores the click, and "restart" stops the running command and starts
+it over.  Up to MAXPARALLEL commands run at once; the rest wait their turn.
+Ctrl-click buttons to select them, then use Actions > Run Selected.
+
+Each command's output (stdout and stderr) is shown in its own tab below the
+buttons.  Only the last 2000 lines or 256 KB of output are kept; a command
+can change these limits with "maxOutputLines" and "maxOutputBytes" fields.
+
+A command can list the buttons it depends on in a "depends" field:
+
+   {
+      "button" : "Deploy",
+      "cmd"    : "./deploy.sh",
+      "depends": ["Build", "Test"]
+   }
+
+Right-click a button and choose Run with Dependencies to run its command
+after everything it depends on, directly or indirectly.  Independent commands
+run in parallel; if one fails, everything that depends on it is skipped
+(shown in gray).  Unknown names and dependency cycles are reported when the
+file is loaded.
+
+Commands that regenerate files can declare them with "inputs" and "outputs"
+fields, each a glob pattern or a list of them:
+
+   {
+      "button" : "Docs",
+      "cmd"    : "make html",
+      "inputs" : ["docs/*.rst", "docs/conf.py"],
+      "outputs": "build/html/*.html"
+   }
+
+Such a command is skipped, like an up-to-date make target, if neither its
+text nor its inputs' contents have changed since it last succeeded and its
+outputs haven't been touched since.  Use Force Run on the right-click menu
+(or --force) to run it anyway.  The hashes are cached under ~/.cache/runner.
+
+Every run is recorded in an SQLite database next to the command file
+(cmds.json.history), and a button's tooltip shows the last, median and 95th
+percentile durations of its recent runs.
+
+A command can be given a "timeout" in seconds, after which it is stopped,
+and "limits" on the resources it may use:  "cpu" seconds, "memory" (address
+space, in bytes or with a K, M or G suffix) and open "files":
+
+   {
+      "button" : "Stress Test",
+      "cmd"    : "./stress.sh",
+      "timeout": 600,
+      "limits" : {"cpu": 300, "memory": "2G", "files": 256}
+   }
+
+Commands without shell syntax (pipes, redirections, variables, globs,
+builtins and the like) are run directly rather than through /bin/sh, which
+makes short commands cheaper to start.  Set "shell" to true to always use the
+shell, or to false to never use it (the command is just split into words,
+honoring quotes).
+
+Right-click a running command's button and choose Stop to stop it.  A
+stopped or timed out command is sent SIGTERM, along with everything it
+started, and SIGKILL 5 seconds later if it is still running.
+
+The file may instead contain an object with a "cmds" array and optional
+"title", "width", "maxParallel", "include" and "sessions" fields.  "include"
+is a list of other command files (relative to this one; glob patterns are
+allowed) to open alongside it.
+
+"sessions" names long-lived shells for commands whose environment is slow
+to set up.  A command with a "session" field runs in that session's shell,
+which runs its "setup" once, when the first such command runs, rather than
+in a new /bin/sh:
+
+   "sessions": {
+      "dev": {"setup": ["source venv/bin/activate", "cd project"], "shell": "/bin/bash"}
+   },
+   "cmds": [
+      {"button": "Test", "cmd": "pytest -x", "session": "dev"}
+   ]
+
+Each command runs in a subshell of the session, so its cd or exit doesn't
+affect the next one, and the session runs one command at a time.  Stopping
+a command, or its timeout, ends the session; it is started again, with its
+setup, for the next command.  "limits" can't be used with a session.
+With --daemon, runners in different directories get a shell each, and so
+do runners with different values of the variables a session lists in
+"env", e.g. "env": ["VIRTUAL_ENV"]; otherwise they share the shell, with
+the environment of the runner whose command started it.
+
+Each command file, whether named on the command line, included, or opened
+with File > Open in New Tab..., gets a tab of its own, with its own edits,
+filter and history.  A tab's buttons are only created when it is first
+shown, and a tab that hasn't been looked at for 10 minutes is unloaded
+again (unless it has unsaved edits or running commands).
+
+Parsed command files are cached under ~/.cache/runner too, so a big file
+that hasn't changed loads quickly.  The window shows the first entries of a
+big file right away and adds the rest in the background.
+
+The file is reloaded automatically when it changes on disk.  Entries with
+unsaved edits keep them; if such an entry also changed on disk, its button
+label turns red until it is reverted (to load the new version) or saved.
+
+With --run, no window is opened:  the named commands are run (up to
+MAXPARALLEL at a time), their output is written to stdout, and runner exits
+with 0 if they all succeeded, or else the exit code of the first one that
+failed (124 if it timed out).  Tk is not loaded at all in this mode, so it works from cron or CI:
+
+    runner.py cmds.json --run "Backup Database" --run "Restore Database" --jobs 4
+
+Add --deps to run each named command's dependencies first, as above.
+Commands that are up to date are reported on stderr and not run.
+
+With --benchmark NAME, no window is opened either:  the named command is run
+--count times (or for --duration seconds) after --warmup unmeasured runs,
+--concurrency at a time, and the min, mean, median, p95, p99 and max of its
+wall time and CPU user and system time are printed.  --export FILE saves
+them, with every run's timings, as JSON or CSV.  In the GUI, right-click a
+button and choose Benchmark...:
+
+    runner.py cmds.json --benchmark "Build Docs" --count 50 --concurrency 4 --export docs.csv
+
+All of each run's output is written to a log file, in a directory for the
+session under ~/.cache/runner/runs (or --logDir DIR); the 20 most recent
+sessions are kept, and so are those of runner processes still running.  The
+output pane only holds the tail of the output, but right-clicking it and
+choosing Open Log shows all of it, however big, even while the command is
+still running:  the viewer maps the file into memory, indexes its lines as
+it grows, and only draws the lines in view.  It can search with regular
+expressions and jump to a line.  --noLogs turns the log files off.
+
+With --daemon, commands are run by a shared executor daemon instead of by
+runner itself, and it is started in the background if it isn't running
+(it exits after 10 idle minutes).  Every window and headless run using
+the daemon shares its worker slots, so its MAXPARALLEL caps them all
+together.  Commands keep running when the window that started them is
+closed, and a window opened on the same command file later picks up the
+ones still running.  A command runs in the working directory and
+environment of the runner that submitted it, not the daemon's.
+runner.py --serve runs the daemon in the foreground
+(its --jobs, --logDir and --noLogs apply to every client), and
+runner.py --status lists its recent and running commands.
+
+With --metrics FILE, runner's own timings (loading and saving the file,
+filtering, edits, and the delay before each command starts and produces
+output) are written to FILE on exit, as JSON if FILE ends in .json and
+otherwise in the Prometheus text format.  In the GUI, Actions > Save
+Metrics... writes them at any time.
+
 positional arguments:
   commandFile           A file containing button labels and commands, in JSON
                         format
+  FILE                  More command files to open as tabs
 
 optional arguments:
   -h, --help            show this help message and exit
   -w CMDWIDTH, --cmdWidth CMDWIDTH
                         The displayed width of the command field (default 80)
+  -j MAXPARALLEL, --maxParallel MAXPARALLEL, --jobs MAXPARALLEL
+                        The maximum number of commands to run at once
+                        (default: one per CPU)
+  -r NAME, --run NAME   Run the command whose button is NAME without opening
+                        the GUI; may be repeated
+  -d, --deps            With --run, also run the commands' dependencies
+  -f, --force           With --run, run commands even if they are up to date
+  -b NAME, --benchmark NAME
+                        Run the command whose button is NAME repeatedly
+                        without opening the GUI, and print its timings
+  -n COUNT, --count COUNT
+                        With --benchmark, how many times to run the command
+                        (default 10)
+  --duration SECONDS    With --benchmark, run the command for this long
+                        instead of --count times
+  --warmup N            With --benchmark, how many runs to do before measuring
+                        (default 1)
+  --concurrency N       With --benchmark, how many runs to keep going at once
+                        (default 1)
+  --export FILE         With --benchmark, write the results to FILE as JSON,
+                        or as CSV if it ends in .csv
+  -m FILE, --metrics FILE
+                        Write runner's own performance metrics to FILE on exit
+  --logDir DIR          Write each run's output to a log file in a new
+                        directory under DIR (default ~/.cache/runner/runs)
+  --noLogs              Don't write log files; only the tail of each run's
+                        output is kept
+  --daemon              Run commands in the executor daemon, starting it if it
+                        isn't running
+  --socket PATH         The executor daemon's socket (default
+                        $XDG_RUNTIME_DIR/runner/executor.sock)
+  --serve               Run the executor daemon; --jobs caps the commands it
+                        runs for all its clients
+  --idleExit SECONDS    With --serve, exit after SECONDS with no clients and
+                        nothing running
+  --status              List the executor daemon's recent and running commands
 """
 #----------------------------------------------------------------------------
 from __future__ import print_function, division
 
+import os
 import sys
-import subprocess
-import os.path
-import json
+import time
+import sqlite3
+import threading
 from argparse import ArgumentParser
-from Tkinter import Tk, Frame, Button, Entry, Label, Menu, Toplevel, END, DISABLED, NORMAL
-from idlelib.ToolTip import ToolTip
 
-from FileMenu import FileMenu
+# Only RunnerGUI and the widgets it uses (FileMenu, FileWatcher, LogViewer, OutputPane,
+# ToolTipManager, VirtualList) import Tk.  The modules imported here, and the modules
+# they import, must not, so that --run, --benchmark, --serve and --status work without
+# a display, and so that they can be unit tested without one.
+from CmdFile import readCmdFile
+from CmdStore import CmdStore
+from Executor import Executor, CmdRun
+from Pipeline import Pipeline, dependencyGraph
+from BuildCache import BuildCache
+from History import History, formatDuration
+from CmdBenchmark import CmdBenchmark
+from OutputLog import RunLogs
+from ShellSession import sessionFor
+from ExecutorDaemon import ExecutorServer, RemoteExecutor, DaemonError
+import ExecutorDaemon
+import Metrics
 
+DEFAULT_CMD_WIDTH = 80
 
-#----------------------------------------------------------------------------
-class RunnerPopup(Toplevel):
-    def __init__(self, parent, label="Text:", title="Enter Text", initialText=None, width=20, allowCancel=False):
-        """ Create and display the popup """
-        Toplevel.__init__(self, parent)
-        self.transient(parent)
-
-        
-        self.parent = parent
-        self.name = None
-        self.columnconfigure(1, weight=1)
-        
-        self.title(title)
-        Label(self, text=label).grid(row=0, column=0, sticky="e")
-
-        self.entry = Entry(self, width=width)
-        self.entry.grid(row=0, column=1, sticky="we", padx=5)
-        
-        if initialText:
-            self.entry.delete(0, END)
-            self.entry.insert(0, initialText)
-
-        if allowCancel:
-            frame = Frame(self)
-            frame.grid(row=1, column=0, columnspan=2, sticky="we")
-            frame.columnconfigure(0, weight=1)
-            frame.columnconfigure(1, weight=1)
-            button = Button(frame, text=" OK ", command=self.ok)
-            button.grid(row=0, column=0, pady=5, sticky="ew")
-            button = Button(frame, text="Cancel", command=self.cancel)
-            button.grid(row=0, column=1, pady=5, sticky="we")
-        else:
-            button = Button(self, text="OK", command=self.ok)
-            button.grid(row=1, column=0, columnspan=2, pady=5)
-
-        self.entry.bind("<Return>", func=self.ok)
-        self.entry.bind("<Escape>", func=self.cancel)
-
-        px = parent.winfo_rootx()
-        py = parent.winfo_rooty()
-        pw = parent.winfo_width()
-        ph = parent.winfo_height()
-        self.update()
-        ww = self.winfo_width()
-        wh = self.winfo_height()
-        geom = "+%d+%d" % (px+pw//2-ww//2,py+ph//2-wh//2)
-        self.geometry(geom)
-        
-    def ok(self, event=None):
-        """ Retrieve the text input and destroy the window """
-        self.name = self.entry.get()
-        self.destroy()
+DESCRIPTION = """ A simple GUI for running a canned set of commands on demand.
     
-    def cancel(self, event=None):
-        """ Destroy the window and set self.name to None """
-        self.name = None
-        self.destroy()
-        
-    def show(self):
-        """ Display the window and get user input.
-            Return the input value, or None if the window is cancelled.
-        """
-        self.entry.focus_set()  # set focus to text area so user can type immediately
-        self.parent.wait_window(self)
-        return self.name
+    The commands are loaded from a file in JSON format.  The file
+    contains an array of objects containing a "button" field, a "cmd"
+    field, and an optional "tooltip" field.  With --run, the named commands
+    are run without the GUI.
+"""
 
-#----------------------------------------------------------------------------
-class RunnerNamePopup(RunnerPopup):
-    def __init__(self, parent, allowCancel=False):
-        RunnerPopup.__init__(self, parent, label="Name:", title="Button Name", allowCancel=allowCancel)
-        
-#----------------------------------------------------------------------------
-class RunnerToolTipPopup(RunnerPopup):
-    def __init__(self, parent, initialText=None):
-        RunnerPopup.__init__(self, parent, label="ToolTip Text:", title="Enter ToolTip", initialText=initialText, width=len(initialText))
-        
-#----------------------------------------------------------------------------
-class RunnerFileMenu(FileMenu):
-    def __init__(self, menubar, **kwargs):
-        FileMenu.__init__(self, menubar, **kwargs)
-        self.onModifiedCB = None
-        self.onFileOpenCB = None
-        self.onRevertCB   = None
-        self.saveToFileCB = None
-        self.onExitCB     = None
-        
-    def onFileOpen(self, path=None):
-        """ Calls FileMenu.onFileOpen() to:
-                Save a modified file if needed.
-                Get a pathname if None was specified.
-                Return True if successful or False if the operation was cancelled.
-            Then, if FileMenu.onFileOpen() was not cancelled, self.onFileOpenCB()
-            is called with the new path and the return value of self.onFileOpenCB()
-            is returned.  Otherwise, True is returned.
-            If FileMenu.onFileOpen() was cancelled, False is returned.
-        """
-        if FileMenu.onFileOpen(self, path):
-            if self.onFileOpenCB:
-                return self.onFileOpenCB(path)
-            else:
-                return True
-        return False
-    
-    def onRevert(self):
-        if self.onRevertCB:
-            return self.onRevertCB()
-        else:
-            return False
-    
-    def saveToFile(self, path):
-        if self.saveToFileCB:
-            return self.saveToFileCB(path)
-        else:
-            return False
-    
-    def onModifiedChange(self):
-        if self.onModifiedCB:
-            self.onModifiedCB(self.isModified)
-    
-    def onExit(self):
-        if FileMenu.onExit(self):
-            if self.onExitCB:
-                self.onExitCB()
 
 #----------------------------------------------------------------------------
-class CmdWidget(object):
-    updateCB = None
+class HeadlessRunner(object):
+    """ Runs commands from a command file without the GUI, writing their output to stdout """
+    POLL_TIMEOUT = 0.1  # seconds; keeps the wait interruptible with Ctrl-C
+    BENCHMARK_OUTPUT_LINES = 20  # output kept for each benchmark run, which is discarded
     
-    def __init__(self, parent, cmd, row, cmdWidth=80, added=False):
-        #Frame.__init__(self, parent)
-        self.parent = parent
-        self.cmd = cmd
-        self.row = row
-        self.disabled = False
-        self.added = added  # new widget, not from a file
-        
-        self.cmdText = Entry(parent, width=cmdWidth)
-        self.cmdText.grid(row=self.row, column=1, sticky="ew", ipady=2)
-        self.cmdText.delete(0, END)
-        self.cmdText.insert(0, self.cmd["cmd"])
-        self.cmdText.parent = self
-        self.cmdText.bind("<Button-3>", func=self.popup)  # attach popup to canvas
-
-        self.button = Button(parent, text=self.cmd["button"], command=self.execute)
-        self.button.grid(row=self.row, column=0, sticky="ew", padx=2, pady=2)
-        self.button.bind("<Button-3>", func=self.popup)  # attach popup to canvas
-
-        self.menu = Menu(self.button, tearoff=False, postcommand=self.onPopup)
-        self.menu.add_command(label="Delete", command=self.delete)
-        self.menu.add_command(label="Revert", command=self.revert)
-        self.menu.add_command(label="Rename", command=self.rename)
-        self.menu.add_command(label="Edit ToolTip", command=self.editToolTip)
+    def __init__(self, args):
+        self.args     = args
+        self.executor = self.makeExecutor(args)
+        self.group    = os.path.abspath(args.commandFile)  # passed to the daemon with each run
+        self.partial  = {}     # run -> incomplete last line, when prefixing lines
+        self.prefix   = False  # prefix each line with the command name
+        self.outputLock = threading.Lock()  # output is written by the runs' reader threads
+        self.stdoutError = None  # why stdout can't be written, e.g. it's a closed pipe
+        self.buildCache = BuildCache.forCmdFile(args.commandFile)
+        self.snapshots  = {}   # run -> BuildCache Snapshot, recorded if the run succeeds
+        self.history    = None
+        self.sessions   = {}   # the command file's "sessions"
         
-        self.buttonTT = None
-        self.cmdTextTT = None
-        if "tooltip" in self.cmd:
-            self.setToolTip(self.cmd["tooltip"])
-            
-        # Attach an event callback that gets called after the Entry field is updated
-        bindtags = list(self.cmdText.bindtags())
-        bindtags.insert(2, "PostInsert") # index 1 is where most default bindings live
-        self.cmdText.bindtags(tuple(bindtags))
-        self.cmdText.bind_class("PostInsert", "<Key>", self.updateButton)
+    @staticmethod
+    def makeExecutor(args):
+        """ Return an Executor, or with --daemon a RemoteExecutor (raises DaemonError if that fails) """
+        if args.daemon:
+            executor = ExecutorDaemon.connect(args.socket, start=True, maxParallel=args.maxParallel)
+            warning = ExecutorDaemon.jobsWarning(executor, args.maxParallel)
+            if warning:
+                print("runner: " + warning, file=sys.stderr)
+            return executor
+        return Executor(logs=None if args.noLogs else RunLogs(args.logDir))
     
-    def setToolTip(self, tooltipText):
-        self.buttonTT = ToolTip(self.button, tooltipText)
-        self.cmdTextTT = ToolTip(self.cmdText, tooltipText)
-        
-    def onPopup(self):
-        self.menu.entryconfig(0, label="Undelete" if self.disabled else "Delete")
-            
-    def popup(self, event):
-        """ Display the popup menu (right-mouse menu) """
-        self.menu.post(event.x_root, event.y_root)
-            
-    def isModified(self):
-#         if self.cmd["cmd"] != self.cmdText.get():
-#         print(self.cmd["cmd"] + " != " + self.cmdText.get())
-        return self.cmd["cmd"] != self.cmdText.get().strip() or \
-               self.cmd["button"] != self.button["text"].rstrip("*").strip() or \
-               self.cmd["tooltip"] != self.buttonTT.text.strip() or \
-               self.cmd["tooltip"] != self.cmdTextTT.text.strip() or \
-               self.disabled or \
-               self.added
+    def run(self):
+        """ Run the commands named by args.run.  Return the process exit code. """
+        try:
+            return self.runBenchmark() if self.args.benchmark else self.runCmds()
+        finally:
+            if self.history is not None:
+                self.history.close()
+            if isinstance(self.executor, RemoteExecutor):
+                self.executor.close()  # its runs carry on in the daemon
+            else:
+                self.executor.closeSessions()
+            if self.args.metrics:
+                Metrics.dump(self.args.metrics)
     
-    def commit(self):
-        """ Copy widget fields to self.cmd fields.
-            This is done right before saving the cmds to a file.
-        """
-        self.cmd["button"] = self.button["text"].rstrip("*").strip()
-        self.cmd["cmd"] = self.cmdText.get().strip()
-        self.cmd["tooltip"] = self.buttonTT.text.strip()
-        self.cmdText.delete(0, END)
-        self.cmdText.insert(0, self.cmd["cmd"])
-        self.setToolTip(self.cmd["tooltip"])
-        self.added = False
-        self.updateButton()
-        
-    def revert(self):
-        self.disabled = False
-        self.cmdText.config(state=NORMAL)
-        self.button.config(state=NORMAL)
-        self.button.config(text=self.cmd["button"])
-        self.cmdText.delete(0, END)
-        self.cmdText.insert(0, self.cmd["cmd"])
-        self.setToolTip(self.cmd["tooltip"])
-        self.updateButton()
-
-    def delete(self):
-        if self.disabled:
-            self.disabled = False
-            self.cmdText.config(state=NORMAL)
-            self.button.config(state=NORMAL)
-        else:
-            self.disabled = True
-            self.cmdText.config(state=DISABLED)
-            self.button.config(state=DISABLED)
-#         self.optionsButton.config(hide=True)
-        self.updateButton()
-
-    def rename(self):
-        """ Change the button text """
-        name = RunnerNamePopup(self.parent.winfo_toplevel(), allowCancel=True).show()
-        if name:
-            self.button["text"] = name
-        self.updateButton()
-        
-    def editToolTip(self):
-        tooltip = RunnerToolTipPopup(self.parent.winfo_toplevel(), initialText=self.buttonTT.text).show()
-        if tooltip is None:
-            return
-        self.setToolTip(tooltip)
-        self.updateButton()
-        
-    def updateButton(self, event=None):
-        """ Call this to update the modified state of the button and the app """
-        if event:
-            widget = event.widget.parent
-        else:
-            widget = self
-        widget.button.config(text=(widget.button["text"].rstrip("*")+("*" if widget.isModified() else "")))
-        if self.updateCB:
-            self.updateCB()
-        
-    def execute(self):
-        print("\nRunning {}:".format(self.cmd["button"]))
-        subprocess.call(self.cmdText.get(), shell=True)
-        print("=" * 80)
-        
-#----------------------------------------------------------------------------
-class RunnerApp(object):
-    """ A simple GUI for running a canned set of commands on demand.
+    def readStore(self):
+        """ Return the command file and a CmdStore of its commands, or (None, None) if it can't be read """
+        try:
+            cmdFile = readCmdFile(self.args.commandFile)
+        except (IOError, ValueError) as e:
+            print("runner: can't read {}: {}".format(self.args.commandFile, e), file=sys.stderr)
+            return None, None
+        self.sessions = cmdFile.sessions
+        store = CmdStore()
+        store.load(cmdFile.cmds)
+        return cmdFile, store
     
-        The commands are loaded from a file in JSON format.  The file
-        contains an array of objects containing a "button" field, a "cmd"
-        field, and an optional "tooltip" field, as in the following example:
-        
-        [
-           {
-              "button" : "Backup Database",
-              "cmd"    : "pgdump > db_backup.sql",
-              "tooltip": "Dump the database contents to a SQL file"
-           },
-           {
-              "button" : "Restore Database",
-              "cmd"    : "psql -U admin < db_backup.sql",
-              "tooltip": "Restore the database contents from an SQL file"
-           }
-        ]
-    """
-    DEFAULT_CMD_WIDTH = 80
+    def findCmd(self, store, name):
+        """ The command whose button is name, an argument from the command line, or None """
+        name = argText(name)
+        record = store.find(name)
+        if record is None:
+            print("runner: no command named {!r} in {}".format(name, self.args.commandFile), file=sys.stderr)
+            return None
+        return record.cmd
     
-    def __init__(self):
-        self.args     = None
-        self.cmds     = None
-        self.title    = None
-        self.cmdWidth = 0
-        self.root     = None
-        self.fileMenu = None
-        self.widgets  = []
-        self.quit     = False
-        self.cmdFile = None
+    def runCmds(self):
+        cmdFile, store = self.readStore()
+        if store is None:
+            return 2
+        cmds = []
+        for name in self.args.run:
+            cmd = self.findCmd(store, name)
+            if cmd is None:
+                return 2
+            cmds.append(cmd)
         
-    @property
-    def isModified(self):
-        return self.fileMenu.isModified
-    
-    @isModified.setter
-    def isModified(self, value):
-        self.fileMenu.setModified(value)
-    
-    def parseCmdLine(self):
-        parser = ArgumentParser(description=self.__doc__)
-        parser.add_argument("-w", "--cmdWidth", type=int, default=0,
-                            help="The displayed width of the command field (default {})".format(self.DEFAULT_CMD_WIDTH))
-        parser.add_argument(dest="commandFile",
-                            help="A file containing button labels and commands, in JSON format")
-        self.args = parser.parse_args()
+        try:
+            self.history = History.forCmdFile(self.args.commandFile)
+        except sqlite3.Error:
+            pass  # run the commands anyway, without recording them
         
-        if self.args.cmdWidth >= 0:
-            self.cmdWidth = self.args.cmdWidth
+        self.executor.maxParallel = self.args.maxParallel if self.args.maxParallel > 0 else cmdFile.maxParallel
+        if self.args.deps:
+            return self.runPipeline(store, [c["button"] for c in cmds])
         
-        self.title = os.path.splitext(os.path.basename(sys.argv[0]))[0].capitalize()
-
-    def onFileOpen(self, path=None):
-        """ Called by the fileMenu.onFileOpen method """
-        if path:
-            self.fileMenu.currFile = path
-        if self.fileMenu.currFile and os.path.exists(self.fileMenu.currFile):
-            self.cmdFile = self.fileMenu.currFile
-            self.onExit(quit=False)
+        self.prefix = len(cmds) > 1 and self.executor.maxParallel > 1
+        runs = []
+        for cmd in cmds:
+            runs.append(self.submit(cmd))
+        if not self.wait():
+            return 130
+        return self.exitCode(runs)
     
-    def loadCmds(self):
-        self.cmds = []
-        if self.cmdFile and os.path.exists(self.cmdFile):
-            self.readCmds()
-            for cmd in self.cmds:
-                self.addWidget(cmd)
+    def runPipeline(self, store, targets):
+        """ Run targets after their dependencies.  Return the process exit code. """
+        runs = {}  # name -> CmdRun
+        def submit(name):
+            runs[name] = self.submit(store.find(name).cmd)
+            return runs[name]
+        def onSkip(name):
+            print("runner: skipping {} because a command it depends on did not succeed".format(outputText(name)), file=sys.stderr)
         
-    def readCmds(self):
-        self.title = os.path.splitext(os.path.basename(self.cmdFile))[0]
-        with open(self.cmdFile, "r") as f:
-            data = json.load(f)
-            if isinstance(data, (list, tuple)):
-                self.cmds = data
-            else:
-                if "title" in data:
-                    self.title = data["title"]
-                if "cmds" in data:
-                    self.cmds = data["cmds"]
-                if "width" in data and self.cmdWidth <= 0:
-                    self.cmdWidth = data["width"]
-
-    
-#     def makeCmdButton(self, parent, cmd, row):
-#         cmdText = Entry(parent, width=self.cmdWidth)
-#         cmdText.grid(row=row, column=1, sticky="ew", ipady=2)
-#         cmdText.delete(0, END)
-#         cmdText.insert(0, cmd["cmd"])
-# 
-#         button = Button(parent, text=cmd["button"], command=lambda: self.execute(cmd["button"], cmdText))
-#         button.grid(row=row, column=0, sticky="ew", padx=2, pady=2)
-#         
-#         if "tooltip" in cmd:
-#             ToolTip(button, cmd["tooltip"])
-#             ToolTip(cmdText, cmd["tooltip"])
+        pipeline = Pipeline(dependencyGraph(store.cmds()), targets, submit, onSkip)
+        self.prefix = len(pipeline.nodes) > 1 and self.executor.maxParallel > 1
+        def onRunEvent(event, run, data):
+            self.onRunEvent(event, run, data)
+            pipeline.onRunEvent(event, run, data)
         
-    def setTitle(self):
-        self.root.title("{}: {}{}".format(self.title, os.path.basename(self.cmdFile), " *" if self.isModified else ""))
+        pipeline.start()
+        if not self.wait(onRunEvent):
+            return 130
+        return self.exitCode([runs[name] for name in pipeline.nodes if name in runs])
     
-    def onModified(self, isModified):
-        self.setTitle()
-    
-    def onRevert(self):
-        for w in self.widgets:
-            if w.added:
-                w.delete()
-            else:
-                w.revert()
-        self.isModified = False
-        return True
-    
-    def onUpdate(self):
-        """ Check whether any widget is modified, and set the isModified flag accordingly """
-        for w in self.widgets:
-            if w.isModified():
-                self.isModified = True
-                return
-        self.isModified = False
-        
-    def addMenuBar(self):
-        """ Attaches a Menu to the root window """
-        menubar = Menu(self.root)
-        self.root.config(menu=menubar)
-        
-        self.fileMenu = RunnerFileMenu(menubar, tearoff=False)
-        menubar.add_cascade(label="File", menu=self.fileMenu)
-        self.fileMenu.onModifiedCB = self.onModified
-        self.fileMenu.onRevertCB   = self.onRevert
-        self.fileMenu.onFileOpenCB = lambda f: self.onFileOpen(f)
-        self.fileMenu.saveToFileCB = self.saveToFile
-        self.fileMenu.onExitCB     = self.onExit
-        self.fileMenu.currFile = self.args.commandFile
-        
-        editMenu = Menu(menubar, tearoff=False)
-#         editMenu.add_command(label="Preferences...", command=self.onEditPreferences)
-        menubar.add_cascade(label="Edit", menu=editMenu)
-        
-        actionMenu = Menu(menubar, tearoff=False)
-        actionMenu.add_command(label="Add Button", command=self.onAddButton)
-        menubar.add_cascade(label="Actions", menu=actionMenu)
+    def runBenchmark(self):
+        """ Run the command named by args.benchmark repeatedly and print its timings.
+            Its output is discarded, and the runs are not recorded in the history.
+        """
+        cmdFile, store = self.readStore()
+        if store is None:
+            return 2
+        cmd = self.findCmd(store, self.args.benchmark)
+        if cmd is None:
+            return 2
         
-        menubar.add_command(label=" + ", command=self.onAddButton, foreground="red")
-    
-    def onAddButton(self):
-        name = RunnerNamePopup(self.root).show()
-        if name is None:
-            return
+        def submit(slot):
+            return self.executor.submit(cmd["button"], cmd["cmd"], owner=slot, maxLines=self.BENCHMARK_OUTPUT_LINES,
+                                        timeout=cmd.get("timeout", 0),
+                                        limits=cmd.get("limits"),
+                                        shell=cmd.get("shell"),
+                                        session=sessionFor(cmd, self.sessions),
+                                        log=False)
         
-        cmd = {
-            "button":  name,
-            "cmd":     "",
-            "tooltip": name
-        }
-        self.cmds.append(cmd)
-
-#         self.makeCmdButton(self.root, cmd, self.row)
-#         self.row += 1
-        w = self.addWidget(cmd)
-        w.updateButton()
-        self.isModified = True
+        benchmark = CmdBenchmark(cmd["button"], cmd["cmd"], submit, count=self.args.count,
+                                 duration=self.args.duration, warmup=self.args.warmup,
+                                 concurrency=self.args.concurrency)
+        self.executor.maxParallel = benchmark.concurrency
+        benchmark.start()
+        finished = self.wait(benchmark.onRunEvent)
+        print(outputText(benchmark.describe()))
+        if self.args.export:
+            benchmark.export(self.args.export)
+        if not finished:
+            return 130
+        return 1 if benchmark.failures or not benchmark.samples else 0
     
-    def widgetCmds(self):
-        widgetData = []
-        for w in self.widgets:
-            widgetData.append(w.cmd)
-        return widgetData
+    def submit(self, cmd):
+        snapshot = self.buildCache.check(cmd, cmd["cmd"])
+        if snapshot is not None and snapshot.upToDate and not self.args.force:
+            return self.executor.submitUpToDate(cmd["button"], cmd["cmd"])
+        run = self.executor.submit(cmd["button"], cmd["cmd"],
+                                   maxLines=cmd.get("maxOutputLines", 0),
+                                   maxBytes=cmd.get("maxOutputBytes", 0),
+                                   timeout=cmd.get("timeout", 0),
+                                   limits=cmd.get("limits"),
+                                   shell=cmd.get("shell"),
+                                   group=self.group,
+                                   session=sessionFor(cmd, self.sessions),
+                                   onOutput=self.write)
+        if snapshot is not None:
+            self.snapshots[run] = snapshot
+        return run
     
-    def saveToFile(self, path):
-        for w in self.widgets:
-            w.commit()
-            
-        data = {
-                "title": self.title,
-                "width": self.cmdWidth,
-                "cmds" : self.widgetCmds(),
-               }
-        with open(path, "w") as f:
-            json.dump(data, f, indent=True)
+    def wait(self, handler=None):
+        """ Process executor events until nothing is running.
+            On Ctrl-C, cancel everything and return False.
+        """
+        handler = handler or self.onRunEvent
+        try:
+            while self.executor.isBusy:
+                self.executor.poll(handler, timeout=self.POLL_TIMEOUT)
+        except KeyboardInterrupt:
+            for run in list(self.executor.runs):
+                self.executor.cancel(run)
+            while self.executor.isBusy:
+                self.executor.poll(self.onRunEvent, timeout=self.POLL_TIMEOUT)
+            return False
         return True
     
-    def addWidget(self, cmd):
-        """ Add a widget to the root frame at the specified row.
-            The CmdWidget occupies one row and two columns of the grid.
+    @staticmethod
+    def exitCode(runs):
+        """ 0 if every run succeeded, otherwise the shell-style exit code of the first failure """
+        for run in runs:
+            if run.state == CmdRun.SUCCEEDED:
+                continue
+            if run.error:
+                return 127
+            if run.timedOut:
+                return 124  # as timeout(1) does
+            if run.returncode is None:
+                return 130  # cancelled before it started
+            if run.returncode < 0:
+                return 128 - run.returncode  # killed by a signal
+            return run.returncode
+        return 0
+    
+    def onRunEvent(self, event, run, data):
+        if event == "exit":
+            if self.partial.get(run):
+                self.write(run, b"\n")
+            snapshot = self.snapshots.pop(run, None)
+            if snapshot is not None and run.state == CmdRun.SUCCEEDED:
+                self.buildCache.record(snapshot)
+            if self.history is not None:
+                self.history.record(run)
+            if run.upToDate:
+                print("runner: {} is up to date".format(outputText(run.name)), file=sys.stderr)
+            elif run.error:
+                print("runner: could not run {}: {}".format(outputText(run.name), run.error), file=sys.stderr)
+            elif run.state == CmdRun.TIMED_OUT:
+                print("runner: {} timed out after {}s".format(outputText(run.name), run.timeout), file=sys.stderr)
+            elif run.state == CmdRun.CANCELLED:
+                print("runner: {} was cancelled".format(outputText(run.name)), file=sys.stderr)
+            elif run.state == CmdRun.FAILED:
+                print("runner: {} failed with exit code {}".format(outputText(run.name), run.returncode), file=sys.stderr)
+            self.partial.pop(run, None)
+    
+    def write(self, run, data):
+        """ Write output of run to stdout, prefixing each line with the run's name if needed.
+            This is the runs' onOutput, so it sees all of their output, on their reader threads.
         """
-        w = CmdWidget(self.root, cmd, self.row, added=True)
-        self.row += 1
-        self.widgets.append(w)
-        return w
-        
-    def buildGUI(self):
-        self.root = Tk()
-        self.addMenuBar()
-        self.setTitle()
-
-        self.root.grid_columnconfigure(1, weight=1)
-        self.row = 0
-            
-        CmdWidget.updateCB = self.onUpdate
-        self.root.bind("<Control-s>", lambda e: self.fileMenu.onFileSave())
-        self.root.protocol("WM_DELETE_WINDOW", self.fileMenu.onExit)
-
-    def onExit(self, quit=True):
-        self.quit = quit
-        self.root.destroy()
-
-    def run(self, args=None):
-        self.parseCmdLine()
-        self.cmdFile = self.args.commandFile
-        firstTime = True
-        
-        while not self.quit:
-#         self.readCmds()
-            if firstTime or (self.cmdFile and os.path.exists(self.cmdFile)):
-                self.buildGUI()
-                #self.onFileOpen(self.args.commandFile)
-                self.loadCmds()
-                #self.cmdFile = None
-                
-                self.root.mainloop()
-                firstTime = False
-        
+        with self.outputLock:
+            if self.prefix:
+                lines = (self.partial.get(run, b"") + data).split(b"\n")
+                self.partial[run] = lines.pop()
+                data = b"".join("[{}] {}\n".format(outputText(run.name), line) for line in lines)
+            if self.stdoutError is not None:
+                return  # keep reading, so the command isn't blocked on a full pipe
+            try:
+                sys.stdout.write(data)
+                sys.stdout.flush()
+            except IOError as e:
+                self.stdoutError = e
+                print("runner: can't write the output: {}".format(e), file=sys.stderr)
+
+#----------------------------------------------------------------------------
+def parseCmdLine(argv=None):
+    parser = ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("-w", "--cmdWidth", type=int, default=0,
+                        help="The displayed width of the command field (default {})".format(DEFAULT_CMD_WIDTH))
+    parser.add_argument("-j", "--maxParallel", "--jobs", type=int, default=0,
+                        help="The maximum number of commands to run at once (default: one per CPU)")
+    parser.add_argument("-r", "--run", metavar="NAME", action="append", default=[],
+                        help="Run the command whose button is NAME without opening the GUI; may be repeated")
+    parser.add_argument("-d", "--deps", action="store_true",
+                        help="With --run, also run the commands' dependencies")
+    parser.add_argument("-f", "--force", action="store_true",
+                        help="With --run, run commands even if they are up to date")
+    parser.add_argument("-b", "--benchmark", metavar="NAME",
+                        help="Run the command whose button is NAME repeatedly without opening the GUI, "
+                             "and print its timings")
+    parser.add_argument("-n", "--count", type=int, default=10,
+                        help="With --benchmark, how many times to run the command (default 10)")
+    parser.add_argument("--duration", type=float, default=0, metavar="SECONDS",
+                        help="With --benchmark, run the command for this long instead of --count times")
+    parser.add_argument("--warmup", type=int, default=1, metavar="N",
+                        help="With --benchmark, how many runs to do before measuring (default 1)")
+    parser.add_argument("--concurrency", type=int, default=1, metavar="N",
+                        help="With --benchmark, how many runs to keep going at once (default 1)")
+    parser.add_argument("--export", metavar="FILE",
+                        help="With --benchmark, write the results to FILE as JSON, or as CSV if it ends in .csv")
+    parser.add_argument("-m", "--metrics", metavar="FILE",
+                        help="Write runner's own performance metrics to FILE on exit")
+    parser.add_argument("--logDir", metavar="DIR",
+                        help="Write each run's output to a log file in a new directory under DIR "
+                             "(default ~/.cache/runner/runs)")
+    parser.add_argument("--noLogs", action="store_true",
+                        help="Don't write log files; only the tail of each run's output is kept")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Run commands in the executor daemon, starting it if it isn't running")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="The executor daemon's socket (default $XDG_RUNTIME_DIR/runner/executor.sock)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run the executor daemon; --jobs caps the commands it runs for all its clients")
+    parser.add_argument("--idleExit", type=float, default=0, metavar="SECONDS",
+                        help="With --serve, exit after SECONDS with no clients and nothing running")
+    parser.add_argument("--status", action="store_true",
+                        help="List the executor daemon's recent and running commands")
+    parser.add_argument(dest="commandFile", nargs="?",
+                        help="A file containing button labels and commands, in JSON format")
+    parser.add_argument(dest="moreFiles", nargs="*", metavar="FILE",
+                        help="More command files to open as tabs")
+    args = parser.parse_args(argv)
+    if args.commandFile is None and not (args.serve or args.status):
+        parser.error("too few arguments")
+    return args
 
+def argText(arg):
+    """ A command line argument as unicode, like the text read from a command file """
+    if isinstance(arg, unicode):
+        return arg
+    for encoding in (sys.getfilesystemencoding() or "utf-8", "utf-8"):
+        try:
+            return arg.decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            pass
+    return arg.decode("latin-1")
+
+def outputText(text):
+    """ text, e.g. a button name, as bytes for stdout and stderr (UTF-8, like the command file) """
+    return text.encode("utf-8") if isinstance(text, unicode) else text
+
+def serve(args):
+    """ Run the executor daemon until it is interrupted (or idle for --idleExit seconds) """
+    server = ExecutorServer(args.socket, args.maxParallel, None if args.noLogs else RunLogs(args.logDir),
+                            args.idleExit)
+    try:
+        server.serve()
+    except DaemonError as e:
+        print("runner: {}".format(e), file=sys.stderr)
+        return 1
+    return 0
+
+def printStatus(args):
+    """ Print the executor daemon's runs, one per line """
+    try:
+        executor = ExecutorDaemon.connect(args.socket)
+        runs = executor.status()
+        executor.close()
+    except DaemonError as e:
+        print("runner: {}".format(e), file=sys.stderr)
+        return 1
+    now = time.time()
+    for info in runs:
+        started = time.strftime("%H:%M:%S", time.localtime(info["startTime"])) if info["startTime"] else "-"
+        duration = formatDuration((info["endTime"] or now) - info["startTime"]) if info["startTime"] else "-"
+        print("{:>5}  {:<10} {:>7}  {}  {:>8}  {}{}".format(
+                  info["run"], info["state"], info["pid"] or "-", started, duration, info["name"],
+                  "  ({})".format(info["group"]) if info["group"] else ""))
+    return 0
+
+def main(argv=None):
+    args = parseCmdLine(argv)
+    if args.serve:
+        return serve(args)
+    if args.status:
+        return printStatus(args)
+    if args.run or args.benchmark:
+        try:
+            runner = HeadlessRunner(args)
+        except DaemonError as e:
+            print("runner: {}".format(e), file=sys.stderr)
+            return 2
+        return runner.run()
+    
+    from RunnerGUI import RunnerApp  # only load Tk when the GUI is wanted
+    RunnerApp().run(args)
+    return 0
+    
 #----------------------------------------------------------------------------
 if __name__ == '__main__':
-    app = RunnerApp()
-    app.run()
-    sys.exit(0)
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/python
+#
+#   File: test_CmdBenchmark.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Unit tests for CmdBenchmark.py.  Run with:  python -m unittest discover -p "test_*.py"
+"""
+from __future__ import print_function, division
+
+import unittest
+
+from Executor import CmdRun
+from CmdBenchmark import CmdBenchmark
+
+
+#----------------------------------------------------------------------------
+class CmdBenchmarkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.submitted = []  # (CmdRun, slot)
+
+    def submit(self, slot):
+        run = CmdRun("cmd", "true", owner=slot)
+        self.submitted.append((run, slot))
+        return run
+
+    def finish(self, benchmark, run):
+        run.state, run.startTime, run.endTime = CmdRun.SUCCEEDED, 1.0, 2.0
+        benchmark.onRunEvent("exit", run, 0)
+
+    def testMeasuredRunsWaitForTheWarmUp(self):
+        benchmark = CmdBenchmark("cmd", "true", self.submit, count=4, warmup=2, concurrency=3)
+        benchmark.start()
+        self.assertEqual(len(self.submitted), 2)  # only the warm-up runs
+        self.assertIsNone(benchmark.startTime)
+        self.finish(benchmark, self.submitted[0][0])
+        self.assertEqual(len(self.submitted), 2)  # the other warm-up run is still going
+        self.finish(benchmark, self.submitted[1][0])
+        self.assertEqual(len(self.submitted), 5)  # now every slot runs a measured run
+        self.assertEqual(sorted(slot for run, slot in self.submitted[2:]), [0, 1, 2])
+        for run, slot in self.submitted[2:]:
+            self.finish(benchmark, run)
+        self.finish(benchmark, self.submitted[5][0])
+        self.assertTrue(benchmark.isDone)
+        self.assertEqual(len(benchmark.samples), 4)
+
+    def testNoWarmUp(self):
+        benchmark = CmdBenchmark("cmd", "true", self.submit, count=2, concurrency=4)
+        benchmark.start()
+        self.assertEqual(len(self.submitted), 2)
+        for run, slot in list(self.submitted):
+            self.finish(benchmark, run)
+        self.assertTrue(benchmark.isDone)
+        self.assertEqual(benchmark.results()["runs"], 2)
+
+    def testCancelledRunsArentSamples(self):
+        benchmark = CmdBenchmark("cmd", "true", self.submit, count=3, concurrency=2)
+        benchmark.start()
+        self.finish(benchmark, self.submitted[0][0])
+        benchmark.stop()
+        run = self.submitted[1][0]
+        run.state, run.startTime, run.endTime = CmdRun.CANCELLED, 1.0, 1.1
+        benchmark.onRunEvent("exit", run, None)
+        self.finish(benchmark, self.submitted[2][0])
+        self.assertTrue(benchmark.isDone)
+        results = benchmark.results()
+        self.assertEqual((results["runs"], results["failures"], results["cancelled"]), (2, 0, 1))
+        self.assertEqual(results["wall"]["min"], 1.0)
+
+#----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+#!/usr/bin/python
+#
+#   File: test_CmdFile.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Unit tests for CmdFile.py.  Run with:  python -m unittest discover -p "test_*.py"
+"""
+from __future__ import print_function, division
+
+import unittest
+
+from CmdFile import CmdFileError, checkRunOptions
+
+
+#----------------------------------------------------------------------------
+class CheckRunOptionsTestCase(unittest.TestCase):
+    def check(self, **fields):
+        cmd = {"button": "A", "cmd": "true"}
+        cmd.update(fields)
+        checkRunOptions([cmd], {"dev": "cd src"})
+
+    def testValid(self):
+        self.check()
+        self.check(timeout=2.5, shell=False, inputs="src/*.c", outputs=["a.out", "a.map"])
+        self.check(session="dev", inputs=[])
+
+    def testInvalid(self):
+        for fields in [{"timeout": -1}, {"timeout": "10"}, {"shell": "yes"}, {"session": "prod"},
+                       {"session": "dev", "limits": {"cpu": 10}}, {"limits": {"disk": 1}},
+                       {"inputs": 5}, {"inputs": ["a", 5]}, {"outputs": {"a": "b"}}]:
+            self.assertRaises(CmdFileError, self.check, **fields)
+
+#----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()
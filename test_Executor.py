@@ -0,0 +1,175 @@
+#!/usr/bin/python
+#
+#   File: test_Executor.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Unit tests for Executor.py.  Run with:  python -m unittest discover -p "test_*.py"
+"""
+from __future__ import print_function, division
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+from Executor import OutputBuffer, Executor, CmdRun, commandArgv
+from OutputLog import RunLogs
+
+
+#----------------------------------------------------------------------------
+class OutputBufferTestCase(unittest.TestCase):
+    def testKeepsEverythingUnderTheCaps(self):
+        buf = OutputBuffer(maxLines=10, maxBytes=100)
+        buf.write(b"one\ntw")
+        buf.write(b"o\nthree\n")
+        self.assertEqual(buf.getvalue(), b"one\ntwo\nthree\n")
+        self.assertEqual(buf.dropped, 0)
+
+    def testLineCap(self):
+        buf = OutputBuffer(maxLines=3, maxBytes=1000)
+        for i in range(10):
+            buf.write(b"line %d\n" % i)
+        self.assertEqual(buf.getvalue(), b"line 7\nline 8\nline 9\n")
+        self.assertEqual(buf.droppedLines, 7)
+        self.assertEqual(buf.nbytes, len(buf.getvalue()))
+
+    def testByteCapKeepsTheNewestLine(self):
+        buf = OutputBuffer(maxBytes=10)
+        buf.write(b"aaaaaa\n")
+        buf.write(b"bbbbbb\n")
+        self.assertEqual(buf.getvalue(), b"bbbbbb\n")
+        self.assertEqual(buf.nbytes, 7)
+        buf.write(b"cc\n")
+        self.assertEqual(buf.getvalue(), b"bbbbbb\ncc\n")
+
+    def testByteCapCutsALongLine(self):
+        buf = OutputBuffer(maxBytes=10)
+        buf.write(b"x" * 6)
+        buf.write(b"y" * 8)
+        self.assertEqual(buf.getvalue(), b"x" * 2 + b"y" * 8)
+        self.assertEqual(buf.nbytes, 10)
+        self.assertEqual(buf.cut, 1)
+
+    def testOversizeChunk(self):
+        buf = OutputBuffer(maxBytes=10)
+        buf.write(b"old\n")
+        buf.write(b"0123456789abcdef\n")
+        self.assertEqual(buf.getvalue(), b"789abcdef\n")
+        self.assertEqual(buf.nbytes, len(buf.getvalue()))
+        self.assertEqual(buf.dropped, 4 + 7)
+
+    def testSince(self):
+        buf = OutputBuffer(maxLines=2, maxBytes=1000)
+        buf.write(b"a\n")
+        data, offset, droppedLines, cut, reset = buf.since(0)
+        self.assertEqual((data, reset), (b"a\n", False))
+        buf.write(b"b\n")
+        data, offset, droppedLines, cut, reset = buf.since(offset, cut)
+        self.assertEqual((data, reset), (b"b\n", False))
+        buf.write(b"c\nd\ne\n")  # drops unread output
+        data, offset, droppedLines, cut, reset = buf.since(offset, cut)
+        self.assertEqual((data, reset, droppedLines), (b"d\ne\n", True, 3))
+
+#----------------------------------------------------------------------------
+class CommandArgvTestCase(unittest.TestCase):
+    def testSimpleCommands(self):
+        self.assertEqual(commandArgv("make -j4 all"), ["make", "-j4", "all"])
+        self.assertEqual(commandArgv(u"echo 'two words' \"q\""), ["echo", "two words", "q"])
+
+    def testShellSyntaxNeedsTheShell(self):
+        for cmdText in ["ls | wc", "a && b", "echo $HOME", "ls *.py", "echo hi > out", "echo `date`",
+                        "cd src", "FOO=1 make", "echo 'unbalanced", "", "echo hi # comment"]:
+            self.assertIsNone(commandArgv(cmdText), cmdText)
+
+    def testShellField(self):
+        self.assertIsNone(commandArgv("make", shell=True))
+        self.assertEqual(commandArgv("echo $HOME", shell=False), ["echo", "$HOME"])
+        self.assertRaises(ValueError, commandArgv, "echo 'unbalanced", shell=False)
+        self.assertRaises(ValueError, commandArgv, "  ", shell=False)
+
+#----------------------------------------------------------------------------
+class ExecutorTestCase(unittest.TestCase):
+    def runToExit(self, executor, run, timeout=30):
+        deadline = time.time() + timeout
+        while not run.isDone and time.time() < deadline:
+            executor.poll(lambda *args: None, timeout=0.1)
+        return run
+
+    def testLongLinesOverTheByteCap(self):
+        # Used to kill the worker thread, so the run never exited
+        executor = Executor(1)
+        cmd = "{} -c \"import sys\nfor i in range(4): sys.stdout.write('x' * 200000 + '\\n')\"".format(sys.executable)
+        run = self.runToExit(executor, executor.submit("long lines", cmd))
+        self.assertEqual(run.state, CmdRun.SUCCEEDED)
+        self.assertEqual(run.output.getvalue(), b"x" * 200000 + b"\n")
+
+    @unittest.skipUnless(os.path.isdir("/proc/self/fd"), "needs /proc")
+    def testRunsDontInheritOtherRunsFds(self):
+        logDir = tempfile.mkdtemp(prefix="runner-test-")
+        try:
+            executor = Executor(2, logs=RunLogs(logDir))
+            sleeper = executor.submit("sleep", "sleep 30")
+            while sleeper.state != CmdRun.RUNNING:
+                executor.poll(lambda *args: None, timeout=0.1)
+            run = self.runToExit(executor, executor.submit("fds", "ls /proc/self/fd"))
+            executor.cancel(sleeper)
+            self.runToExit(executor, sleeper)
+            self.assertEqual(run.output.getvalue().split(), [b"0", b"1", b"2", b"3"])  # 3 is ls's own
+        finally:
+            shutil.rmtree(logDir, ignore_errors=True)
+
+    def testNonAsciiName(self):
+        # Used to raise in _dispatch() while naming the thread, leaking the slot
+        executor = Executor(1)
+        runs = [executor.submit(u"Caf\xe9", "true"), executor.submit("after", "true")]
+        for run in runs:
+            self.runToExit(executor, run, timeout=5)
+        self.assertEqual([run.state for run in runs], [CmdRun.SUCCEEDED] * 2)
+
+    def testSessionSharing(self):
+        executor = Executor(1)
+        spec = {"name": "s", "setup": "", "shell": "/bin/sh", "env": ["LISTED"]}
+        def run(cwd, **env):
+            env.setdefault("PATH", os.environ.get("PATH", ""))
+            return self.runToExit(executor, executor.submit("s", "pwd; echo $LISTED $OTHER", session=spec,
+                                                            cwd=cwd, env=env)).output.getvalue()
+        self.assertEqual(run("/", LISTED="a", OTHER="x"), b"/\na x\n")
+        self.assertEqual(run("/", LISTED="a", OTHER="y"), b"/\na x\n")  # the same shell
+        self.assertEqual(run("/", LISTED="b", OTHER="y"), b"/\nb y\n")
+        self.assertEqual(run("/tmp", LISTED="a", OTHER="y"), b"/tmp\na y\n")
+        self.assertEqual(len(executor.sessions), 3)
+        executor.KEEP_IDLE_SESSIONS = 1
+        run("/usr", LISTED="a")
+        self.assertEqual(sorted(key[1] for key in executor.sessions), ["/tmp", "/usr"])
+        executor.closeSessions()
+
+    def testExitCode(self):
+        executor = Executor(1)
+        run = self.runToExit(executor, executor.submit("fail", "exit 3"))
+        self.assertEqual((run.state, run.returncode), (CmdRun.FAILED, 3))
+
+    def testCheck(self):
+        executor = Executor(1)
+        run = self.runToExit(executor, executor.submit("up to date", "exit 3", check=lambda run: True))
+        self.assertEqual((run.state, run.upToDate, run.startTime), (CmdRun.SUCCEEDED, True, None))
+
+    def testCheckThatRaises(self):
+        # Used to kill the worker thread, so the run stayed pending
+        def check(run):
+            raise TypeError("'int' object is not iterable")
+        executor = Executor(1)
+        run = self.runToExit(executor, executor.submit("bad check", "true", check=check), timeout=5)
+        self.assertEqual(run.state, CmdRun.FAILED)
+        self.assertIn("not iterable", run.error)
+        self.assertFalse(executor.isBusy)
+
+#----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+#!/usr/bin/python
+#
+#   File: test_ExecutorDaemon.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Unit tests for ExecutorDaemon.py.  Run with:  python -m unittest discover -p "test_*.py"
+"""
+from __future__ import print_function, division
+
+import os
+import json
+import stat
+import socket
+import shutil
+import time
+import tempfile
+import threading
+import unittest
+
+from Executor import CmdRun
+from ExecutorDaemon import ExecutorServer, RemoteExecutor, DaemonError
+
+
+#----------------------------------------------------------------------------
+class ListenTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="runner-test-")
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None and self.server.listener is not None:
+            self.server.listener.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def testSocketIsPrivate(self):
+        self.server = ExecutorServer(os.path.join(self.dir, "sub", "executor.sock"))
+        self.server.listen()
+        self.assertEqual(stat.S_IMODE(os.stat(self.server.path).st_mode) & 0o077, 0)
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.dirname(self.server.path)).st_mode), 0o700)
+
+    def testAlreadyListening(self):
+        self.server = ExecutorServer(os.path.join(self.dir, "executor.sock"))
+        self.server.listen()
+        self.assertRaises(DaemonError, ExecutorServer(self.server.path).listen)
+
+    def testBindFailure(self):
+        path = os.path.join(self.dir, "x" * 200, "executor.sock")  # too long for a socket address
+        self.assertRaises(DaemonError, ExecutorServer(path).listen)
+
+#----------------------------------------------------------------------------
+class DaemonTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = os.path.realpath(tempfile.mkdtemp(prefix="runner-test-"))
+        self.cwd = os.getcwd()
+        self.server = ExecutorServer(os.path.join(self.dir, "executor.sock"), maxParallel=2)
+        self.thread = threading.Thread(target=self.server.serve)
+        self.thread.start()
+        deadline = time.time() + 5
+        while True:
+            try:
+                self.executor = RemoteExecutor(self.server.path)
+                break
+            except DaemonError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.executor.close()
+        self.server.stopped = True
+        self.thread.join()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def runToExit(self, run, timeout=30):
+        deadline = time.time() + timeout
+        while not run.isDone and time.time() < deadline:
+            self.executor.poll(lambda *args: None, timeout=0.1)
+        return run
+
+    def testRunsInTheClientsDirectoryAndEnvironment(self):
+        # Used to run in the directory of whichever client started the daemon
+        session = {"name": "s", "setup": "", "shell": "/bin/sh"}
+        for name in ("a", "b"):
+            os.mkdir(os.path.join(self.dir, name))
+            os.chdir(os.path.join(self.dir, name))
+            os.environ["RUNNER_TEST_DIR"] = name
+            try:
+                runs = [self.executor.submit("pwd", "pwd"),
+                        self.executor.submit("env", "echo $RUNNER_TEST_DIR"),
+                        self.executor.submit("session", "pwd", session=session)]
+            finally:
+                del os.environ["RUNNER_TEST_DIR"]
+            for run in runs:
+                self.runToExit(run)
+                self.assertEqual(run.state, CmdRun.SUCCEEDED, run.error)
+            self.assertEqual([run.output.getvalue().strip() for run in runs],
+                             [os.path.join(self.dir, name), name, os.path.join(self.dir, name)])
+
+    def testBadRequestsAreAnswered(self):
+        # Used to kill the client's reader thread, so it never got a reply
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.server.path)
+        replies = sock.makefile("rb")
+        requests = [{"id": 1, "op": "submit", "cmd": "true"},
+                    {"id": 2, "op": "submit", "name": "x", "cmd": "true", "env": {"A": 1}},
+                    {"id": 3},
+                    {"id": 4, "op": "subscribe", "run": "one"},
+                    [5],
+                    {"id": 6, "op": "hello"}]
+        try:
+            for request in requests:
+                sock.sendall(json.dumps(request) + "\n")
+            for i in range(1, 7):
+                reply = json.loads(replies.readline())
+                self.assertEqual(reply["id"], i if i != 5 else None)
+                self.assertEqual("error" in reply, i != 6, reply)
+        finally:
+            replies.close()
+            sock.close()
+
+#----------------------------------------------------------------------------
+class SilentDaemonTestCase(unittest.TestCase):
+    """ A daemon that says hello, then never answers """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="runner-test-")
+        self.path = os.path.join(self.dir, "executor.sock")
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.path)
+        self.listener.listen(1)
+        self.executor = None
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.start()
+
+    def serve(self):
+        sock, address = self.listener.accept()
+        lines = sock.makefile("rb")
+        hello = json.loads(lines.readline())
+        sock.sendall(json.dumps({"id": hello["id"], "maxParallel": 1, "pid": 0}) + "\n")
+        while lines.readline():
+            pass
+        sock.close()
+
+    def tearDown(self):
+        if self.executor is not None:
+            self.executor.close()
+        self.listener.close()
+        self.thread.join()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def testSubmitDoesntWaitForTheDaemon(self):
+        self.executor = executor = RemoteExecutor(self.path)
+        startTime = time.time()
+        run = executor.submit("x", "true")
+        self.assertLess(time.time() - startTime, 1)
+        self.assertEqual(run.state, CmdRun.PENDING)
+        executor.close()  # fails the run, as the connection is gone
+        deadline = time.time() + 5
+        while not run.isDone and time.time() < deadline:
+            executor.poll(lambda *args: None, timeout=0.1)
+        self.assertEqual(run.state, CmdRun.FAILED)
+        self.assertIsNotNone(run.error)
+
+#----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()
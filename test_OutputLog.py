@@ -0,0 +1,114 @@
+#!/usr/bin/python
+#
+#   File: test_OutputLog.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Unit tests for OutputLog.py.  Run with:  python -m unittest discover -p "test_*.py"
+"""
+from __future__ import print_function, division
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from OutputLog import RunLogs, LogIndex
+
+
+#----------------------------------------------------------------------------
+class RunLogsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="runner-test-")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def testPruneKeepsLiveProcessesDirs(self):
+        deadPid = 2 ** 22 + 1  # above the largest pid Linux hands out
+        old = ["20000101-000000-{}".format(os.getpid()), "20000101-000001-{}".format(deadPid)]
+        new = ["20990101-00000{}-{}".format(i, deadPid) for i in range(3)]
+        for name in old + new:
+            os.mkdir(os.path.join(self.root, name))
+        RunLogs(self.root).prune(3)
+        self.assertEqual(sorted(os.listdir(self.root)), sorted([old[0]] + new))
+
+    def testPathFor(self):
+        logs = RunLogs(self.root)
+        first, second = logs.pathFor("Build Docs"), logs.pathFor("a/b")
+        self.assertEqual(os.path.dirname(first), os.path.dirname(second))
+        self.assertEqual(os.path.basename(first), "0001-Build_Docs.log")
+        self.assertEqual(os.path.basename(second), "0002-a_b.log")
+
+#----------------------------------------------------------------------------
+class LogIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(prefix="runner-test-", suffix=".log")
+        os.close(fd)
+        self.index = None
+
+    def tearDown(self):
+        if self.index is not None:
+            self.index.close()
+        os.remove(self.path)
+
+    def write(self, data):
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    def testEmpty(self):
+        self.index = LogIndex(self.path)
+        self.assertFalse(self.index.update())
+        self.assertEqual(self.index.lineCount, 0)
+        self.assertEqual(self.index.lines(0, 10), [])
+        self.assertIsNone(self.index.search(re.compile(b"x"), 0))
+
+    def testLinesAcrossBlocks(self):
+        LogIndex.BLOCK_SIZE, blockSize = 64, LogIndex.BLOCK_SIZE
+        try:
+            self.write(b"".join(b"line %d\n" % i for i in range(100)) + b"partial")
+            self.index = LogIndex(self.path)
+            self.index.update()
+            self.assertEqual(self.index.lineCount, 101)
+            self.assertEqual(self.index.lines(0, 2), [u"line 0", u"line 1"])
+            self.assertEqual(self.index.lines(98, 10), [u"line 98", u"line 99", u"partial"])
+            self.assertEqual(self.index.lineOf(self.index.offsetOf(57)), 57)
+        finally:
+            LogIndex.BLOCK_SIZE = blockSize
+
+    def testGrowsWithTheFile(self):
+        self.write(b"a\nb")
+        self.index = LogIndex(self.path)
+        self.index.update()
+        self.assertEqual(self.index.lines(0, 10), [u"a", u"b"])
+        self.write(b"c\nd\n")
+        self.assertTrue(self.index.update())
+        self.assertEqual(self.index.lines(0, 10), [u"a", u"bc", u"d"])
+        self.assertEqual(self.index.lineCount, 3)
+
+    def testCarriageReturnsDontSplitLines(self):
+        self.write(b"progress 1\rprogress 2\nnext\n")
+        self.index = LogIndex(self.path)
+        self.index.update()
+        self.assertEqual(self.index.lineCount, 2)
+
+    def testSearch(self):
+        self.write(b"apple\nbanana\ncherry\nbanana split\n")
+        self.index = LogIndex(self.path)
+        self.index.update()
+        regex = re.compile(b"banana", re.MULTILINE)
+        first = self.index.search(regex, 0)
+        self.assertEqual(self.index.lineOf(first[0]), 1)
+        second = self.index.search(regex, 2)
+        self.assertEqual(self.index.lineOf(second[0]), 3)
+        self.assertEqual(self.index.search(regex, 3, backwards=True), first)
+        self.assertIsNone(self.index.search(re.compile(b"durian"), 0))
+
+#----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/python
+#
+#   File: test_Pipeline.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Unit tests for Pipeline.py.  Run with:  python -m unittest discover -p "test_*.py"
+"""
+from __future__ import print_function, division
+
+import unittest
+
+from Executor import CmdRun
+from Pipeline import Pipeline, dependencyGraph, findCycle, dependencyClosure
+
+
+#----------------------------------------------------------------------------
+class DependencyTestCase(unittest.TestCase):
+    def testDependencyGraph(self):
+        cmds = [{"button": "build", "depends": ["fetch"]}, {"button": "fetch"},
+                {"button": "build", "depends": ["other"]}]
+        self.assertEqual(dependencyGraph(cmds), {"build": ["fetch"], "fetch": []})
+
+    def testNoCycle(self):
+        self.assertIsNone(findCycle({}))
+        self.assertIsNone(findCycle({"a": ["b", "c"], "b": ["c"], "c": [], "d": ["a", "missing"]}))
+
+    def testCycle(self):
+        cycle = findCycle({"a": ["b"], "b": ["c"], "c": ["a"], "d": []})
+        self.assertEqual(cycle[0], cycle[-1])
+        self.assertEqual(sorted(cycle[:-1]), ["a", "b", "c"])
+        self.assertEqual(findCycle({"a": ["a"]}), ["a", "a"])
+
+    def testCycleOffTheStartingPath(self):
+        cycle = findCycle({"a": ["b", "c"], "b": [], "c": ["d"], "d": ["c"]})
+        self.assertEqual(sorted(cycle), ["c", "c", "d"])
+
+    def testClosureOrder(self):
+        graph = {"test": ["build"], "build": ["fetch", "configure"], "configure": ["fetch"], "fetch": [],
+                 "docs": []}
+        order = dependencyClosure(graph, ["test"])
+        self.assertEqual(sorted(order), ["build", "configure", "fetch", "test"])
+        for name in order:
+            for dep in graph[name]:
+                self.assertLess(order.index(dep), order.index(name))
+
+    def testClosureOfSeveralTargets(self):
+        graph = {"a": ["c"], "b": ["c"], "c": []}
+        self.assertEqual(dependencyClosure(graph, ["a", "b", "a"]), ["c", "a", "b"])
+        self.assertEqual(dependencyClosure(graph, []), [])
+
+#----------------------------------------------------------------------------
+class PipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.submitted = {}  # name -> CmdRun
+        self.skipped = []
+
+    def submit(self, name):
+        run = CmdRun(name, "true")
+        self.submitted[name] = run
+        return run
+
+    def finish(self, pipeline, name, state=CmdRun.SUCCEEDED):
+        run = self.submitted[name]
+        run.state = state
+        pipeline.onRunEvent("exit", run, 0 if state == CmdRun.SUCCEEDED else 1)
+
+    def testRunsIndependentBranchesTogether(self):
+        graph = {"test": ["lib", "app"], "lib": ["fetch"], "app": ["fetch"], "fetch": []}
+        pipeline = Pipeline(graph, ["test"], self.submit)
+        pipeline.start()
+        self.assertEqual(sorted(self.submitted), ["fetch"])
+        self.finish(pipeline, "fetch")
+        self.assertEqual(sorted(self.submitted), ["app", "fetch", "lib"])
+        self.finish(pipeline, "lib")
+        self.assertNotIn("test", self.submitted)
+        self.finish(pipeline, "app")
+        self.finish(pipeline, "test")
+        self.assertTrue(pipeline.isDone)
+        self.assertTrue(pipeline.succeeded)
+
+    def testFailureSkipsDependents(self):
+        graph = {"deploy": ["test"], "test": ["build"], "build": [], "lint": []}
+        pipeline = Pipeline(graph, ["deploy", "lint"], self.submit, onSkip=self.skipped.append)
+        pipeline.start()
+        self.assertEqual(sorted(self.submitted), ["build", "lint"])
+        self.finish(pipeline, "build", CmdRun.FAILED)
+        self.assertEqual(sorted(self.skipped), ["deploy", "test"])
+        self.assertFalse(pipeline.isDone)  # lint is still running
+        self.finish(pipeline, "lint")
+        self.assertTrue(pipeline.isDone)
+        self.assertFalse(pipeline.succeeded)
+
+    def testSubmitFailure(self):
+        pipeline = Pipeline({"b": ["a"], "a": []}, ["b"], lambda name: None, onSkip=self.skipped.append)
+        pipeline.start()
+        self.assertEqual(self.skipped, ["b"])
+        self.assertTrue(pipeline.isDone)
+
+#----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()
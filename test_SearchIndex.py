@@ -0,0 +1,67 @@
+#!/usr/bin/python
+#
+#   File: test_SearchIndex.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Unit tests for SearchIndex.py.  Run with:  python -m unittest discover -p "test_*.py"
+"""
+from __future__ import print_function, division
+
+import unittest
+
+from CmdStore import CmdStore
+from SearchIndex import SearchIndex
+
+
+#----------------------------------------------------------------------------
+class SearchIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.store = CmdStore()
+        self.store.load([{"button": "Build {}".format(i), "cmd": "make target{}".format(i)} for i in range(50)])
+        self.index = SearchIndex(self.store)
+
+    def names(self, query):
+        return [record.buttonValue for record in self.index.search(query)]
+
+    def testSearch(self):
+        self.index.sync()
+        self.assertTrue(self.index.built)
+        self.assertEqual(self.names("target4"), ["Build 4"] + ["Build 4{}".format(i) for i in range(10)])
+        self.assertEqual(self.names("BUILD 12"), ["Build 12"])
+        self.assertEqual(self.names("nothing"), [])
+        self.assertEqual(len(self.names("")), 50)
+
+    def testSearchWhileBuilding(self):
+        self.assertFalse(self.index.buildSome(20))
+        self.assertEqual(self.names("target4"), ["Build 4"] + ["Build 4{}".format(i) for i in range(10)])
+        self.assertFalse(self.index.built)  # searching doesn't build it all at once
+        self.assertEqual(self.names("target49"), ["Build 49"])  # narrowed from the previous query
+
+    def testChangesWhileBuilding(self):
+        self.index.buildSome(20)
+        self.store[3].setCmdValue("renamed")  # already indexed
+        self.store.add({"button": "Extra", "cmd": "make target3"})
+        while not self.index.buildSome(20):
+            pass
+        self.assertEqual(self.names("target3"), ["Build 30", "Build 31", "Build 32", "Build 33", "Build 34",
+                                                 "Build 35", "Build 36", "Build 37", "Build 38", "Build 39",
+                                                 "Extra"])
+        self.assertEqual(self.names("renamed"), ["Build 3"])
+
+    def testReloadWhileBuilding(self):
+        self.index.buildSome(20)
+        self.store.load([{"button": "Only", "cmd": "true"}])
+        while not self.index.buildSome(20):
+            pass
+        self.assertEqual(self.names("make"), [])
+        self.assertEqual(self.names("tru"), ["Only"])
+        self.assertEqual(sorted(self.index.texts.values()), ["only\ntrue\n"])
+
+#----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()
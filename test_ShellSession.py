@@ -0,0 +1,98 @@
+#!/usr/bin/python
+#
+#   File: test_ShellSession.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Unit tests for ShellSession.py.  Run with:  python -m unittest discover -p "test_*.py"
+"""
+from __future__ import print_function, division
+
+import os
+import unittest
+
+import ShellSession
+from ShellSession import ShellSession as Session, sessionSpec, sessionFor, partialMarker
+
+
+#----------------------------------------------------------------------------
+class SessionSpecTestCase(unittest.TestCase):
+    def testDefinitions(self):
+        self.assertEqual(sessionSpec("dev", "cd src"), {"name": "dev", "setup": "cd src", "shell": "/bin/sh"})
+        self.assertEqual(sessionSpec("dev", {"setup": ["a", "b"], "shell": "/bin/bash"}),
+                         {"name": "dev", "setup": "a\nb", "shell": "/bin/bash"})
+        self.assertEqual(sessionSpec("dev", {})["setup"], "")
+        self.assertEqual(sessionSpec("dev", {"env": ["VIRTUAL_ENV"]})["env"], ["VIRTUAL_ENV"])
+
+    def testInvalidDefinitions(self):
+        for definition in [3, ["a"], {"setup": 1}, {"setup": ["a", 2]}, {"shell": " "}, {"env": {}}, {"env": "PATH"}]:
+            self.assertRaises(ValueError, sessionSpec, "dev", definition)
+
+    def testSessionFor(self):
+        self.assertIsNone(sessionFor({"button": "b"}, {"dev": "cd src"}))
+        self.assertEqual(sessionFor({"session": "dev"}, {"dev": "cd src"})["setup"], "cd src")
+        self.assertEqual(sessionFor({"session": "undeclared"}, None)["setup"], "")
+
+    def testPartialMarker(self):
+        self.assertEqual(partialMarker(b"output__mar", b"__marker__"), 5)
+        self.assertEqual(partialMarker(b"output_", b"__marker__"), 1)
+        self.assertEqual(partialMarker(b"output", b"__marker__"), 0)
+        self.assertEqual(partialMarker(b"", b"__marker__"), 0)
+        self.assertEqual(partialMarker(b"__marker_", b"__marker__"), 9)
+
+#----------------------------------------------------------------------------
+@unittest.skipUnless(os.path.exists("/bin/sh"), "needs /bin/sh")
+class ShellSessionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = Session(sessionSpec("test", {"setup": ["FOO=from-setup", "cd /"]}))
+        self.session.ensureStarted()
+
+    def tearDown(self):
+        self.session.close()
+        if self.session.process is not None:
+            self.session.process.wait()
+
+    def runCmd(self, cmdText):
+        return b"".join(self.session.run(cmdText))
+
+    def testOutputAndStatus(self):
+        self.assertEqual(self.runCmd("echo $FOO; pwd"), b"from-setup\n/\n")
+        self.assertEqual(self.session.status, 0)
+        self.assertEqual(self.runCmd("echo oops; exit 4"), b"oops\n")
+        self.assertEqual(self.session.status, 4)
+        self.assertTrue(self.session.isAlive)
+
+    def testOutputWithoutANewline(self):
+        self.assertEqual(self.runCmd("printf partial"), b"partial")
+        self.assertEqual(self.session.status, 0)
+
+    def testCommandsDontLeak(self):
+        self.runCmd("cd /tmp; FOO=changed")
+        self.assertEqual(self.runCmd("echo $FOO; pwd"), b"from-setup\n/\n")
+
+    def testMarkerSplitAcrossReads(self):
+        ShellSession.CHUNK_SIZE, chunkSize = 3, ShellSession.CHUNK_SIZE
+        try:
+            self.assertEqual(self.runCmd("echo one; echo two"), b"one\ntwo\n")
+            self.assertEqual(self.session.status, 0)
+            self.assertEqual(self.runCmd("false"), b"")
+            self.assertEqual(self.session.status, 1)
+        finally:
+            ShellSession.CHUNK_SIZE = chunkSize
+
+    def testFailedSetup(self):
+        self.tearDown()
+        self.session = Session(sessionSpec("bad", "exit 2"))
+        self.session.ensureStarted()
+        self.assertEqual(self.runCmd("echo never"), b"")
+        self.assertIsNone(self.session.status)
+        self.assertIn("bad", self.session.error)
+        self.assertFalse(self.session.isSetUp)
+
+#----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()
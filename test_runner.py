@@ -0,0 +1,89 @@
+#!/usr/bin/python
+#
+#   File: test_runner.py
+# Author: Ellery Chan
+#  Email: ellery@precisionlightworks.com
+#   Date: Oct 16, 2026
+#
+# Copyright (c) 2015 Ellery Chan
+#----------------------------------------------------------------------------
+"""
+Unit tests for runner.py's HeadlessRunner.  Run with:  python -m unittest discover -p "test_*.py"
+"""
+from __future__ import print_function, division
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+from Executor import OutputBuffer
+from runner import HeadlessRunner, parseCmdLine
+
+
+#----------------------------------------------------------------------------
+class HeadlessRunnerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="runner-test-")
+        self.cacheHome = os.environ.get("XDG_CACHE_HOME")
+        os.environ["XDG_CACHE_HOME"] = os.path.join(self.dir, "cache")
+        self.stdout, self.stderr = sys.stdout, sys.stderr
+
+    def tearDown(self):
+        sys.stdout, sys.stderr = self.stdout, self.stderr
+        if self.cacheHome is None:
+            del os.environ["XDG_CACHE_HOME"]
+        else:
+            os.environ["XDG_CACHE_HOME"] = self.cacheHome
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def runCmds(self, cmds, *names):
+        """ Run the named cmds with --run and return (exit code, what they wrote to stdout).
+            What runner reports on stderr is kept in self.messages.
+        """
+        cmdFilePath = os.path.join(self.dir, "cmds.json")
+        with open(cmdFilePath, "w") as f:
+            json.dump(cmds, f)
+        argv = [cmdFilePath, "--noLogs", "--jobs", "2"]
+        for name in names:
+            argv += ["--run", name]
+        with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+            sys.stdout, sys.stderr = out, err
+            try:
+                exitCode = HeadlessRunner(parseCmdLine(argv)).run()
+            finally:
+                sys.stdout, sys.stderr = self.stdout, self.stderr
+            err.seek(0)
+            self.messages = err.read()
+            out.seek(0)
+            return exitCode, out.read()
+
+    def testKeepsAllOfTheOutput(self):
+        # Much more than an OutputBuffer keeps, written as fast as the command can
+        count = 4 * OutputBuffer.DEFAULT_MAX_BYTES // 7
+        cmd = "{} -c \"import sys; sys.stdout.writelines('%06d\\\\n' % i for i in range({}))\"".format(
+            sys.executable, count)
+        exitCode, output = self.runCmds([{"button": "A", "cmd": cmd}], "A")
+        self.assertEqual(exitCode, 0)
+        self.assertEqual(output, b"".join(b"%06d\n" % i for i in range(count)))
+
+    def testPrefixesConcurrentRuns(self):
+        exitCode, output = self.runCmds([{"button": "A", "cmd": "printf 'a1\\na2'"},
+                                         {"button": "B", "cmd": "echo b1; exit 3"}], "A", "B")
+        self.assertEqual(exitCode, 3)
+        self.assertEqual(sorted(output.splitlines()), [b"[A] a1", b"[A] a2", b"[B] b1"])
+        self.assertIn(b"B failed with exit code 3", self.messages)
+
+    def testNonAsciiNames(self):
+        # The name used to be looked up as bytes, and not found
+        exitCode, output = self.runCmds([{"button": u"Caf\xe9", "cmd": "echo a; exit 3"},
+                                         {"button": "B", "cmd": "echo b"}], b"Caf\xc3\xa9", "B")
+        self.assertEqual(exitCode, 3)
+        self.assertEqual(sorted(output.splitlines()), [b"[B] b", b"[Caf\xc3\xa9] a"])
+        self.assertIn(b"Caf\xc3\xa9 failed with exit code 3", self.messages)
+
+#----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()